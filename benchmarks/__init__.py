@@ -0,0 +1,5 @@
+"""Benchmarks for fastapi-serviceutils.
+
+Each module is a standalone script, run it from the project-root like
+``python -m benchmarks.call_service_benchmark``.
+"""
@@ -0,0 +1,100 @@
+"""Measure the rows per second of the bulk-write APIs of ``Database``.
+
+Compares a naive loop executing one insert per row with
+:meth:`fastapi_serviceutils.utils.external_resources.dbs.Database.execute_many`
+using chunks and with
+:meth:`fastapi_serviceutils.utils.external_resources.dbs.Database.copy_from`.
+
+Uses a temporary sqlite-database by default. ``copy_from`` is only measured
+for postgres-databases, as other databases fall back to ``execute_many``.
+To measure ``COPY FROM`` use a postgres-database by setting the
+environment-variable ``BENCHMARK_DSN``, e.g.
+``BENCHMARK_DSN=postgresql://postgres@localhost/test``.
+
+Run with ``python -m benchmarks.bulk_insert_benchmark``.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import databases
+from loguru import logger
+
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+
+ROWS = 10000
+CHUNK_SIZE = 1000
+INSERT = 'INSERT INTO bulk_items (id, name) VALUES (:id, :name)'
+
+
+def _values():
+    return [{'id': index, 'name': f'item {index}'} for index in range(ROWS)]
+
+
+async def _rows():
+    for index in range(ROWS):
+        yield (index, f'item {index}')
+
+
+async def _naive(database: Database):
+    for values in _values():
+        await database.execute(INSERT, values)
+
+
+async def _execute_many(database: Database):
+    await database.execute_many(INSERT, _values(), chunk_size=CHUNK_SIZE)
+
+
+async def _copy_from(database: Database):
+    await database.copy_from(
+        'bulk_items',
+        _rows(),
+        columns=['id', 'name'],
+        chunk_size=CHUNK_SIZE
+    )
+
+
+async def _measure(database: Database, insert) -> float:
+    await database.execute('DROP TABLE IF EXISTS bulk_items')
+    await database.execute(
+        'CREATE TABLE bulk_items (id INTEGER PRIMARY KEY, name TEXT)'
+    )
+    start = time.perf_counter()
+    await insert(database)
+    duration = time.perf_counter() - start
+    await database.execute('DROP TABLE bulk_items')
+    return ROWS / duration
+
+
+async def main(dsn: str):
+    """Print the rows per second of each way to insert into ``dsn``."""
+    database = Database(dsn=dsn, logger=logger, min_size=1, max_size=1)
+    inserts = [
+        ('naive loop', _naive),
+        (f'execute_many(chunk_size={CHUNK_SIZE})', _execute_many),
+    ]
+    if databases.DatabaseURL(dsn).dialect == 'postgresql':
+        inserts.append(('copy_from', _copy_from))
+    else:
+        print('copy_from skipped: COPY FROM requires postgres')
+    await database.connect()
+    try:
+        for name, insert in inserts:
+            rows_per_second = await _measure(database, insert)
+            print(f'{name:<32} {rows_per_second:>10.0f} rows/s')
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as folder:
+        asyncio.run(
+            main(
+                os.environ.get(
+                    'BENCHMARK_DSN',
+                    f'sqlite:///{Path(folder) / "bulk.sqlite"}'
+                )
+            )
+        )
@@ -0,0 +1,83 @@
+"""Compare concurrent throughput of the old and the new ``call_service``.
+
+The old implementation used the blocking :func:`requests.post` inside the
+coroutine, so concurrent calls were serialized on the event-loop. The new
+implementation uses the pooled :class:`httpx.AsyncClient` of a
+:class:`fastapi_serviceutils.utils.external_resources.services.Service`.
+
+Run with ``python -m benchmarks.call_service_benchmark``.
+"""
+import asyncio
+import time
+
+import requests
+from loguru import logger
+from pydantic import BaseModel
+
+from benchmarks.stub_server import json_handler
+from benchmarks.stub_server import stub_server
+from fastapi_serviceutils.utils.external_resources.services import call_service
+from fastapi_serviceutils.utils.external_resources.services import Service
+from fastapi_serviceutils.utils.external_resources.services import ServiceDefinition
+
+CONCURRENT_CALLS = 200
+DOWNSTREAM_DELAY = 0.01
+
+
+class Result(BaseModel):
+    """The result of the stub-server."""
+    value: int
+
+
+async def _blocking_call_service(url: str) -> Result:
+    """Call the service like the implementation based on requests did."""
+    response = requests.post(url)
+    response.raise_for_status()
+    return Result.parse_obj(response.json())
+
+
+async def _run_blocking(url: str) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[_blocking_call_service(url) for _ in range(CONCURRENT_CALLS)]
+    )
+    return time.perf_counter() - start
+
+
+async def _run_pooled(url: str) -> float:
+    service = Service(
+        definition=ServiceDefinition(name='stub',
+                                     url=url,
+                                     servicetype='rest'),
+        logger=logger
+    )
+    await service.connect()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            call_service(url=url,
+                         model=Result,
+                         service=service) for _ in range(CONCURRENT_CALLS)
+        ]
+    )
+    duration = time.perf_counter() - start
+    await service.disconnect()
+    return duration
+
+
+def main():
+    """Print the throughput of the blocking and the pooled calls."""
+    logger.remove()
+    with stub_server(json_handler({'value': 42}),
+                     delay=DOWNSTREAM_DELAY) as url:
+        for name, runner in [('requests (blocking)', _run_blocking),
+                             ('httpx (pooled)', _run_pooled)]:
+            duration = asyncio.run(runner(url))
+            print(
+                f'{name:<20} {CONCURRENT_CALLS} calls in {duration:.3f}s '
+                f'=> {CONCURRENT_CALLS / duration:.1f} calls/s'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Compare bytes on the wire and latency of calls with and without compression.
+
+A large json-body is sent to the stub-server which answers with a large
+json-result. Without compression neither the request-body nor the response
+is compressed, with compression both are gzip-compressed. The stub-server
+simulates a limited bandwidth between the services.
+
+Run with ``python -m benchmarks.compression_benchmark``.
+"""
+import asyncio
+import time
+from typing import List
+
+from loguru import logger
+from pydantic import BaseModel
+
+from benchmarks.stub_server import json_handler
+from benchmarks.stub_server import stub_server
+from benchmarks.stub_server import WireStatistics
+from fastapi_serviceutils.utils.external_resources.services import call_service
+from fastapi_serviceutils.utils.external_resources.services import Service
+from fastapi_serviceutils.utils.external_resources.services import ServiceDefinition
+
+CALLS = 20
+ITEMS = 2000
+BANDWIDTH = 10 * 1024 * 1024  # 10 MiB/s
+
+
+class Item(BaseModel):
+    """An item of the result of the stub-server."""
+    id: int
+    name: str
+    description: str
+
+
+class Result(BaseModel):
+    """The result of the stub-server."""
+    items: List[Item]
+
+
+def _create_items() -> List[dict]:
+    return [
+        {
+            'id': index,
+            'name': f'item {index}',
+            'description': f'description of the item with the id {index}',
+        } for index in range(ITEMS)
+    ]
+
+
+async def _run(url: str, compression: dict) -> float:
+    service = Service(
+        definition=ServiceDefinition(
+            name='stub',
+            url=url,
+            servicetype='rest',
+            compression=compression
+        ),
+        logger=logger
+    )
+    await service.connect()
+    body = {'items': _create_items()}
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        await call_service(url=url, model=Result, service=service, body=body)
+    duration = time.perf_counter() - start
+    await service.disconnect()
+    return duration
+
+
+def main():
+    """Print the bytes and latency of the calls for each compression."""
+    logger.remove()
+    settings = [
+        ('uncompressed', {'accept_encodings': [], 'request_encoding': None}),
+        ('gzip', {'accept_encodings': ['gzip'], 'request_encoding': 'gzip'}),
+    ]
+    handler = json_handler({'items': _create_items()})
+    for name, compression in settings:
+        statistics = WireStatistics()
+        with stub_server(handler,
+                         statistics=statistics,
+                         bandwidth=BANDWIDTH) as url:
+            duration = asyncio.run(_run(url, compression))
+        print(
+            f'{name:<13} sent {statistics.received / CALLS / 1024:7.1f} KiB '
+            f'received {statistics.sent / CALLS / 1024:7.1f} KiB '
+            f'latency {duration / CALLS * 1000:6.1f} ms per call'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Measure the startup-time of ``make_app`` with several postgres-databases.
+
+Compares ``make_app`` as is (the sqlalchemy engines are created lazily) with
+``make_app`` followed by the eager creation of the engines and
+``metadata.create_all`` for each database, as done before on creation of
+each :class:`fastapi_serviceutils.utils.external_resources.dbs.Database`.
+Besides the duration, the connection attempts of the engines during
+``make_app`` are counted.
+
+The databases use the dsn of the environment-variable ``BENCHMARK_DSN``,
+e.g. ``BENCHMARK_DSN=postgresql://postgres@localhost/test``. If not set, an
+unreachable host with a connect-timeout of one second is used, so each
+eager connection pays the timeout.
+
+Run with ``python -m benchmarks.make_app_benchmark``.
+"""
+import io
+import os
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Tuple
+
+import sqlalchemy
+import yaml
+from loguru import logger
+
+from fastapi_serviceutils import make_app
+
+DATABASES = 5
+REPEAT = 3
+UNREACHABLE_DSN = (
+    'postgresql://postgres@10.255.255.1:5432/benchmark?connect_timeout=1'
+)
+
+
+def _write_config(folder: Path, dsn: str) -> Path:
+    """Write a config with ``DATABASES`` databases using ``dsn``."""
+    config = yaml.safe_load(Path('tests/configs/config.yml').read_text())
+    config['external_resources']['services'] = None
+    config['external_resources']['databases'] = {
+        f'db{index}': {
+            'dsn': dsn,
+            'databasetype': 'postgres',
+        }
+        for index in range(DATABASES)
+    }
+    config['logger']['path'] = str(folder / 'log')
+    config_path = folder / 'config.yml'
+    config_path.write_text(yaml.safe_dump(config))
+    return config_path
+
+
+def _make_app(config_path: Path, eager: bool) -> Tuple[float, int]:
+    """Run ``make_app`` and get its duration and the connection attempts."""
+    connections = 0
+
+    def _count_connection(*_):
+        nonlocal connections
+        connections += 1
+
+    # the logger of the app writes to stdout, hide its messages
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        app = make_app(
+            config_path=config_path,
+            version='0.1.0',
+            endpoints=[],
+            enable_middlewares=[],
+            additional_middlewares=[],
+        )
+        if eager:
+            for database in app.databases.values():
+                sqlalchemy.event.listen(
+                    database.engine,
+                    'engine_connect',
+                    _count_connection
+                )
+                try:
+                    database.meta.create_all(database.engine)
+                except sqlalchemy.exc.OperationalError:
+                    # the unreachable host, the attempt took the timeout
+                    connections += 1
+        duration = time.perf_counter() - start
+    for database in app.databases.values():
+        if database._engine is not None:
+            database.engine.dispose()
+    logger.remove()
+    return duration, connections
+
+
+def main(dsn: str):
+    """Print the duration of make_app with eager and with lazy engines."""
+    with tempfile.TemporaryDirectory() as folder:
+        config_path = _write_config(Path(folder), dsn)
+        # import everything except the sync driver before measuring
+        _make_app(config_path, eager=False)
+        for name, eager in [('eager engines', True), ('lazy engines', False)]:
+            # the first run includes the import of the sync driver
+            results = [
+                _make_app(config_path,
+                          eager=eager) for _ in range(REPEAT)
+            ]
+            duration = sum(result[0] for result in results) / REPEAT
+            print(
+                f'{name:<14} make_app with {DATABASES} databases in '
+                f'{duration * 1000:.1f} ms (mean), '
+                f'{results[0][1]} connection attempts'
+            )
+
+
+if __name__ == '__main__':
+    main(os.environ.get('BENCHMARK_DSN', UNREACHABLE_DSN))
@@ -0,0 +1,95 @@
+"""Compare decoding and conversion of service-results into nested models.
+
+Compares the standard-library json with the fast json-backend (if
+installed) and the validation modes ``full`` and ``trusted``.
+
+Run with ``python -m benchmarks.model_validation_benchmark``.
+"""
+import json
+import timeit
+from typing import List
+
+from pydantic import BaseModel
+
+from fastapi_serviceutils.utils.external_resources.serialization import convert_to_model
+from fastapi_serviceutils.utils.external_resources.serialization import JSON_BACKEND
+from fastapi_serviceutils.utils.external_resources.serialization import loads
+from fastapi_serviceutils.utils.external_resources.serialization import Validation
+
+ITEMS = 1000
+REPEAT = 5
+NUMBER = 10
+
+
+class Address(BaseModel):
+    """An address of a person."""
+    street: str
+    number: int
+    zip_code: str
+    city: str
+
+
+class Person(BaseModel):
+    """A person of the result."""
+    id: int
+    name: str
+    score: float
+    active: bool
+    addresses: List[Address]
+    tags: List[str]
+
+
+class Result(BaseModel):
+    """The result to decode and convert."""
+    persons: List[Person]
+
+
+def _create_content() -> bytes:
+    persons = [
+        {
+            'id': index,
+            'name': f'person {index}',
+            'score': index / 3,
+            'active': index % 2 == 0,
+            'addresses': [
+                {
+                    'street': 'somestreet',
+                    'number': number,
+                    'zip_code': '12345',
+                    'city': 'somecity'
+                } for number in range(3)
+            ],
+            'tags': ['a', 'b', 'c'],
+        } for index in range(ITEMS)
+    ]
+    return json.dumps({'persons': persons}).encode()
+
+
+def main():
+    """Print the duration of each variant to decode and convert a result."""
+    content = _create_content()
+    variants = {
+        'json + full': lambda: Result.parse_obj(json.loads(content)),
+        f'{JSON_BACKEND} + full': lambda: convert_to_model(
+            Result,
+            loads(content),
+            Validation.full
+        ),
+        f'{JSON_BACKEND} + trusted': lambda: convert_to_model(
+            Result,
+            loads(content),
+            Validation.trusted
+        ),
+    }
+    print(f'{ITEMS} nested persons, {len(content) / 1024:.0f} KiB')
+    for name, variant in variants.items():
+        duration = min(
+            timeit.repeat(variant,
+                          repeat=REPEAT,
+                          number=NUMBER)
+        ) / NUMBER
+        print(f'{name:<20} {duration * 1000:8.2f} ms per result')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""Measure the pool-acquisitions per request with and without a dependency.
+
+Compares an endpoint running several queries using
+:class:`fastapi_serviceutils.utils.external_resources.dbs.Database` (each
+query acquires a connection of the pool) with an endpoint using the
+connection of
+:func:`fastapi_serviceutils.utils.external_resources.dbs.get_request_connection`
+(one acquisition per request).
+
+Uses a temporary sqlite-database by default. To use a postgres-database set
+the environment-variable ``BENCHMARK_DSN``, e.g.
+``BENCHMARK_DSN=postgresql://postgres@localhost/test``.
+
+Run with ``python -m benchmarks.request_connection_benchmark``.
+"""
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import databases
+import httpx
+from databases.core import Connection
+from fastapi import Depends
+from fastapi import FastAPI
+from loguru import logger
+from starlette.requests import Request
+
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+from fastapi_serviceutils.utils.external_resources.dbs import get_request_connection
+
+REQUESTS = 200
+QUERIES = 5
+
+
+class AcquisitionCounter:
+    """Count the acquisitions of connections of the pool of a database."""
+
+    def __init__(self, dbase: databases.Database):
+        """Wrap the connections of ``dbase`` to count their acquisitions."""
+        self.acquisitions = 0
+        self._create_connection = dbase._backend.connection
+        dbase._backend.connection = self._connection
+
+    def _connection(self):
+        backend_connection = self._create_connection()
+        acquire = backend_connection.acquire
+
+        async def _acquire():
+            self.acquisitions += 1
+            await acquire()
+
+        backend_connection.acquire = _acquire
+        return backend_connection
+
+
+def create_app(database: Database) -> FastAPI:
+    """Create the app querying ``database`` per query and per request."""
+    app = FastAPI()
+    app.databases = {'benchmarkdb': database}
+
+    @app.get('/per_query')
+    async def per_query(request: Request):
+        database = request.app.databases['benchmarkdb']
+        for _ in range(QUERIES):
+            await database.fetch_val('SELECT 1')
+        return {}
+
+    @app.get('/per_request')
+    async def per_request(
+            connection: Connection = Depends(
+                get_request_connection('benchmarkdb')
+            )
+    ):
+        for _ in range(QUERIES):
+            await connection.fetch_val('SELECT 1')
+        return {}
+
+    return app
+
+
+async def main(dsn: str):
+    """Print the acquisitions and requests per second of each route."""
+    database = Database(dsn=dsn, logger=logger, min_size=1, max_size=5)
+    await database.connect()
+    counter = AcquisitionCounter(database.dbase)
+    app = create_app(database)
+    try:
+        async with httpx.AsyncClient(app=app,
+                                     base_url='http://benchmark') as client:
+            for route in ['/per_query', '/per_request']:
+                counter.acquisitions = 0
+                start = time.perf_counter()
+                for _ in range(REQUESTS):
+                    response = await client.get(route)
+                    response.raise_for_status()
+                duration = time.perf_counter() - start
+                print(
+                    f'{route:<14} '
+                    f'{counter.acquisitions / REQUESTS:>5.1f} '
+                    f'acquisitions/request '
+                    f'{REQUESTS / duration:>8.0f} requests/s'
+                )
+    finally:
+        await database.disconnect()
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as folder:
+        asyncio.run(
+            main(
+                os.environ.get(
+                    'BENCHMARK_DSN',
+                    f'sqlite:///{Path(folder) / "requests.sqlite"}'
+                )
+            )
+        )
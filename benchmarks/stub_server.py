@@ -0,0 +1,150 @@
+"""Minimal local http-server used as downstream service inside benchmarks.
+
+The server runs inside its own thread with its own event-loop, so it keeps
+answering even if the event-loop of the benchmarked code is blocked.
+"""
+import asyncio
+import gzip
+import json
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable
+from typing import Iterator
+
+Handler = Callable[[str, str, bytes], bytes]
+
+
+@dataclass
+class WireStatistics:
+    """Bytes of the request- and response-bodies as sent over the wire."""
+    received: int = 0
+    sent: int = 0
+
+
+def json_handler(payload: dict) -> Handler:
+    """Create a handler always answering with ``payload`` as json."""
+    body = json.dumps(payload).encode()
+
+    def _handler(method: str, path: str, request_body: bytes) -> bytes:
+        return body
+
+    return _handler
+
+
+async def _handle_connection(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        handler: Handler,
+        delay: float,
+        statistics: WireStatistics,
+        bandwidth: float
+):
+    """Answer all requests on one (keep-alive) connection."""
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode().split(' ', 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                key, value = line.decode().split(':', 1)
+                headers[key.strip().lower()] = value.strip()
+            length = int(headers.get('content-length', 0))
+            request_body = await reader.readexactly(length) if length else b''
+            statistics.received += len(request_body)
+            if headers.get('content-encoding') == 'gzip':
+                request_body = gzip.decompress(request_body)
+            if delay:
+                await asyncio.sleep(delay)
+            body = handler(method, path, request_body)
+            encoding = b''
+            if 'gzip' in headers.get('accept-encoding', ''):
+                body = gzip.compress(body, compresslevel=6)
+                encoding = b'content-encoding: gzip\r\n'
+            statistics.sent += len(body)
+            if bandwidth:
+                await asyncio.sleep((length + len(body)) / bandwidth)
+            writer.write(
+                b'HTTP/1.1 200 OK\r\n'
+                b'content-type: application/json\r\n' + encoding +
+                b'content-length: ' + str(len(body)).encode() + b'\r\n'
+                b'connection: keep-alive\r\n\r\n' + body
+            )
+            await writer.drain()
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+@contextmanager
+def stub_server(
+        handler: Handler,
+        delay: float = 0.0,
+        statistics: WireStatistics = None,
+        bandwidth: float = None
+) -> Iterator[str]:
+    """Run a stub-server in a background thread.
+
+    Gzip-compressed request-bodies are decompressed and responses are
+    gzip-compressed if the client accepts it.
+
+    Parameters:
+        handler: function creating the response-body for a request.
+        delay: seconds to wait before answering each request.
+        statistics: if set, the bytes received and sent are counted here.
+        bandwidth: if set, bytes per second to simulate for the transfer of
+            the request- and response-body.
+
+    Returns:
+        the url of the running server.
+
+    """
+    statistics = statistics if statistics is not None else WireStatistics()
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    async def _serve():
+        state['stop'] = asyncio.Event()
+        server = await asyncio.start_server(
+            lambda reader,
+            writer: _handle_connection(reader,
+                                       writer,
+                                       handler,
+                                       delay,
+                                       statistics,
+                                       bandwidth),
+            host='127.0.0.1',
+            port=0
+        )
+        state['port'] = server.sockets[0].getsockname()[1]
+        started.set()
+        await state['stop'].wait()
+        server.close()
+        await server.wait_closed()
+        connections = [
+            task for task in asyncio.all_tasks()
+            if task is not asyncio.current_task()
+        ]
+        for task in connections:
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+    thread = threading.Thread(
+        target=lambda: loop.run_until_complete(_serve()),
+        daemon=True
+    )
+    thread.start()
+    started.wait()
+    try:
+        yield f'http://127.0.0.1:{state["port"]}/'
+    finally:
+        loop.call_soon_threadsafe(state['stop'].set)
+        thread.join(timeout=5)
+        loop.close()
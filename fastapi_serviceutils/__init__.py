@@ -30,9 +30,12 @@ from .app import Endpoint
 from .app import update_config
 from .app.endpoints import add_default_endpoints
 from .app.handlers import log_exception_handler
+from .app.middlewares import DeadlineMiddleware
+from .app.middlewares import RequestTransactionMiddleware
 from .utils.docs import mount_apidoc
 from .utils.external_resources.dbs import add_databases_to_app
 from .utils.external_resources.services import add_services_to_app
+from .utils.external_resources.services import close_default_client
 
 __version__ = '2.1.0'
 
@@ -50,6 +53,10 @@ def include_endpoints_and_middlewares_to_app(
         it should be enabled, ``'log_exception'`` should be included in
         ``enable_middlewares``.
 
+    Note:
+        Available default middlewares are ``'trusted_hosts'``,
+        ``'deadline'`` and ``'log_exception'``.
+
     Note:
         A router included by this function has additional attributes:
 
@@ -97,6 +104,14 @@ def include_endpoints_and_middlewares_to_app(
             allowed_hosts=app.config.service.allowed_hosts
         )
 
+    # add middleware to set the deadline of each request used to limit the
+    # calls of external resources
+    if 'deadline' in enable_middlewares:
+        app.add_middleware(
+            DeadlineMiddleware,
+            default_timeout=app.config.service.request_timeout
+        )
+
     # add custom exception handler to log exceptions
     if 'log_exception' in enable_middlewares:
         app.exception_handler(Exception)(log_exception_handler)
@@ -184,7 +199,8 @@ def make_app(
         level=config.logger.level,
         retention=config.logger.retention,
         rotation=config.logger.rotation,
-        _format=config.logger.format
+        _format=config.logger.format,
+        batching=config.logger.batching
     )
 
     # if dependencies for external databases are defined in the config, add
@@ -194,6 +210,8 @@ def make_app(
             app,
             dbs=config.external_resources.databases
         )
+        # transactions of requests are finished before the response is sent
+        app.add_middleware(RequestTransactionMiddleware)
     else:
         app.databases = {}
 
@@ -206,6 +224,8 @@ def make_app(
         )
     else:
         app.services = {}
+    # calls without an open client of a service use a shared client
+    app.add_event_handler('shutdown', close_default_client)
 
     # add default endpoints if defined in the config
     endpoints = add_default_endpoints(endpoints=endpoints, config=app.config)
@@ -17,6 +17,7 @@ from .logger import customize_logging
 from .service_config import collect_config_definition
 from .service_config import Config
 from .service_config import update_config
+from fastapi_serviceutils.utils.external_resources.request_id import set_request_id
 
 
 @dataclass
@@ -60,7 +61,9 @@ def create_id_logger(
 
     This function is meant to be used inside an endpoint-function to be able
     to use a unique request-id in each request for better traceback in the
-    logs.
+    logs. The request-id is also set as the request-id of the current
+    request, so logs of external resources used inside the endpoint-function
+    (like slow queries) contain it, too.
 
     Parameters:
         request: the request to create id and logger.
@@ -71,6 +74,7 @@ def create_id_logger(
 
     """
     request_id = create_request_id(request)
+    set_request_id(request_id)
     log = endpoint.router.logger.bind(request_id=request_id)
     return request_id, log
 
@@ -8,6 +8,7 @@ from typing import List
 from fastapi_serviceutils.app import Endpoint
 from fastapi_serviceutils.app.endpoints.default import alive as alive_endpoint
 from fastapi_serviceutils.app.endpoints.default import config as config_endpoint
+from fastapi_serviceutils.app.endpoints.default import query_statistics as query_statistics_endpoint
 from fastapi_serviceutils.app.service_config import Config
 
 
@@ -83,6 +84,8 @@ def add_default_endpoints(endpoints: List[Endpoint],
 
     * ``'alive``
     * ``'config'``
+    * ``'query_statistics'`` (the timing of the queries of databases with
+      defined ``query_statistics``)
 
     Parameters:
         endpoints: the already set endpoints to add the default ones.
@@ -95,7 +98,8 @@ def add_default_endpoints(endpoints: List[Endpoint],
     """
     default_endpoints = {
         'alive': alive_endpoint.ENDPOINT,
-        'config': config_endpoint.ENDPOINT
+        'config': config_endpoint.ENDPOINT,
+        'query_statistics': query_statistics_endpoint.ENDPOINT
     }
 
     for endpoint in config.service.use_default_endpoints:
@@ -14,10 +14,38 @@ The config-endpoint returns data of model
 defined here, because already defined.
 
 The alive-endpoint returns data of model :class:`Alive`.
+
+The query_statistics-endpoint returns data of model :class:`QueryStatistics`.
 """
+from typing import Dict
+
 from pydantic import BaseModel
 
 
 class Alive(BaseModel):
     """Represent the alive-result of the endpoint ``/api/alive``."""
     alive: bool
+
+
+class StatementStatistics(BaseModel):
+    """Represent the statistics of the queries of one statement-fingerprint.
+
+    The ``histogram`` contains the number of queries by the upper bound of
+    their bucket in seconds (``'+Inf'`` for queries slower than the largest
+    bound).
+    """
+    count: int
+    errors: int
+    total: float
+    mean: float
+    max: float
+    histogram: Dict[str, int]
+
+
+class QueryStatistics(BaseModel):
+    """Represent the result of the endpoint ``/api/query_statistics``.
+
+    Contains the statistics of the statements by their fingerprint for each
+    database with enabled ``query_statistics``.
+    """
+    databases: Dict[str, Dict[str, StatementStatistics]]
@@ -0,0 +1,46 @@
+"""Endpoint to return the timing of the queries of the databases."""
+from fastapi import APIRouter
+from starlette.requests import Request
+
+from fastapi_serviceutils.app import create_id_logger
+from fastapi_serviceutils.app import Endpoint
+from fastapi_serviceutils.app.endpoints.default.models import QueryStatistics
+from fastapi_serviceutils.app.endpoints.default.models import StatementStatistics
+
+ENDPOINT = Endpoint(router=APIRouter(), route='/api/query_statistics')
+SUMMARY = 'Get the timing of the queries of the databases.'
+
+
+@ENDPOINT.router.post('/', response_model=QueryStatistics, summary=SUMMARY)
+async def get_query_statistics(request: Request) -> QueryStatistics:
+    """Get the statistics of the queries by statement-fingerprint.
+
+    Only databases with defined ``query_statistics`` are included.
+
+    Returns:
+        the count, errors, durations and latency-histogram of each statement
+        by database.
+
+    """
+    _, log = create_id_logger(request=request, endpoint=ENDPOINT)
+    log.debug(f'received request for endpoint {request.url}.')
+    result = {}
+    for name, database in ENDPOINT.router.databases.items():
+        query_statistics = database.query_statistics
+        if query_statistics is None:
+            continue
+        bounds = [str(bound) for bound in query_statistics.buckets] + ['+Inf']
+        result[name] = {
+            fingerprint: StatementStatistics(
+                count=statement.count,
+                errors=statement.errors,
+                total=statement.total,
+                mean=statement.mean,
+                max=statement.max,
+                histogram=dict(zip(bounds,
+                                   statement.histogram))
+            )
+            for fingerprint,
+            statement in query_statistics.statements.items()
+        }
+    return QueryStatistics(databases=result)
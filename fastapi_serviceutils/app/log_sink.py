@@ -0,0 +1,243 @@
+"""Bounded log-sink writing the log-messages in batches inside a thread.
+
+Logging only appends the formatted message to a bounded in-memory queue, a
+background thread writes the queued messages in batches (if ``batch_size``
+messages are queued or ``flush_interval`` seconds passed). If the queue is
+full, the ``overflow`` policy decides if the logging call waits or which
+message is dropped.
+"""
+import itertools
+import threading
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from pydantic import BaseModel
+from pydantic import validator
+
+BLOCK = 'block'
+DROP_DEBUG_FIRST = 'drop_debug_first'
+DROP_OLDEST = 'drop_oldest'
+OVERFLOW_POLICIES = (BLOCK, DROP_DEBUG_FIRST, DROP_OLDEST)
+
+# messages up to this level-number are dropped first by ``drop_debug_first``
+DEBUG_LEVEL = 10
+
+
+class LogBatchingDefinition(BaseModel):
+    """Definition of the batching of the log-messages inside the config.
+
+    Attributes:
+        max_size: the maximum number of queued messages.
+        batch_size: the number of messages written at once.
+        flush_interval: seconds after which queued messages are written, even
+            if less than ``batch_size`` messages are queued.
+        overflow: what to do if the queue is full:
+
+            * ``block``: wait until the queue has room again.
+            * ``drop_debug_first``: drop debug-messages (and lower), if no
+              debug-messages are queued drop the oldest message.
+            * ``drop_oldest``: drop the oldest message.
+
+    """
+    max_size: int = 10000
+    batch_size: int = 100
+    flush_interval: float = 0.5
+    overflow: str = DROP_OLDEST
+
+    @validator('overflow')
+    def check_overflow(cls, overflow: str) -> str:
+        """Ensure the overflow-policy is supported."""
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f'overflow has to be one of {", ".join(OVERFLOW_POLICIES)}.'
+            )
+        return overflow
+
+
+@dataclass
+class SinkStatistics:
+    """Counters of a :class:`BatchingSink`.
+
+    Attributes:
+        written: number of written messages.
+        batches: number of written batches.
+        errors: number of batches failed to write.
+        dropped: number of dropped messages by their level.
+
+    """
+    written: int = 0
+    batches: int = 0
+    errors: int = 0
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total_dropped(self) -> int:
+        """The number of dropped messages of all levels."""
+        return sum(self.dropped.values())
+
+
+class BatchingSink:
+    """Log-sink queueing the messages and writing them in batches.
+
+    Used as sink of loguru (``logger.add(BatchingSink(...))``). On removal of
+    the sink the queued messages are written and the thread is stopped.
+
+    Attributes:
+        writers: the functions writing a batch (the joined messages).
+        max_size: the maximum number of queued messages.
+        batch_size: the number of messages written at once.
+        flush_interval: seconds after which queued messages are written.
+        overflow: the policy if the queue is full.
+        statistics: the counters of written and dropped messages.
+
+    """
+
+    def __init__(
+            self,
+            writers: List[Callable[[str],
+                                   None]],
+            max_size: int = 10000,
+            batch_size: int = 100,
+            flush_interval: float = 0.5,
+            overflow: str = DROP_OLDEST
+    ):
+        """Create the sink and start the thread writing the batches."""
+        self.writers = writers
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.statistics = SinkStatistics()
+        # queued messages as (sequence, level-name, message), the debug-
+        # messages separately to drop them first
+        self._queue = deque()
+        self._debug_queue = deque()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name='log-writer',
+            daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def from_definition(
+            cls,
+            writers: List[Callable[[str],
+                                   None]],
+            definition: LogBatchingDefinition
+    ) -> 'BatchingSink':
+        """Create the sink using the settings of ``definition``."""
+        return cls(
+            writers=writers,
+            max_size=definition.max_size,
+            batch_size=definition.batch_size,
+            flush_interval=definition.flush_interval,
+            overflow=definition.overflow
+        )
+
+    def __len__(self) -> int:
+        """Get the number of queued messages."""
+        return len(self._queue) + len(self._debug_queue)
+
+    def write(self, message: str):
+        """Queue ``message`` (called by loguru for each log-message)."""
+        level = message.record['level']
+        with self._condition:
+            if len(self) >= self.max_size and not self._make_room(level.no):
+                self._count_dropped(level.name)
+                return
+            queue = self._debug_queue if level.no <= DEBUG_LEVEL else (
+                self._queue
+            )
+            queue.append((next(self._sequence), level.name, str(message)))
+            if len(self) >= self.batch_size:
+                self._condition.notify_all()
+
+    def stop(self):
+        """Write all queued messages and stop the thread (called by loguru)."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _make_room(self, levelno: int) -> bool:
+        """Make room for a message of ``levelno`` using the overflow-policy.
+
+        Returns:
+            ``False`` if the message has to be dropped instead.
+
+        """
+        if self.overflow == BLOCK:
+            while len(self) >= self.max_size and not self._stopped:
+                self._condition.notify_all()
+                self._condition.wait()
+            return not self._stopped
+        if self.overflow == DROP_DEBUG_FIRST:
+            if levelno <= DEBUG_LEVEL:
+                return False
+            if self._debug_queue:
+                self._count_dropped(self._debug_queue.popleft()[1])
+                return True
+        self._count_dropped(self._pop_oldest()[1])
+        return True
+
+    def _count_dropped(self, level: str):
+        dropped = self.statistics.dropped
+        dropped[level] = dropped.get(level, 0) + 1
+
+    def _pop_oldest(self) -> Tuple[int, str, str]:
+        """Remove the oldest queued message of both queues."""
+        if not self._debug_queue or (
+                self._queue and self._queue[0][0] < self._debug_queue[0][0]):
+            return self._queue.popleft()
+        return self._debug_queue.popleft()
+
+    def _take_batch(self) -> List[str]:
+        """Remove the oldest ``batch_size`` messages from the queues."""
+        return [
+            self._pop_oldest()[2]
+            for _ in range(min(len(self), self.batch_size))
+        ]
+
+    def _run(self):
+        """Write the queued messages in batches until stopped."""
+        while True:
+            with self._condition:
+                if len(self) < self.batch_size and not self._stopped:
+                    self._condition.wait(self.flush_interval)
+                batch = self._take_batch()
+                # wake up logging calls waiting for room inside the queue
+                self._condition.notify_all()
+                if not batch and self._stopped:
+                    return
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: List[str]):
+        """Write ``batch`` using all writers."""
+        text = ''.join(batch)
+        for writer in self.writers:
+            try:
+                writer(text)
+            except Exception:
+                self.statistics.errors += 1
+        self.statistics.written += len(batch)
+        self.statistics.batches += 1
+
+
+__all__ = [
+    'BLOCK',
+    'BatchingSink',
+    'DROP_DEBUG_FIRST',
+    'DROP_OLDEST',
+    'LogBatchingDefinition',
+    'SinkStatistics',
+]
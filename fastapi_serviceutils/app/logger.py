@@ -2,9 +2,20 @@
 import logging
 import sys
 from pathlib import Path
+from typing import Optional
 
 from loguru import logger
 
+from .log_sink import BatchingSink
+from .log_sink import LogBatchingDefinition
+from .log_sink import SinkStatistics
+
+# the extra-key of the records containing a batch of messages of the
+# batching sink, written by the file-sink only
+_BATCH_KEY = 'log_batch'
+
+_batching_sink = None
+
 
 class _InterceptHandler(logging.Handler):
     loglevel_mapping = {
@@ -37,45 +48,110 @@ class _InterceptHandler(logging.Handler):
               record.getMessage())
 
 
+def _is_batch(record: dict) -> bool:
+    return _BATCH_KEY in record['extra']
+
+
+def _is_no_batch(record: dict) -> bool:
+    return _BATCH_KEY not in record['extra']
+
+
+def _write_stdout(text: str):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _write_file(text: str):
+    logger.bind(**{_BATCH_KEY: True}).opt(raw=True).info(text)
+
+
+def get_log_statistics() -> Optional[SinkStatistics]:
+    """Get the counters of written and dropped log-messages.
+
+    Returns:
+        the counters of the batching sink or ``None`` if the logging is not
+        using batching.
+
+    """
+    if _batching_sink is None:
+        return None
+    return _batching_sink.statistics
+
+
 def customize_logging(
         filepath: Path,
         level: str,
         rotation: str,
         retention: str,
-        _format: str
+        _format: str,
+        batching: LogBatchingDefinition = None
 ):
     """Define the logger to be used by the service based on loguru.
 
+    Per default the messages are written to stdout and the logfile using the
+    unbounded queues of loguru (``enqueue=True``). If ``batching`` is set,
+    the messages are queued inside a bounded queue of a
+    :class:`fastapi_serviceutils.app.log_sink.BatchingSink` instead, which
+    writes them in batches to stdout and the logfile. Its counters are
+    available using :func:`get_log_statistics`.
+
     Parameters:
         filepath: the path where to store the logfiles.
         level: the minimum log-level to log.
         rotation: when to rotate the logfile.
         retention: when to remove logfiles.
         _format: the logformat to use.
+        batching: the settings of the batching of the messages.
 
     Returns:
         the logger to be used by the service.
 
     """
+    global _batching_sink
     filepath.parent.mkdir(parents=True, exist_ok=True)
 
     logger.remove()
-    logger.add(
-        sys.stdout,
-        enqueue=True,
-        backtrace=True,
-        level=level.upper(),
-        format=_format
-    )
-    logger.add(
-        str(filepath),
-        rotation=rotation,
-        retention=retention,
-        enqueue=True,
-        backtrace=True,
-        level=level.upper(),
-        format=_format
-    )
+    _batching_sink = None
+    if batching is None:
+        logger.add(
+            sys.stdout,
+            enqueue=True,
+            backtrace=True,
+            level=level.upper(),
+            format=_format
+        )
+        logger.add(
+            str(filepath),
+            rotation=rotation,
+            retention=retention,
+            enqueue=True,
+            backtrace=True,
+            level=level.upper(),
+            format=_format
+        )
+    else:
+        _batching_sink = BatchingSink.from_definition(
+            writers=[_write_stdout, _write_file],
+            definition=batching
+        )
+        # added before the file-sink, so on removal the queued messages are
+        # written while the file-sink still exists
+        logger.add(
+            _batching_sink,
+            backtrace=True,
+            colorize=False,
+            level=level.upper(),
+            format=_format,
+            filter=_is_no_batch
+        )
+        logger.add(
+            str(filepath),
+            rotation=rotation,
+            retention=retention,
+            level=0,
+            format='{message}',
+            filter=_is_batch
+        )
     logging.basicConfig(handlers=[_InterceptHandler()], level=0)
     for _log in ['uvicorn',
                  'uvicorn.error',
@@ -90,4 +166,5 @@ def customize_logging(
 
 __all__ = [
     'customize_logging',
+    'get_log_statistics',
 ]
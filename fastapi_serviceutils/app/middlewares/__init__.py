@@ -1 +1,104 @@
 """Middlewares available for fastapi- / starlette-based services."""
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from fastapi_serviceutils.utils.external_resources.dbs import finish_request_transactions
+from fastapi_serviceutils.utils.external_resources.dbs import REQUEST_TRANSACTIONS
+from fastapi_serviceutils.utils.external_resources.deadline import reset_deadline
+from fastapi_serviceutils.utils.external_resources.deadline import set_deadline
+
+
+class DeadlineMiddleware:
+    """Set the deadline of each request for calls to external resources.
+
+    The deadline is taken from the request-header ``header`` (seconds the
+    client is willing to wait). If the header is missing or invalid
+    ``default_timeout`` is used. Calls to external services made while
+    handling the request (including retries) do not exceed this deadline.
+
+    Attributes:
+        app: the app to wrap.
+        header: the name of the header containing the timeout in seconds.
+        default_timeout: the timeout to use if the header is not set. If
+            ``None`` requests without header have no deadline.
+
+    """
+
+    def __init__(
+            self,
+            app: ASGIApp,
+            header: str = 'x-request-timeout',
+            default_timeout: float = None
+    ):
+        """Wrap ``app`` to set the deadline of its requests."""
+        self.app = app
+        self.header = header.lower().encode()
+        self.default_timeout = default_timeout
+
+    def get_timeout(self, scope: Scope) -> float:
+        """Extract the timeout of the request out of its headers."""
+        for key, value in scope.get('headers', []):
+            if key.lower() == self.header:
+                try:
+                    return float(value.decode())
+                except ValueError:
+                    break
+        return self.default_timeout
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle the request with the deadline set from its headers."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        token = set_deadline(self.get_timeout(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
+
+
+class RequestTransactionMiddleware:
+    """Finish the transactions of a request before its response is sent.
+
+    Transactions opened by
+    :func:`fastapi_serviceutils.utils.external_resources.dbs.get_request_connection`
+    are committed right before the response starts if its status-code is
+    below 400 and rolled back otherwise or if the request failed with an
+    exception. So a successful response is only sent if the transactions
+    were committed.
+
+    Attributes:
+        app: the app to wrap.
+
+    """
+
+    def __init__(self, app: ASGIApp):
+        """Wrap ``app`` to finish the transactions of its requests."""
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        """Handle the request, finishing its transactions before sending."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        scope[REQUEST_TRANSACTIONS] = []
+
+        async def _send(message: Message):
+            if message['type'] == 'http.response.start':
+                await finish_request_transactions(
+                    scope,
+                    success=message['status'] < 400
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        except Exception:
+            await finish_request_transactions(scope, success=False)
+            raise
+
+
+__all__ = ['DeadlineMiddleware', 'RequestTransactionMiddleware']
@@ -12,6 +12,7 @@ from pydantic import BaseModel
 from pydantic.dataclasses import dataclass
 from toolz.dicttoolz import update_in
 
+from fastapi_serviceutils.app.log_sink import LogBatchingDefinition
 from fastapi_serviceutils.utils.external_resources.dbs import DatabaseDefinition
 from fastapi_serviceutils.utils.external_resources.services import ServiceDefinition
 
@@ -35,6 +36,11 @@ class ServiceConfig(BaseModel):
             is located.
         readme: path to the readme-file to integrate into the
             swagger-documentation.
+        allowed_hosts: the hosts allowed to access the service.
+        use_default_endpoints: the default endpoints to add to the service.
+        request_timeout: default seconds a request may take, used as deadline
+            for calls to external resources if the request does not define
+            its own timeout (requires middleware ``'deadline'``).
 
     """
     name: str
@@ -45,6 +51,7 @@ class ServiceConfig(BaseModel):
     readme: str
     allowed_hosts: List[str]
     use_default_endpoints: List[str]
+    request_timeout: float = None
 
 
 class LoggerConfig(BaseModel):
@@ -57,6 +64,8 @@ class LoggerConfig(BaseModel):
         rotation: when to rotate the log-file.
         retention: how long to keep log-files.
         format: log-format to use.
+        batching: if set, the messages are written in batches using a
+            bounded queue instead of the unbounded queues of loguru.
 
     """
     path: str
@@ -65,6 +74,7 @@ class LoggerConfig(BaseModel):
     rotation: str
     retention: str
     format: str
+    batching: LogBatchingDefinition = None
 
 
 @dataclass
@@ -78,26 +88,12 @@ class ExternalResources:
         if self.databases:
             for name, attributes in self.databases.items():
                 self.databases.update(
-                    {
-                        name:
-                        DatabaseDefinition(
-                            name=name,
-                            dsn=attributes['dsn'],
-                            databasetype=attributes['databasetype']
-                        )
-                    }
+                    {name: DatabaseDefinition(**{**attributes, 'name': name})}
                 )
         if self.services:
             for name, attributes in self.services.items():
                 self.services.update(
-                    {
-                        name:
-                        ServiceDefinition(
-                            name=name,
-                            url=attributes['url'],
-                            servicetype=attributes['servicetype']
-                        )
-                    }
+                    {name: ServiceDefinition(**{**attributes, 'name': name})}
                 )
 
     def __post_init_post_parse__(self):
@@ -0,0 +1,138 @@
+"""Batch single lookups of keys into bulk calls (dataloader-style).
+
+Keys requested within a short window (or until a maximum batch size is
+reached) are collected and loaded by a single call, each caller gets the
+result for its own key.
+"""
+import asyncio
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Set
+
+from pydantic import BaseModel
+
+
+class BatchDefinition(BaseModel):
+    """Definition of the batch-endpoint of a service inside ``config.yml``.
+
+    Attributes:
+        url: the url of the batch-endpoint of the service.
+        method: the method to use for the batch-endpoint.
+        key_param: the name of the request-param containing the keys.
+        key_field: the field of each item of the result containing its key.
+            Not used if the batch-endpoint returns an object with the keys
+            as properties.
+        max_batch_size: the maximum keys loaded by a single call.
+        max_wait: seconds to collect keys before a call is made.
+
+    """
+    url: str
+    method: str = 'post'
+    key_param: str = 'ids'
+    key_field: str = 'id'
+    max_batch_size: int = 100
+    max_wait: float = 0.005
+
+
+def _retrieve_exception(future: asyncio.Future):
+    """Mark the exception of ``future`` as retrieved."""
+    if not future.cancelled():
+        future.exception()
+
+
+@dataclass
+class Batcher:
+    """Collect keys and load them using ``batch_function`` in batches.
+
+    Attributes:
+        batch_function: function loading a list of keys. Returns the results
+            by their keys. Keys missing inside the result get ``None``.
+        max_batch_size: the maximum keys passed to a single call of
+            ``batch_function``.
+        max_wait: seconds to collect keys before ``batch_function`` is
+            called.
+        pending: the futures of the collected keys of the next batch.
+        flush_tasks: the tasks loading the dispatched batches, referenced
+            until they are done, so they are not garbage-collected.
+        batches: the number of calls of ``batch_function``.
+
+    """
+    batch_function: Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+    max_batch_size: int = 100
+    max_wait: float = 0.005
+    pending: Dict[Hashable, asyncio.Future] = field(
+        default_factory=dict,
+        repr=False
+    )
+    batches: int = 0
+    flush_tasks: Set[asyncio.Future] = field(default_factory=set, repr=False)
+    _timer: asyncio.TimerHandle = field(default=None, repr=False)
+
+    async def load(self, key: Hashable) -> Any:
+        """Load the result for ``key`` as part of the next batch.
+
+        Identical keys requested for the same batch are loaded only once.
+        A cancelled caller does not cancel the batch of the other callers.
+
+        Parameters:
+            key: the key to load.
+
+        Returns:
+            the result for ``key``.
+
+        """
+        future = self.pending.get(key)
+        if future is None:
+            loop = asyncio.get_event_loop()
+            future = loop.create_future()
+            future.add_done_callback(_retrieve_exception)
+            self.pending[key] = future
+            if len(self.pending) >= self.max_batch_size:
+                self.dispatch()
+            elif self._timer is None:
+                self._timer = loop.call_later(self.max_wait, self.dispatch)
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: List[Hashable]) -> List[Any]:
+        """Load the results for ``keys`` in the order of ``keys``."""
+        return list(await asyncio.gather(*[self.load(key) for key in keys]))
+
+    def dispatch(self):
+        """Start loading the collected keys without waiting any longer."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch = self.pending
+        self.pending = {}
+        if batch:
+            self.batches += 1
+            flush_task = asyncio.ensure_future(self._load_batch(batch))
+            self.flush_tasks.add(flush_task)
+            flush_task.add_done_callback(self._flush_done)
+
+    def _flush_done(self, flush_task: asyncio.Future):
+        """Forget the finished ``flush_task`` and retrieve its exception."""
+        self.flush_tasks.discard(flush_task)
+        _retrieve_exception(flush_task)
+
+    async def _load_batch(self, batch: Dict[Hashable, asyncio.Future]):
+        """Load the keys of ``batch`` and pass the results to the futures."""
+        try:
+            results = await self.batch_function(list(batch))
+        except Exception as error:
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for key, future in batch.items():
+            if not future.done():
+                future.set_result(results.get(key))
+
+
+__all__ = ['BatchDefinition', 'Batcher']
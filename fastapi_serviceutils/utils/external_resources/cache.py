@@ -0,0 +1,168 @@
+"""In-memory cache with time-to-live, LRU-eviction and size-bound.
+
+Used to cache results of calls to external resources.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Callable
+from typing import Hashable
+
+from pydantic import BaseModel
+
+
+class CacheDefinition(BaseModel):
+    """Definition of a cache as used inside ``config.yml:external_resources``.
+
+    Attributes:
+        ttl: seconds an entry is valid after it was stored.
+        max_entries: the maximum number of entries. If reached, the least
+            recently used entry is evicted.
+        max_bytes: the maximum summed size of all entries in bytes. If not
+            set, the size of the cache is only bound by ``max_entries``.
+
+    """
+    ttl: float = 60.0
+    max_entries: int = 1024
+    max_bytes: int = None
+
+
+@dataclass
+class CacheStatistics:
+    """Counters of a :class:`TTLCache` used to tune its settings.
+
+    Attributes:
+        hits: number of lookups returning a valid entry.
+        misses: number of lookups without a valid entry.
+        evictions: number of entries removed to respect ``max_entries`` or
+            ``max_bytes``.
+        expirations: number of entries removed because their ttl passed.
+        entries: current number of entries.
+        size: current summed size of all entries in bytes.
+
+    """
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    entries: int = 0
+    size: int = 0
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    size: int
+    expires: float
+
+
+@dataclass
+class TTLCache:
+    """Least recently used cache with a time-to-live for its entries.
+
+    Attributes:
+        ttl: seconds an entry is valid after it was stored.
+        max_entries: the maximum number of entries.
+        max_bytes: the maximum summed size of all entries in bytes.
+        statistics: hit-, miss- and eviction-counters of the cache.
+        clock: function returning the current time in seconds.
+
+    """
+    ttl: float
+    max_entries: int
+    max_bytes: int = None
+    statistics: CacheStatistics = field(default_factory=CacheStatistics)
+    clock: Callable[[], float] = time.monotonic
+    _entries: OrderedDict = field(default_factory=OrderedDict, repr=False)
+
+    @classmethod
+    def from_definition(cls, definition: CacheDefinition) -> 'TTLCache':
+        """Create a cache using the settings of ``definition``."""
+        return cls(
+            ttl=definition.ttl,
+            max_entries=definition.max_entries,
+            max_bytes=definition.max_bytes
+        )
+
+    def get(self, key: Hashable) -> Any:
+        """Get the value stored for ``key``.
+
+        Parameters:
+            key: the key of the entry.
+
+        Returns:
+            the stored value or ``None`` if there is no valid entry for
+            ``key``.
+
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= self.clock():
+            self._remove(key)
+            self.statistics.expirations += 1
+            entry = None
+        if entry is None:
+            self.statistics.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.statistics.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, size: int = 0):
+        """Store ``value`` for ``key``.
+
+        Least recently used entries are evicted until ``max_entries`` and
+        ``max_bytes`` are respected. Values larger than ``max_bytes`` are not
+        stored at all.
+
+        Parameters:
+            key: the key of the entry.
+            value: the value to store.
+            size: the size of the value in bytes.
+
+        """
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = _CacheEntry(
+            value=value,
+            size=size,
+            expires=self.clock() + self.ttl
+        )
+        self.statistics.entries += 1
+        self.statistics.size += size
+        while self.statistics.entries > self.max_entries or (
+                self.max_bytes is not None
+                and self.statistics.size > self.max_bytes):
+            self._remove(next(iter(self._entries)))
+            self.statistics.evictions += 1
+
+    def pop(self, key: Hashable):
+        """Remove the entry for ``key`` if it exists."""
+        if key in self._entries:
+            self._remove(key)
+
+    def clear(self):
+        """Remove all entries."""
+        self._entries.clear()
+        self.statistics.entries = 0
+        self.statistics.size = 0
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self.statistics.entries -= 1
+        self.statistics.size -= entry.size
+
+    def __len__(self) -> int:
+        """Get the number of stored entries (including expired ones)."""
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Check if an unexpired entry is stored for ``key``."""
+        entry = self._entries.get(key)
+        return entry is not None and entry.expires > self.clock()
+
+
+__all__ = ['CacheDefinition', 'CacheStatistics', 'TTLCache']
@@ -0,0 +1,137 @@
+"""Circuit breaker to stop calling external resources which are down."""
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from pydantic import BaseModel
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreakerDefinition(BaseModel):
+    """Definition of a circuit breaker inside ``config.yml``.
+
+    Attributes:
+        failure_threshold: the number of consecutive failures opening the
+            circuit.
+        recovery_timeout: seconds the circuit stays open before trial calls
+            are allowed again.
+        half_open_max_calls: the number of trial calls allowed at the same
+            time while the circuit is half-open.
+
+    """
+    failure_threshold: int = 5
+    recovery_timeout: float = 30.0
+    half_open_max_calls: int = 1
+
+
+@dataclass
+class CircuitBreaker:
+    """Circuit breaker with the states closed, open and half-open.
+
+    While ``closed`` all calls are allowed. After ``failure_threshold``
+    consecutive failures the circuit is ``open`` and all calls are rejected.
+    After ``recovery_timeout`` seconds the circuit gets ``half_open`` and
+    allows ``half_open_max_calls`` trial calls. A successful trial call closes
+    the circuit, a failed one opens it again.
+
+    Attributes:
+        failure_threshold: the number of consecutive failures opening the
+            circuit.
+        recovery_timeout: seconds the circuit stays open.
+        half_open_max_calls: the number of concurrent trial calls while
+            half-open.
+        failures: the current number of consecutive failures.
+        opened_at: the time the circuit was opened.
+        trial_calls: the number of trial calls currently in flight.
+        clock: function returning the current time in seconds.
+
+    """
+    failure_threshold: int
+    recovery_timeout: float
+    half_open_max_calls: int = 1
+    failures: int = 0
+    opened_at: float = None
+    trial_calls: int = 0
+    clock: Callable[[], float] = time.monotonic
+
+    @classmethod
+    def from_definition(
+            cls,
+            definition: CircuitBreakerDefinition
+    ) -> 'CircuitBreaker':
+        """Create a circuit breaker using the settings of ``definition``."""
+        return cls(
+            failure_threshold=definition.failure_threshold,
+            recovery_timeout=definition.recovery_timeout,
+            half_open_max_calls=definition.half_open_max_calls
+        )
+
+    @property
+    def state(self) -> str:
+        """The current state: ``closed``, ``open`` or ``half_open``."""
+        if self.opened_at is None:
+            return CLOSED
+        if self.clock() - self.opened_at < self.recovery_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def allow_request(self) -> bool:
+        """Check if a call is allowed and register it as trial call if so.
+
+        Each allowed call must be finished using :meth:`record` or
+        :meth:`release`.
+
+        Returns:
+            if the call is allowed.
+
+        """
+        state = self.state
+        if state == OPEN:
+            return False
+        if state == HALF_OPEN:
+            if self.trial_calls >= self.half_open_max_calls:
+                return False
+            self.trial_calls += 1
+        return True
+
+    def release(self):
+        """Finish a call allowed by :meth:`allow_request` without outcome.
+
+        Used for cancelled calls, which should neither count as success nor
+        as failure.
+
+        """
+        if self.state == HALF_OPEN:
+            self.trial_calls = max(self.trial_calls - 1, 0)
+
+    def record(self, success: bool):
+        """Record the outcome of a call allowed by :meth:`allow_request`.
+
+        Parameters:
+            success: if the call succeeded.
+
+        """
+        half_open = self.state == HALF_OPEN
+        if half_open:
+            self.trial_calls = max(self.trial_calls - 1, 0)
+        if success:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_calls = 0
+            return
+        self.failures += 1
+        if half_open or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+            self.trial_calls = 0
+
+
+__all__ = [
+    'CircuitBreaker',
+    'CircuitBreakerDefinition',
+    'CLOSED',
+    'HALF_OPEN',
+    'OPEN',
+]
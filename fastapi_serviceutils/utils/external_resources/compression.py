@@ -0,0 +1,140 @@
+"""Compression of request- and response-bodies of calls to services.
+
+Responses are decompressed by :mod:`httpx`, so only the encodings it can
+decode are advertised: ``gzip`` and ``deflate``, ``br`` if ``brotli`` is
+installed and ``zstd`` if ``zstandard`` is installed and :mod:`httpx` is at
+least version 0.27. Request-bodies can be compressed using ``gzip`` and
+``deflate`` or ``br`` and ``zstd`` if ``brotli`` / ``zstandard`` are
+installed.
+"""
+import gzip
+import zlib
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import httpx
+from pydantic import BaseModel
+from pydantic import validator
+
+from fastapi_serviceutils.utils.external_resources.serialization import dumps
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSORS: Dict[str, Callable[[bytes], bytes]] = {
+    'gzip': lambda content: gzip.compress(content, compresslevel=6),
+    'deflate': lambda content: zlib.compress(content, 6),
+}
+if brotli is not None:  # pragma: no cover
+    COMPRESSORS['br'] = lambda content: brotli.compress(content, quality=4)
+if zstandard is not None:  # pragma: no cover
+    COMPRESSORS['zstd'] = zstandard.ZstdCompressor(level=3).compress
+
+# httpx decodes zstd-encoded responses since version 0.27
+HTTPX_ZSTD_VERSION = (0, 27)
+
+RESPONSE_ENCODINGS: List[str] = ['gzip', 'deflate']
+if brotli is not None:  # pragma: no cover
+    RESPONSE_ENCODINGS.append('br')
+if zstandard is not None and tuple(  # pragma: no cover
+        int(part) for part in httpx.__version__.split('.')[:2]
+) >= HTTPX_ZSTD_VERSION:
+    RESPONSE_ENCODINGS.append('zstd')
+
+
+class CompressionDefinition(BaseModel):
+    """Definition of the compression for a service inside ``config.yml``.
+
+    Attributes:
+        accept_encodings: the encodings the service may use for responses.
+            Encodings the installed :mod:`httpx` can not decode are
+            ignored. If not set, all supported encodings are accepted, an
+            empty list accepts only uncompressed responses.
+        request_encoding: the encoding used to compress request-bodies. If
+            not set (the default), request-bodies are not compressed. Only
+            set it, if the service decodes compressed request-bodies.
+        min_size: the minimum size in bytes of a request-body to compress
+            it. Smaller bodies are sent uncompressed.
+
+    """
+    accept_encodings: List[str] = None
+    request_encoding: Optional[str] = None
+    min_size: int = 1024
+
+    @validator('request_encoding')
+    def check_request_encoding(cls, value: Optional[str]) -> Optional[str]:
+        """Ensure the ``request_encoding`` is available."""
+        if value is not None and value not in COMPRESSORS:
+            raise ValueError(
+                f'Unsupported request_encoding {value}. Available are '
+                f'{list(COMPRESSORS)}.'
+            )
+        return value
+
+
+def get_accept_encoding(definition: CompressionDefinition) -> str:
+    """Get the ``Accept-Encoding`` header for the service.
+
+    Parameters:
+        definition: the compression-settings of the service.
+
+    Returns:
+        the accepted encodings ordered by preference.
+
+    """
+    encodings = definition.accept_encodings
+    if encodings is None:
+        encodings = RESPONSE_ENCODINGS
+    return ', '.join(
+        encoding for encoding in encodings if encoding in RESPONSE_ENCODINGS
+    ) or 'identity'
+
+
+def encode_body(
+        body: Any,
+        definition: Optional[CompressionDefinition]
+) -> Tuple[Optional[bytes],
+           Dict[str,
+                str]]:
+    """Encode the request-``body`` as json and compress it if defined.
+
+    Parameters:
+        body: the body of the request (``None`` if the request has no body).
+        definition: the compression-settings of the service (optional).
+
+    Returns:
+        the content of the request and the headers to send with it.
+
+    """
+    headers = {}
+    if definition is not None:
+        headers['accept-encoding'] = get_accept_encoding(definition)
+    if body is None:
+        return None, headers
+    content = dumps(body)
+    headers['content-type'] = 'application/json'
+    if definition is not None and definition.request_encoding and len(
+            content) >= definition.min_size:
+        content = COMPRESSORS[definition.request_encoding](content)
+        headers['content-encoding'] = definition.request_encoding
+    return content, headers
+
+
+__all__ = [
+    'COMPRESSORS',
+    'CompressionDefinition',
+    'encode_body',
+    'get_accept_encoding',
+    'RESPONSE_ENCODINGS',
+]
@@ -1,14 +1,75 @@
 """Functions and classes to use databases as external_resources in service."""
+import asyncio
+import contextvars
+import itertools
+import os
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import AsyncIterable
+from typing import AsyncIterator
+from typing import Callable
 from typing import Dict
+from typing import FrozenSet
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
 
+import asyncpg
 import databases
 import sqlalchemy
+from databases.backends.postgres import PostgresConnection
+from databases.backends.postgres import Record
 from fastapi import FastAPI
 from loguru._logger import Logger
 from pydantic import BaseModel
+from pydantic import root_validator
 from sqlalchemy.engine.base import Engine
 from sqlalchemy.sql.schema import MetaData
+from starlette.requests import Request
+from starlette.types import Scope
+
+from fastapi_serviceutils.utils.external_resources.cache import CacheDefinition
+from fastapi_serviceutils.utils.external_resources.load_balancing import LoadBalancer
+from fastapi_serviceutils.utils.external_resources.load_balancing import LoadBalancingDefinition
+from fastapi_serviceutils.utils.external_resources.load_balancing import ROUND_ROBIN
+from fastapi_serviceutils.utils.external_resources.load_balancing import Upstream
+from fastapi_serviceutils.utils.external_resources.query_cache import create_query_key
+from fastapi_serviceutils.utils.external_resources.query_cache import get_read_tables
+from fastapi_serviceutils.utils.external_resources.query_cache import get_written_tables
+from fastapi_serviceutils.utils.external_resources.query_cache import QueryCache
+from fastapi_serviceutils.utils.external_resources.query_statistics import get_fingerprint
+from fastapi_serviceutils.utils.external_resources.query_statistics import QueryStatistics
+from fastapi_serviceutils.utils.external_resources.query_statistics import QueryStatisticsDefinition
+from fastapi_serviceutils.utils.external_resources.reflection import ReflectionDefinition
+from fastapi_serviceutils.utils.external_resources.reflection import SchemaCache
+from fastapi_serviceutils.utils.external_resources.request_id import get_request_id
+
+AUTO = 'auto'
+
+# errors of a replica after which the query is repeated on the primary
+CONNECTION_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresConnectionError,
+    asyncpg.InterfaceError,
+)
+
+# key of the request-scope listing the transactions opened by
+# :func:`get_request_connection` (set by ``RequestTransactionMiddleware``)
+REQUEST_TRANSACTIONS = 'fastapi_serviceutils.request_transactions'
+# the transactions of :func:`get_request_connection` of the current request
+_REQUEST_TRANSACTIONS = contextvars.ContextVar(
+    'request_transactions',
+    default=()
+)
 
 
 class DatabaseDefinition(BaseModel):
@@ -16,68 +77,1031 @@ class DatabaseDefinition(BaseModel):
 
     Attributes:
         name: the name of the database.
-        dsn: the connection string for the database.
+        dsn: the connection string for the database (the primary if
+            ``replica_dsns`` are defined).
         databasetype: the type of the database (currently only postgres
             supported).
+        replica_dsns: the connection strings of the read-replicas of the
+            database.
+        replica_balancing: how reads are balanced between the replicas and
+            when a failing replica is ejected. If not set, the replicas are
+            used round-robin.
         min_size: the minimum connections to open to the database.
-        max_size: the maximum connections to open to the database.
+        max_size: the maximum connections to open to the database. If
+            ``auto``, ``max_connections`` are shared by all ``workers``.
+        warm_up: if ``min_size`` connections should be opened and validated
+            on app-startup, so the first requests do not have to open them.
+        validation_query: the query used to validate the connections during
+            warm-up.
+        acquire_timeout: seconds to wait for a free connection of the pool.
+            If not set, the wait is unlimited.
+        max_inactive_lifetime: seconds after which idle connections of the
+            pool are closed.
+        max_queries: the number of queries after which a connection of the
+            pool is replaced by a new one.
+        max_connections: the connections the service may open to the
+            database over all of its workers. Required for ``max_size:
+            auto``.
+        workers: the number of worker-processes of the service. If not set,
+            the environment-variable ``WEB_CONCURRENCY`` (used by uvicorn
+            and gunicorn) or ``1`` is used.
+        cache: if set, results of :meth:`Database.fetch_all`,
+            :meth:`Database.fetch_one` and :meth:`Database.fetch_val` are
+            cached using these settings.
+        query_statistics: if set, the queries of the database are timed and
+            slow queries are logged using these settings.
+        reflection: if set, the tables reflected by :meth:`Database.get_table`
+            are cached on disk using these settings.
 
     """
     name: str
     dsn: str
     databasetype: str
+    replica_dsns: List[str] = None
+    replica_balancing: LoadBalancingDefinition = None
     min_size: int = 5
-    max_size: int = 20
+    max_size: Union[int, str] = 20
+    warm_up: bool = False
+    validation_query: str = 'SELECT 1'
+    acquire_timeout: float = None
+    max_inactive_lifetime: float = None
+    max_queries: int = None
+    max_connections: int = None
+    workers: int = None
+    cache: CacheDefinition = None
+    query_statistics: QueryStatisticsDefinition = None
+    reflection: ReflectionDefinition = None
+
+    @root_validator
+    def check_auto_size(cls, values: dict) -> dict:
+        """Ensure ``max_connections`` is defined if ``max_size`` is auto."""
+        max_size = values.get('max_size')
+        if isinstance(max_size, str):
+            if max_size != AUTO:
+                raise ValueError(f'max_size has to be an int or {AUTO}.')
+            if values.get('max_connections') is None:
+                raise ValueError(
+                    f'max_connections is required for max_size {AUTO}.'
+                )
+        return values
+
+
+def get_workers() -> int:
+    """Get the number of worker-processes of the service.
+
+    Returns:
+        the value of the environment-variable ``WEB_CONCURRENCY`` or ``1``
+        if not set.
+
+    """
+    return int(os.environ.get('WEB_CONCURRENCY', 1))
+
+
+def get_pool_size(definition: DatabaseDefinition) -> Tuple[int, int]:
+    """Get the minimum and maximum size of the pool of the database.
+
+    If ``max_size`` is ``auto``, the ``max_connections`` of the database are
+    divided between the workers of the service, so all workers together do
+    not open more than ``max_connections`` connections.
+
+    Parameters:
+        definition: the definition of the database.
+
+    Returns:
+        the minimum and the maximum size of the pool.
+
+    """
+    max_size = definition.max_size
+    if max_size == AUTO:
+        workers = definition.workers or get_workers()
+        max_size = max(definition.max_connections // workers, 1)
+    return min(definition.min_size, max_size), max_size
+
+
+class _AcquireTimeoutPool:
+    """Proxy of a :class:`asyncpg.pool.Pool` acquiring with a timeout.
+
+    Raises :class:`asyncio.TimeoutError` if no connection is free within the
+    timeout.
+    """
+
+    def __init__(self, pool, timeout: float):
+        self._pool = pool
+        self._timeout = timeout
+
+    def acquire(self):
+        """Acquire a connection of the pool waiting at most the timeout."""
+        return self._pool.acquire(timeout=self._timeout)
+
+    def __getattr__(self, name: str):
+        return getattr(self._pool, name)
 
 
 @dataclass
 class Database:
     """Class to interact with database as defined in external_resources.
 
+    Reads using :meth:`fetch_all`, :meth:`fetch_one` and :meth:`fetch_val`
+    are balanced between the read-replicas (if defined), writes using
+    :meth:`execute` and :meth:`execute_many` go to the primary.
+    A replica failing with a connection-error is ejected for a while and the
+    read is repeated on the primary. If all replicas are ejected, the
+    primary is used for reads.
+    If a ``query_cache`` is set, the results of reads are cached and writes
+    using :meth:`execute`, :meth:`execute_many` and :meth:`copy_from`
+    invalidate the cached results of the written tables. Writes using
+    ``dbase`` directly do not invalidate the cache.
+    If ``query_statistics`` are set, the queries of these methods are timed
+    by their fingerprint and slow queries are logged with the request-id of
+    the current request.
+
     Attributes:
-        dsn: the connection string for the database.
+        dsn: the connection string for the database (the primary).
         logger: the logger to use inside this class.
-        min_size: the minimum connections to open to the database.
-        max_size: the maximum connections to open to the database.
-        engine: the sqlalchemy engine to use.
-        meta: the sqlalchemy metadata to use.
+        min_size: the minimum connections to open to each pool.
+        max_size: the maximum connections to open to each pool.
         dbase: the instance of :class:`databases.Database` to use for this
-            database.
+            database (the primary).
+        replica_dsns: the connection strings of the read-replicas.
+        replicas: the instances of :class:`databases.Database` of the
+            replicas by their dsn.
+        replica_balancer: selects the replica to use for each read. Is
+            ``None`` if no replicas are defined.
+        warm_up: if ``min_size`` connections should be opened and validated
+            on :meth:`connect`.
+        validation_query: the query used to validate the connections during
+            warm-up.
+        acquire_timeout: seconds to wait for a free connection of the pool.
+        max_inactive_lifetime: seconds after which idle connections of the
+            pool are closed.
+        max_queries: the number of queries after which a connection of the
+            pool is replaced by a new one.
+        query_cache: the cache for the results of reads. Is ``None`` if no
+            cache is defined for the database.
+        query_statistics: the timing of the queries. Is ``None`` if no
+            statistics are defined for the database.
+        db_schema: the schema of the database to reflect tables of.
+        schema_cache: the cache of the reflected tables on disk. Is ``None``
+            if the reflected tables should not be cached.
 
     """
     dsn: str
     logger: Logger
     min_size: int
     max_size: int
-    engine: Engine = None
-    meta: MetaData = None
     dbase: databases.Database = None
+    warm_up: bool = False
+    validation_query: str = 'SELECT 1'
+    acquire_timeout: float = None
+    max_inactive_lifetime: float = None
+    max_queries: int = None
+    replica_dsns: List[str] = field(default_factory=list)
+    replicas: Dict[str, databases.Database] = field(
+        default_factory=dict,
+        repr=False
+    )
+    replica_balancer: LoadBalancer = None
+    query_cache: QueryCache = None
+    query_statistics: QueryStatistics = None
+    db_schema: str = None
+    schema_cache: SchemaCache = None
+    _reflection_lock: asyncio.Lock = field(default=None, repr=False)
+    _connect_locks: Dict[str, asyncio.Lock] = field(
+        default_factory=dict,
+        repr=False
+    )
+    _engine: Engine = field(default=None, repr=False)
+    _meta: MetaData = field(default=None, repr=False)
 
     def __post_init__(self):
-        """Set attributes ``self.dbase``, ``self.engine`` and ``self.meta``."""
-        self.dbase = databases.Database(
-            self.dsn,
+        """Set attributes ``self.dbase`` and ``self.replicas``.
+
+        The sqlalchemy engine and metadata are only created on first access
+        of :attr:`engine` / :attr:`meta`, so creating the instance does not
+        need a sync driver nor access to the database.
+
+        """
+        self.dbase = self.create_pool(self.dsn)
+        self.replicas = {
+            dsn: self.create_pool(dsn) for dsn in self.replica_dsns
+        }
+        if self.replicas and self.replica_balancer is None:
+            self.replica_balancer = LoadBalancer(
+                urls=self.replica_dsns,
+                strategy=ROUND_ROBIN
+            )
+
+    def create_pool(self, dsn: str) -> databases.Database:
+        """Create the connection-pool for ``dsn`` using the pool-settings."""
+        if databases.DatabaseURL(dsn).dialect == 'sqlite':
+            # sqlite opens a connection per use and has no pool-settings
+            return databases.Database(dsn)
+        return databases.Database(
+            dsn,
             min_size=self.min_size,
-            max_size=self.max_size
+            max_size=self.max_size,
+            **self.get_pool_options()
         )
-        self.engine, self.meta = self.get_engine_metadata()
+
+    def get_pool_options(self) -> dict:
+        """Get the additional options for the connection-pool, if defined."""
+        options = {}
+        if self.max_inactive_lifetime is not None:
+            options['max_inactive_connection_lifetime'] = (
+                self.max_inactive_lifetime
+            )
+        if self.max_queries is not None:
+            options['max_queries'] = self.max_queries
+        return options
+
+    @property
+    def engine(self) -> Engine:
+        """The sqlalchemy engine to use, created on first access."""
+        if self._engine is None:
+            self._engine = sqlalchemy.create_engine(self.dsn)
+        return self._engine
+
+    @property
+    def meta(self) -> MetaData:
+        """The sqlalchemy metadata to use, created on first access."""
+        if self._meta is None:
+            self._meta = sqlalchemy.MetaData()
+        return self._meta
 
     def get_engine_metadata(self) -> [Engine, MetaData]:
-        """Create the sqlalchemy-engine and -metadata for the database."""
-        metadata = sqlalchemy.MetaData()
-        engine = sqlalchemy.create_engine(self.dsn)
-        metadata.create_all(engine)
-        return engine, metadata
+        """Get the sqlalchemy-engine and -metadata for the database."""
+        return self.engine, self.meta
+
+    async def get_table(self, name: str) -> sqlalchemy.Table:
+        """Get the table ``name`` of the database, reflected on first use.
+
+        The table is loaded from the ``schema_cache`` if cached there,
+        otherwise it is reflected using the sqlalchemy engine (requiring a
+        sync driver) and stored inside the ``schema_cache``. Loaded tables
+        (and the tables referenced by their foreign keys) are added to
+        :attr:`meta`. Loading runs inside a thread, so it does not block the
+        event-loop.
+
+        Parameters:
+            name: the name of the table.
+
+        Returns:
+            the table.
+
+        Raises:
+            sqlalchemy.exc.NoSuchTableError: if the table does not exist.
+
+        """
+        key = name if self.db_schema is None else f'{self.db_schema}.{name}'
+        table = self.meta.tables.get(key)
+        if table is not None:
+            return table
+        if self._reflection_lock is None:
+            self._reflection_lock = asyncio.Lock()
+        async with self._reflection_lock:
+            if key not in self.meta.tables:
+                metadata = await asyncio.get_event_loop().run_in_executor(
+                    None,
+                    self._load_table,
+                    name
+                )
+                # merged inside the event-loop, so the thread does not modify
+                # the shared metadata while it is used
+                for table in metadata.tables.values():
+                    if table.key not in self.meta.tables:
+                        table.tometadata(self.meta)
+        return self.meta.tables[key]
+
+    def _load_table(self, name: str) -> MetaData:
+        """Load the table ``name`` into a new metadata, see :meth:`get_table`.
+
+        Returns:
+            the metadata containing the table and the tables referenced by
+            its foreign keys.
+
+        """
+        metadata = None
+        if self.schema_cache is not None:
+            metadata = self.schema_cache.load(name, self.logger)
+        if metadata is None:
+            self.logger.info(f'reflecting table {name} of {self.dsn}')
+            metadata = MetaData()
+            sqlalchemy.Table(
+                name,
+                metadata,
+                autoload=True,
+                autoload_with=self.engine,
+                schema=self.db_schema
+            )
+            if self.schema_cache is not None:
+                self.schema_cache.store(name, metadata)
+        return metadata
 
     async def connect(self):
-        """Open connection to the database."""
+        """Open connection to the database and warm it up if defined.
+
+        The replicas are connected concurrently. A replica which can not be
+        connected is ejected and connected again on a later read.
+
+        """
         self.logger.info(f'connecting to {self.dsn}')
-        await self.dbase.connect()
+        results = await asyncio.gather(
+            self.connect_pool(self.dbase),
+            *[
+                self.connect_pool(replica)
+                for replica in self.replicas.values()
+            ],
+            return_exceptions=True
+        )
+        if isinstance(results[0], BaseException):
+            raise results[0]
+        for upstream, result in zip(self.get_replica_upstreams(), results[1:]):
+            if isinstance(result, BaseException):
+                self.logger.warning(
+                    f'could not connect to replica {upstream.url}: {result}'
+                )
+                self._eject_replica(upstream)
+
+    async def connect_pool(self, dbase: databases.Database):
+        """Connect the pool ``dbase`` and warm it up if defined."""
+        await dbase.connect()
+        # databases acquires the connections without timeout from the pool.
+        # Replacing its pool uses internals of databases, which is pinned to
+        # the tested versions (see ``requirements.txt``) for this reason
+        backend = dbase._backend
+        if self.acquire_timeout is not None and getattr(backend,
+                                                        '_pool',
+                                                        None) is not None:
+            backend._pool = _AcquireTimeoutPool(
+                backend._pool,
+                self.acquire_timeout
+            )
+        if self.warm_up:
+            await self.warm_up_pool(dbase)
+
+    async def ensure_connected(self, dbase: databases.Database):
+        """Connect the pool ``dbase`` if it is not connected (anymore).
+
+        Concurrent calls for the same pool wait for a single connect, so a
+        replica is not connected several times after it was ejected.
+
+        """
+        if dbase.is_connected:
+            return
+        key = str(dbase.url)
+        if key not in self._connect_locks:
+            self._connect_locks[key] = asyncio.Lock()
+        async with self._connect_locks[key]:
+            if not dbase.is_connected:
+                await self.connect_pool(dbase)
+
+    async def warm_up_pool(self, dbase: databases.Database = None):
+        """Open ``min_size`` connections and validate each of them.
+
+        The connections are held at the same time, so each of them is a
+        separate connection of the pool. Each connection runs the
+        ``validation_query``.
+
+        Parameters:
+            dbase: the pool to warm up. If not set, the pool of the primary
+                is used.
+
+        """
+        dbase = self.dbase if dbase is None else dbase
+        self.logger.info(
+            f'warming up {self.min_size} connections to {dbase.url}'
+        )
+        remaining = self.min_size
+        all_validated = asyncio.Event()
+
+        async def _validate_connection():
+            nonlocal remaining
+            async with dbase.connection() as connection:
+                try:
+                    await connection.fetch_val(self.validation_query)
+                except Exception:
+                    all_validated.set()
+                    raise
+                remaining -= 1
+                if remaining <= 0:
+                    all_validated.set()
+                # hold the connection until all connections are validated
+                await all_validated.wait()
+
+        await asyncio.gather(
+            *[_validate_connection() for _ in range(self.min_size)]
+        )
 
     async def disconnect(self):
-        """Close connection to the database."""
+        """Close connection to the database and its replicas."""
         self.logger.info(f'disconnecting from {self.dsn}')
-        await self.dbase.disconnect()
+        await asyncio.gather(
+            self.dbase.disconnect(),
+            *[
+                replica.disconnect() for replica in self.replicas.values()
+                if replica.is_connected
+            ]
+        )
+
+    def get_replica_upstreams(self) -> List[Upstream]:
+        """Get the state of each replica (empty if no replicas defined)."""
+        if self.replica_balancer is None:
+            return []
+        return self.replica_balancer.upstreams
+
+    def _eject_replica(self, upstream: Upstream):
+        """Eject the replica of ``upstream`` immediately."""
+        for _ in range(upstream.failures, self.replica_balancer.max_failures):
+            self.replica_balancer.record(upstream, success=False)
+
+    def _select_replica(self) -> Optional[Upstream]:
+        """Select the replica for the next read.
+
+        Returns:
+            the state of the selected replica or ``None`` if the primary
+            should be used.
+
+        """
+        if self.replica_balancer is None:
+            return None
+        upstream = self.replica_balancer.select()
+        if not upstream.is_available(self.replica_balancer.clock()):
+            # all replicas are ejected
+            return None
+        return upstream
+
+    @contextmanager
+    def _timed(self, query: Union[sqlalchemy.sql.ClauseElement, str]):
+        """Time the execution of ``query`` inside the context.
+
+        The duration is recorded inside the ``query_statistics`` (if
+        defined). If the query was slower than the ``slow_query_threshold``,
+        it is logged with the request-id of the current request.
+
+        Parameters:
+            query: the executed query.
+
+        """
+        if self.query_statistics is None:
+            yield
+            return
+        error = False
+        start = time.perf_counter()
+        try:
+            yield
+        except GeneratorExit:
+            # a stream closed before reading all rows did not fail
+            raise
+        except BaseException:
+            error = True
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            fingerprint = get_fingerprint(query)
+            self.query_statistics.record(fingerprint, duration, error)
+            if self.query_statistics.is_slow(duration):
+                self.logger.bind(request_id=get_request_id()).warning(
+                    f'slow query on {self.dsn} took '
+                    f'{duration * 1000:.1f} ms: {fingerprint}'
+                )
+
+    async def _read(self, method: str, use_primary: bool, *args, **kwargs):
+        """Run the read-``method`` of :class:`databases.Database`.
+
+        Parameters:
+            method: the name of the method to run.
+            use_primary: if the primary should be used instead of a replica
+                (for example to read own writes).
+            args: the positional arguments of the method.
+            kwargs: the keyword arguments of the method.
+
+        Returns:
+            the result of the method.
+
+        """
+        upstream = None if use_primary else self._select_replica()
+        if upstream is None:
+            with self._timed(args[0]):
+                return await getattr(self.dbase, method)(*args, **kwargs)
+        replica = self.replicas[upstream.url]
+        upstream.outstanding += 1
+        try:
+            await self.ensure_connected(replica)
+            with self._timed(args[0]):
+                result = await getattr(replica, method)(*args, **kwargs)
+        except CONNECTION_ERRORS as error:
+            self.logger.warning(
+                f'read from replica {upstream.url} failed, using primary: '
+                f'{error}'
+            )
+            self.replica_balancer.record(upstream, success=False)
+            with self._timed(args[0]):
+                return await getattr(self.dbase, method)(*args, **kwargs)
+        finally:
+            upstream.outstanding -= 1
+        self.replica_balancer.record(upstream, success=True)
+        return result
+
+    async def _cached_read(
+            self,
+            method: str,
+            use_primary: bool,
+            use_cache: bool,
+            query: Union[sqlalchemy.sql.ClauseElement,
+                         str],
+            values: dict = None,
+            **kwargs
+    ):
+        """Run the read-``method`` using the ``query_cache`` if defined.
+
+        Reads using the primary or inside a transaction of
+        :func:`get_request_connection` are not cached, as they can read own
+        (uncommitted) writes.
+
+        Parameters:
+            method: the name of the method to run.
+            use_primary: if the primary should be used instead of a replica.
+            use_cache: if the ``query_cache`` (if defined) should be used.
+            query: the query to read.
+            values: the values of the query.
+            kwargs: the additional keyword arguments of the method.
+
+        Returns:
+            the result of the method.
+
+        """
+        query_cache = self.query_cache
+        # reads inside a transaction of the request can see its uncommitted
+        # writes, which must not be cached
+        if (query_cache is None or use_primary or not use_cache
+                or self._get_request_transaction() is not None):
+            return await self._read(
+                method,
+                use_primary,
+                query,
+                values,
+                **kwargs
+            )
+        key = create_query_key(method, query, values, **kwargs)
+        result = query_cache.get(key)
+        if result is None:
+            generation = query_cache.generation
+            result = await self._read(
+                method,
+                use_primary,
+                query,
+                values,
+                **kwargs
+            )
+            if result is None:
+                return None
+            query_cache.set(key, result, get_read_tables(query), generation)
+        # a copy of the rows, so callers can not modify the cached result
+        return list(result) if isinstance(result, list) else result
+
+    def _get_request_transaction(self) -> Optional['_RequestTransaction']:
+        """Get the open transaction of the current request on the database."""
+        for request_transaction in _REQUEST_TRANSACTIONS.get():
+            if (request_transaction.database is self
+                    and not request_transaction.finished):
+                return request_transaction
+        return None
+
+    def _invalidate(self, tables: Optional[FrozenSet[str]]):
+        """Invalidate the cached results of ``tables`` if a cache is set.
+
+        Inside a transaction of the request the ``tables`` are invalidated
+        again once it is committed, as other requests could have cached the
+        old rows until then.
+
+        """
+        if self.query_cache is None:
+            return
+        self.query_cache.invalidate(tables)
+        request_transaction = self._get_request_transaction()
+        if request_transaction is not None:
+            request_transaction.written_tables.append(tables)
+
+    async def fetch_all(
+            self,
+            query: Union[sqlalchemy.sql.ClauseElement,
+                         str],
+            values: dict = None,
+            use_primary: bool = False,
+            use_cache: bool = True
+    ) -> List[Mapping]:
+        """Fetch all rows of ``query`` from a replica or the primary."""
+        return await self._cached_read(
+            'fetch_all',
+            use_primary,
+            use_cache,
+            query,
+            values
+        )
+
+    async def fetch_one(
+            self,
+            query: Union[sqlalchemy.sql.ClauseElement,
+                         str],
+            values: dict = None,
+            use_primary: bool = False,
+            use_cache: bool = True
+    ) -> Optional[Mapping]:
+        """Fetch the first row of ``query`` from a replica or the primary."""
+        return await self._cached_read(
+            'fetch_one',
+            use_primary,
+            use_cache,
+            query,
+            values
+        )
+
+    async def fetch_val(
+            self,
+            query: Union[sqlalchemy.sql.ClauseElement,
+                         str],
+            values: dict = None,
+            column: Any = 0,
+            use_primary: bool = False,
+            use_cache: bool = True
+    ) -> Any:
+        """Fetch a single value of ``query`` from a replica or the primary."""
+        return await self._cached_read(
+            'fetch_val',
+            use_primary,
+            use_cache,
+            query,
+            values,
+            column=column
+        )
+
+    async def stream(
+            self,
+            query: Union[sqlalchemy.sql.ClauseElement,
+                         str],
+            values: dict = None,
+            batch_size: int = 500,
+            use_primary: bool = False
+    ) -> AsyncIterator[Mapping]:
+        """Stream the rows of ``query`` without loading all of them at once.
+
+        The rows are read using a server-side cursor fetching ``batch_size``
+        rows at a time (for postgres, other databases use their cursor), so
+        the memory does not grow with the size of the result. The rows are
+        read from a replica if defined. Together with
+        :func:`fastapi_serviceutils.utils.external_resources.streaming.to_ndjson`
+        or :func:`fastapi_serviceutils.utils.external_resources.streaming.to_csv`
+        the rows can be used as content of a
+        :class:`starlette.responses.StreamingResponse`.
+
+        Note:
+            The connection is held until the iteration finished, so consume
+            the rows completely or close the iterator. The duration recorded
+            inside the ``query_statistics`` is the time until the iteration
+            finished.
+
+        Parameters:
+            query: the query to stream the rows of.
+            values: the values of the query.
+            batch_size: the number of rows fetched at a time.
+            use_primary: if the primary should be used instead of a replica.
+
+        Returns:
+            the rows of the query.
+
+        """
+        upstream = None if use_primary else self._select_replica()
+        dbase = self.dbase if upstream is None else self.replicas[upstream.url]
+        await self.ensure_connected(dbase)
+        with self._timed(query):
+            async with dbase.connection() as connection:
+                backend_connection = connection._connection
+                if not isinstance(backend_connection, PostgresConnection):
+                    async for row in connection.iterate(query, values):
+                        yield row
+                    return
+                # building and compiling the query and the ``Record`` use
+                # internals of databases, pinned to the tested versions
+                built_query = connection._build_query(query, values)
+                compiled_query, args, columns = backend_connection._compile(
+                    built_query
+                )
+                async with connection.transaction():
+                    cursor = connection.raw_connection.cursor(
+                        compiled_query,
+                        *args,
+                        prefetch=batch_size
+                    )
+                    dialect = backend_connection._dialect
+                    async for row in cursor:
+                        yield Record(row, columns, dialect)
+
+    async def execute(
+            self,
+            query: Union[sqlalchemy.sql.ClauseElement,
+                         str],
+            values: dict = None
+    ) -> Any:
+        """Execute ``query`` on the primary."""
+        try:
+            with self._timed(query):
+                return await self.dbase.execute(query, values)
+        finally:
+            self._invalidate(get_written_tables(query))
+
+    async def execute_many(
+            self,
+            query: Union[sqlalchemy.sql.ClauseElement,
+                         str],
+            values: Iterable[dict],
+            chunk_size: int = None
+    ):
+        """Execute ``query`` for each of ``values`` on the primary.
+
+        Parameters:
+            query: the query to execute.
+            values: the values to execute the query for.
+            chunk_size: if set, ``values`` are written in chunks of this size.
+                Each chunk is written inside its own transaction and (for
+                postgres) sent as one pipelined batch instead of a request
+                per row. If a chunk fails, the previous chunks stay written.
+
+        """
+        try:
+            with self._timed(query):
+                if chunk_size is None:
+                    await self.dbase.execute_many(query, values)
+                    return
+                async with self.dbase.connection() as connection:
+                    for chunk in _chunks(values, chunk_size):
+                        async with connection.transaction():
+                            await _execute_chunk(connection, query, chunk)
+        finally:
+            self._invalidate(get_written_tables(query))
+
+    async def copy_from(
+            self,
+            table: str,
+            rows: AsyncIterable[Sequence],
+            columns: List[str],
+            schema: str = None,
+            chunk_size: int = 1000
+    ) -> int:
+        """Insert ``rows`` into ``table`` of the primary as fast as possible.
+
+        For postgres the rows are sent using ``COPY FROM`` while they are
+        produced, so they are never collected in memory. Other databases
+        insert the rows using :meth:`execute_many` with ``chunk_size``.
+
+        Parameters:
+            table: the name of the table to insert into.
+            rows: the rows to insert, each containing the values of
+                ``columns``.
+            columns: the columns of the rows.
+            schema: the schema of the table.
+            chunk_size: the rows per chunk if ``COPY FROM`` is not available.
+
+        Returns:
+            the number of inserted rows.
+
+        """
+        try:
+            with self._timed(f'COPY {table} ({", ".join(columns)})'):
+                return await self._copy_from(
+                    table,
+                    rows,
+                    columns,
+                    schema,
+                    chunk_size
+                )
+        finally:
+            self._invalidate(frozenset([table.lower()]))
+
+    async def _copy_from(
+            self,
+            table: str,
+            rows: AsyncIterable[Sequence],
+            columns: List[str],
+            schema: str,
+            chunk_size: int
+    ) -> int:
+        """Insert ``rows`` into ``table`` as described in :meth:`copy_from`."""
+        async with self.dbase.connection() as connection:
+            if isinstance(connection._connection, PostgresConnection):
+                status = await connection.raw_connection.copy_records_to_table(
+                    table,
+                    records=rows,
+                    columns=columns,
+                    schema_name=schema
+                )
+                return int(status.split()[-1])
+
+            table_clause = sqlalchemy.table(
+                table,
+                *[sqlalchemy.column(column) for column in columns]
+            )
+            table_clause.schema = schema
+            query = table_clause.insert()
+            inserted = 0
+            chunk = []
+            async for row in rows:
+                chunk.append(dict(zip(columns, row)))
+                if len(chunk) >= chunk_size:
+                    async with connection.transaction():
+                        await _execute_chunk(connection, query, chunk)
+                    inserted += len(chunk)
+                    chunk = []
+            if chunk:
+                async with connection.transaction():
+                    await _execute_chunk(connection, query, chunk)
+                inserted += len(chunk)
+            return inserted
+
+
+def _chunks(values: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Split ``values`` into lists of ``size`` values."""
+    iterator = iter(values)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def _execute_chunk(
+        connection: databases.core.Connection,
+        query: Union[sqlalchemy.sql.ClauseElement,
+                     str],
+        chunk: List[dict]
+):
+    """Execute ``query`` for each values of ``chunk`` using ``connection``.
+
+    For postgres consecutive rows resulting in the same statement are sent
+    using a single ``executemany``, which pipelines the rows instead of
+    waiting for the result of each row.
+
+    """
+    backend_connection = connection._connection
+    if not isinstance(backend_connection, PostgresConnection):
+        await connection.execute_many(query, chunk)
+        return
+    raw_connection = connection.raw_connection
+    statement = None
+    arguments = []
+    for values in chunk:
+        # uses internals of databases, pinned to the tested versions
+        compiled_query, args, _ = backend_connection._compile(
+            connection._build_query(query, values)
+        )
+        if compiled_query != statement and arguments:
+            await raw_connection.executemany(statement, arguments)
+            arguments = []
+        statement = compiled_query
+        arguments.append(args)
+    if arguments:
+        await raw_connection.executemany(statement, arguments)
+
+
+async def connect_databases(dbs: Dict[str, Database]):
+    """Connect to all ``dbs`` concurrently."""
+    await asyncio.gather(*[database.connect() for database in dbs.values()])
+
+
+async def disconnect_databases(dbs: Dict[str, Database]):
+    """Disconnect from all ``dbs`` concurrently."""
+    await asyncio.gather(
+        *[database.disconnect() for database in dbs.values()]
+    )
+
+
+@dataclass
+class _RequestTransaction:
+    """The transaction of a request opened by :func:`get_request_connection`.
+
+    Attributes:
+        database: the database the transaction belongs to.
+        transaction: the started transaction.
+        written_tables: the tables written inside the transaction (``None``
+            for unknown tables), invalidated again after the commit.
+        finished: if the transaction was committed or rolled back.
+
+    """
+    database: Database
+    transaction: databases.core.Transaction
+    written_tables: List[Optional[FrozenSet[str]]] = field(
+        default_factory=list
+    )
+    finished: bool = False
+
+    async def finish(self, success: bool):
+        """Commit the transaction if ``success``, else roll it back.
+
+        Does nothing if the transaction is already finished.
+
+        """
+        if self.finished:
+            return
+        self.finished = True
+        if not success:
+            await self.transaction.rollback()
+            return
+        await self.transaction.commit()
+        for tables in self.written_tables:
+            self.database._invalidate(tables)
+
+
+async def finish_request_transactions(scope: Scope, success: bool):
+    """Finish the transactions of :func:`get_request_connection`.
+
+    Parameters:
+        scope: the scope of the request.
+        success: if the transactions should be committed (else they are
+            rolled back).
+
+    """
+    for request_transaction in scope.get(REQUEST_TRANSACTIONS, []):
+        await request_transaction.finish(success)
+
+
+def get_request_connection(
+        name: str,
+        transaction: bool = False
+) -> Callable[[Request],
+              AsyncIterator[databases.core.Connection]]:
+    """Create a dependency holding one connection of a database per request.
+
+    The connection of the primary of ``app.databases[name]`` is acquired
+    once per request and released after the response was sent. All queries
+    of the request using the yielded connection or the ``dbase`` of the
+    database (like :meth:`Database.execute`) use this connection instead of
+    acquiring a connection of the pool for each query. Reads of
+    :meth:`Database.fetch_all` etc. still use the replicas, if defined.
+
+    Note:
+        Write using :meth:`Database.execute` etc. instead of the yielded
+        connection. Writes using the connection directly do not invalidate
+        the ``query_cache`` of the database, so cached reads stay outdated.
+
+        With ``transaction=True`` the transaction is finished by
+        :class:`fastapi_serviceutils.app.middlewares.RequestTransactionMiddleware`
+        (added by :func:`fastapi_serviceutils.make_app`) before the response
+        is sent: it is committed if the status-code of the response is below
+        400 and rolled back otherwise (including exceptions converted to
+        responses, like :class:`fastapi.HTTPException`). Without the
+        middleware the transaction is committed after the response was sent
+        and only rolled back by exceptions reaching the dependency.
+
+        Reads of the database inside the transaction bypass its
+        ``query_cache``, as they can see uncommitted writes.
+
+    Example:
+        .. code-block:: python
+
+            @router.post('/', dependencies=[
+                Depends(get_request_connection('userdb', transaction=True))
+            ])
+            async def insert_user(user: User, request: Request):
+                await request.app.databases['userdb'].execute(
+                    users.insert().values(**user.dict())
+                )
+
+    Parameters:
+        name: the name of the database inside ``app.databases``.
+        transaction: if all queries of the request should run inside one
+            transaction, which is committed if the request succeeded and
+            rolled back otherwise.
+
+    Returns:
+        the dependency to use with :func:`fastapi.Depends`.
+
+    """
+    async def _request_connection(
+            request: Request
+    ) -> AsyncIterator[databases.core.Connection]:
+        database = request.app.databases[name]
+        async with database.dbase.connection() as connection:
+            if not transaction:
+                yield connection
+                return
+            request_transaction = _RequestTransaction(
+                database=database,
+                transaction=await connection.transaction().start()
+            )
+            _REQUEST_TRANSACTIONS.set(
+                _REQUEST_TRANSACTIONS.get() + (request_transaction,)
+            )
+            # finished before the response is sent, if the middleware is used
+            request.scope.get(REQUEST_TRANSACTIONS, []).append(
+                request_transaction
+            )
+            try:
+                yield connection
+            except Exception:
+                await request_transaction.finish(success=False)
+                raise
+            await request_transaction.finish(success=True)
+
+    return _request_connection
 
 
 def add_databases_to_app(
@@ -89,9 +1113,9 @@ def add_databases_to_app(
 
     For each database as defined in the ``config.yml`` as external-resource,
     create a :class:`Database` instance with defined parameters, add this
-    instance to the ``app.databases``-attribute and add ``startup`` and
-    ``shutdown`` handlers to connect / disconnect to the database on
-    app-startup / app-shutdown.
+    instance to the ``app.databases``-attribute and add a ``startup`` and a
+    ``shutdown`` handler to connect / disconnect to all databases
+    concurrently on app-startup / app-shutdown.
 
     Parameters:
         app: the app to add the database definitions to.
@@ -102,17 +1126,61 @@ def add_databases_to_app(
         for startup and shutdown for the databases.
 
     """
+    added_databases = {}
     for _, db_definition in dbs.items():
+        min_size, max_size = get_pool_size(db_definition)
+        replica_balancer = None
+        if db_definition.replica_dsns and db_definition.replica_balancing:
+            replica_balancer = LoadBalancer.from_definition(
+                urls=db_definition.replica_dsns,
+                definition=db_definition.replica_balancing
+            )
+        query_cache = None
+        if db_definition.cache is not None:
+            query_cache = QueryCache.from_definition(db_definition.cache)
+        query_statistics = None
+        if db_definition.query_statistics is not None:
+            query_statistics = QueryStatistics.from_definition(
+                db_definition.query_statistics
+            )
+        schema_cache = None
+        db_schema = None
+        if db_definition.reflection is not None:
+            schema_cache = SchemaCache.from_definition(
+                db_definition.dsn,
+                db_definition.reflection
+            )
+            db_schema = db_definition.reflection.db_schema
         database = Database(
             dsn=db_definition.dsn,
+            replica_dsns=db_definition.replica_dsns or [],
+            replica_balancer=replica_balancer,
             logger=app.logger,
-            min_size=db_definition.min_size,
-            max_size=db_definition.max_size
+            min_size=min_size,
+            max_size=max_size,
+            warm_up=db_definition.warm_up,
+            validation_query=db_definition.validation_query,
+            acquire_timeout=db_definition.acquire_timeout,
+            max_inactive_lifetime=db_definition.max_inactive_lifetime,
+            max_queries=db_definition.max_queries,
+            query_cache=query_cache,
+            query_statistics=query_statistics,
+            db_schema=db_schema,
+            schema_cache=schema_cache
         )
-        app.add_event_handler('startup', database.connect)
-        app.add_event_handler('shutdown', database.disconnect)
+        added_databases[db_definition.name] = database
         try:
             app.databases.update({db_definition.name: database})
         except AttributeError:
             app.databases = {db_definition.name: database}
+
+    # starlette only awaits coroutine-functions, not partials of them
+    async def _connect_databases():
+        await connect_databases(added_databases)
+
+    async def _disconnect_databases():
+        await disconnect_databases(added_databases)
+
+    app.add_event_handler('startup', _connect_databases)
+    app.add_event_handler('shutdown', _disconnect_databases)
     return app
@@ -0,0 +1,85 @@
+"""Deadline of the current request, used to budget calls of resources.
+
+The deadline is stored inside a :class:`contextvars.ContextVar`, so each
+request (and all tasks started inside it) has its own deadline. It is set by
+:class:`fastapi_serviceutils.app.middlewares.DeadlineMiddleware` or manually
+using :func:`deadline`.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from typing import Optional
+
+_DEADLINE = contextvars.ContextVar('deadline', default=None)
+
+
+def get_deadline() -> Optional[float]:
+    """Get the deadline of the current request.
+
+    Returns:
+        the deadline as value of :func:`time.monotonic` or ``None`` if no
+        deadline is set.
+
+    """
+    return _DEADLINE.get()
+
+
+def get_remaining_time() -> Optional[float]:
+    """Get the seconds left until the deadline of the current request.
+
+    Returns:
+        the remaining seconds (can be negative if the deadline passed) or
+        ``None`` if no deadline is set.
+
+    """
+    current_deadline = _DEADLINE.get()
+    if current_deadline is None:
+        return None
+    return current_deadline - time.monotonic()
+
+
+def set_deadline(timeout: Optional[float]) -> contextvars.Token:
+    """Set the deadline to ``timeout`` seconds from now.
+
+    An already set earlier deadline is kept, so a deadline can only be
+    shortened.
+
+    Parameters:
+        timeout: the seconds from now until the deadline. If ``None`` the
+            current deadline is kept.
+
+    Returns:
+        the token to reset the deadline using :func:`reset_deadline`.
+
+    """
+    current_deadline = _DEADLINE.get()
+    if timeout is not None:
+        new_deadline = time.monotonic() + timeout
+        if current_deadline is None or new_deadline < current_deadline:
+            current_deadline = new_deadline
+    return _DEADLINE.set(current_deadline)
+
+
+def reset_deadline(token: contextvars.Token):
+    """Reset the deadline to the value before :func:`set_deadline`."""
+    _DEADLINE.reset(token)
+
+
+@contextmanager
+def deadline(timeout: Optional[float]) -> Iterator[None]:
+    """Use a deadline ``timeout`` seconds from now inside the context."""
+    token = set_deadline(timeout)
+    try:
+        yield
+    finally:
+        reset_deadline(token)
+
+
+__all__ = [
+    'deadline',
+    'get_deadline',
+    'get_remaining_time',
+    'reset_deadline',
+    'set_deadline',
+]
@@ -0,0 +1,115 @@
+"""Hedged requests to reduce the tail-latency of calls to services.
+
+If the first attempt of a call did not answer after a delay, a second
+attempt is started and the first successful answer is used.
+"""
+import math
+from collections import deque
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Deque
+from typing import List
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class HedgingDefinition(BaseModel):
+    """Definition of hedged requests of a service inside ``config.yml``.
+
+    Attributes:
+        delay: fixed seconds to wait for the first attempt before the second
+            attempt is started.
+        percentile: if set (instead of ``delay``), the second attempt is
+            started after this percentile of the observed latencies of the
+            service (for example ``95``).
+        min_samples: the number of observed latencies required before
+            ``percentile`` is used. Until then no second attempts are made.
+        max_extra_load: the maximum ratio of second attempts to calls (for
+            example ``0.1`` allows at most 10% additional requests).
+        methods: the idempotent methods which may be hedged.
+
+    """
+    delay: float = None
+    percentile: float = None
+    min_samples: int = 20
+    max_extra_load: float = 0.1
+    methods: List[str] = ['get']
+
+
+@dataclass
+class Hedging:
+    """Decide when to start a second attempt of a call.
+
+    Attributes:
+        definition: the settings for the hedged requests.
+        latencies: the latest observed latencies of successful attempts.
+        budget: the number of second attempts currently allowed. Each call
+            adds ``max_extra_load``, each second attempt costs ``1``.
+        max_budget: the maximum budget, limits bursts of second attempts.
+        hedged: the number of second attempts made.
+        recompute_every: the number of new latencies after which the
+            percentile is recomputed.
+
+    """
+    definition: HedgingDefinition
+    latencies: Deque[float] = field(
+        default_factory=lambda: deque(maxlen=1000),
+        repr=False
+    )
+    budget: float = 0.0
+    max_budget: float = 10.0
+    hedged: int = 0
+    recompute_every: int = 50
+    _delay: Optional[float] = field(default=None, repr=False)
+    _new_samples: int = field(default=0, repr=False)
+
+    def applies_to(self, method: str) -> bool:
+        """Check if calls using ``method`` may be hedged."""
+        return method.lower() in self.definition.methods
+
+    def record_latency(self, latency: float):
+        """Record the ``latency`` of a successful attempt in seconds."""
+        self.latencies.append(latency)
+        self._new_samples += 1
+
+    def get_delay(self) -> Optional[float]:
+        """Get the seconds to wait before starting a second attempt.
+
+        Each call of this function counts as a call for the
+        ``max_extra_load``.
+
+        Returns:
+            the delay or ``None`` if no second attempt should be made.
+
+        """
+        self.budget = min(
+            self.budget + self.definition.max_extra_load,
+            self.max_budget
+        )
+        if self.definition.delay is not None:
+            return self.definition.delay
+        if self.definition.percentile is None:
+            return None
+        if len(self.latencies) < self.definition.min_samples:
+            return None
+        if self._delay is None or self._new_samples >= self.recompute_every:
+            self._delay = self._compute_percentile()
+            self._new_samples = 0
+        return self._delay
+
+    def allow_hedge(self) -> bool:
+        """Check if the budget allows a second attempt and consume it."""
+        if self.budget < 1:
+            return False
+        self.budget -= 1
+        self.hedged += 1
+        return True
+
+    def _compute_percentile(self) -> float:
+        ordered = sorted(self.latencies)
+        index = math.ceil(self.definition.percentile / 100 * len(ordered)) - 1
+        return ordered[min(max(index, 0), len(ordered) - 1)]
+
+
+__all__ = ['Hedging', 'HedgingDefinition']
@@ -0,0 +1,180 @@
+"""Client-side load balancing between multiple instances of a resource.
+
+Used for the urls of services and the replicas of databases.
+"""
+import random
+import time
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Callable
+from typing import List
+from typing import Tuple
+
+from pydantic import BaseModel
+
+LEAST_OUTSTANDING = 'least_outstanding'
+POWER_OF_TWO = 'power_of_two'
+ROUND_ROBIN = 'round_robin'
+
+
+class LoadBalancingDefinition(BaseModel):
+    """Definition of the load balancing of a service inside ``config.yml``.
+
+    Attributes:
+        strategy: how to select the url for a call. ``least_outstanding``
+            uses the url with the fewest requests in flight,
+            ``power_of_two`` uses the better one of two random urls and
+            ``round_robin`` uses the urls one after another.
+        max_failures: the number of consecutive failures after which an url
+            is ejected.
+        ejection_time: seconds an ejected url is not used.
+
+    """
+    strategy: str = LEAST_OUTSTANDING
+    max_failures: int = 5
+    ejection_time: float = 30.0
+
+
+@dataclass
+class Upstream:
+    """State of a single url of a service.
+
+    Attributes:
+        url: the url.
+        outstanding: the number of requests in flight.
+        failures: the number of consecutive failures.
+        ejected_until: the time until the url is ejected.
+
+    """
+    url: str
+    outstanding: int = 0
+    failures: int = 0
+    ejected_until: float = None
+
+    def is_available(self, now: float) -> bool:
+        """Check if the url is not ejected at time ``now``."""
+        return self.ejected_until is None or self.ejected_until <= now
+
+
+@dataclass
+class LoadBalancer:
+    """Select the url to use for each request to a service.
+
+    Urls failing ``max_failures`` times in a row are ejected for
+    ``ejection_time`` seconds (passive health-checking). If all urls are
+    ejected, all of them are used again.
+
+    Attributes:
+        urls: the urls of the service.
+        strategy: ``least_outstanding``, ``power_of_two`` or
+            ``round_robin``.
+        max_failures: the number of consecutive failures ejecting an url.
+        ejection_time: seconds an ejected url is not used.
+        upstreams: the state of each url.
+        clock: function returning the current time in seconds.
+        selected: the number of selections, used by ``round_robin``.
+
+    """
+    urls: List[str]
+    strategy: str = LEAST_OUTSTANDING
+    max_failures: int = 5
+    ejection_time: float = 30.0
+    upstreams: List[Upstream] = field(default_factory=list)
+    clock: Callable[[], float] = time.monotonic
+    selected: int = 0
+
+    def __post_init__(self):
+        """Set the state ``self.upstreams`` for each url."""
+        if self.strategy not in (LEAST_OUTSTANDING, POWER_OF_TWO, ROUND_ROBIN):
+            raise ValueError(f'Unknown strategy {self.strategy}.')
+        if not self.upstreams:
+            self.upstreams = [Upstream(url=url) for url in self.urls]
+
+    @classmethod
+    def from_definition(
+            cls,
+            urls: List[str],
+            definition: LoadBalancingDefinition
+    ) -> 'LoadBalancer':
+        """Create a load balancer for ``urls`` using ``definition``."""
+        return cls(
+            urls=urls,
+            strategy=definition.strategy,
+            max_failures=definition.max_failures,
+            ejection_time=definition.ejection_time
+        )
+
+    def select(self) -> Upstream:
+        """Select the url to use for the next request."""
+        now = self.clock()
+        candidates = [
+            upstream for upstream in self.upstreams
+            if upstream.is_available(now)
+        ] or self.upstreams
+        self.selected += 1
+        if self.strategy == ROUND_ROBIN:
+            return candidates[self.selected % len(candidates)]
+        if self.strategy == POWER_OF_TWO and len(candidates) > 2:
+            candidates = random.sample(candidates, 2)
+        fewest = min(upstream.outstanding for upstream in candidates)
+        return random.choice(
+            [
+                upstream for upstream in candidates
+                if upstream.outstanding == fewest
+            ]
+        )
+
+    def resolve(self, url: str) -> Tuple[Upstream, str]:
+        """Select an url and replace the url of the service inside ``url``.
+
+        The url of the service has to be followed by ``/``, ``?`` or the end
+        of ``url``, so ``http://svc:8080/x`` does not belong to a service
+        with url ``http://svc:80``. If several urls match, the longest one
+        is replaced.
+
+        Parameters:
+            url: the url to call, starting with any url of the service
+                (like ``service.url + '/some/path'``).
+
+        Returns:
+            the selected url-state (or ``None`` if ``url`` does not belong
+            to the service) and the url to use for the request.
+
+        """
+        matching = [
+            upstream for upstream in self.upstreams
+            if _is_prefix(upstream.url, url)
+        ]
+        if not matching:
+            return None, url
+        upstream = max(matching, key=lambda upstream: len(upstream.url))
+        selected = self.select()
+        return selected, selected.url + url[len(upstream.url):]
+
+    def record(self, upstream: Upstream, success: bool):
+        """Record the outcome of a request to ``upstream``."""
+        if success:
+            upstream.failures = 0
+            return
+        upstream.failures += 1
+        if upstream.failures >= self.max_failures:
+            upstream.ejected_until = self.clock() + self.ejection_time
+            upstream.failures = 0
+
+
+def _is_prefix(base_url: str, url: str) -> bool:
+    """Check if ``url`` starts with ``base_url`` at a path-boundary."""
+    if not url.startswith(base_url):
+        return False
+    rest = url[len(base_url):]
+    return not rest or base_url.endswith('/') or rest[0] in '/?'
+
+
+__all__ = [
+    'LEAST_OUTSTANDING',
+    'LoadBalancer',
+    'LoadBalancingDefinition',
+    'POWER_OF_TWO',
+    'ROUND_ROBIN',
+    'Upstream',
+]
@@ -0,0 +1,262 @@
+"""Cache of query-results of databases invalidated by writes to their tables.
+
+Each entry is tagged with the tables read by its query. A write to a table
+removes all entries tagged with this table.
+"""
+import json
+import re
+import sys
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import Dict
+from typing import FrozenSet
+from typing import Hashable
+from typing import Optional
+from typing import Set
+from typing import Union
+
+import sqlalchemy
+from databases.core import Connection
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import TableClause
+
+from fastapi_serviceutils.utils.external_resources.cache import CacheDefinition
+from fastapi_serviceutils.utils.external_resources.cache import CacheStatistics
+from fastapi_serviceutils.utils.external_resources.cache import TTLCache
+
+# identifiers of a textual query, used as tags of its result
+_IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_][\w$]*')
+# the table written by a textual query
+_WRITE_PATTERN = re.compile(
+    r'\b(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM|TRUNCATE(?:\s+TABLE)?'
+    r'|(?:ALTER|DROP)\s+TABLE(?:\s+IF\s+EXISTS)?)\s+(?:ONLY\s+)?([\w."]+)',
+    re.IGNORECASE
+)
+
+
+def _normalize_table(name: str) -> str:
+    """Get the lowercase name of table ``name`` without schema and quotes."""
+    return name.split('.')[-1].strip('"').lower()
+
+
+def _get_text(query: Union[sqlalchemy.sql.ClauseElement, str]) -> str:
+    """Get the sql of ``query`` if it is a textual query, else ``None``."""
+    if isinstance(query, str):
+        return query
+    if isinstance(query, TextClause):
+        return query.text
+    return None
+
+
+def _get_table_clauses(query: sqlalchemy.sql.ClauseElement) -> Set[str]:
+    """Get the names of all tables used inside ``query``.
+
+    Besides the tables themselves, the tables of columns and of insert-,
+    update- and delete-statements are used, as they are not visited.
+
+    """
+    tables = set()
+    for element in visitors.iterate(query, {}):
+        for table in [element, getattr(element, 'table', None)]:
+            if isinstance(table, TableClause):
+                tables.add(_normalize_table(table.name))
+    return tables
+
+
+def get_read_tables(
+        query: Union[sqlalchemy.sql.ClauseElement,
+                     str]
+) -> FrozenSet[str]:
+    """Get the tags of the tables ``query`` reads from.
+
+    For textual queries each identifier of the query is used as tag, so the
+    result is invalidated by writes to any table mentioned inside the query.
+
+    Parameters:
+        query: the query to get the tables of.
+
+    Returns:
+        the lowercase names of the tables.
+
+    """
+    text = _get_text(query)
+    if text is None:
+        return frozenset(_get_table_clauses(query))
+    return frozenset(
+        name.lower() for name in _IDENTIFIER_PATTERN.findall(text)
+    )
+
+
+def get_written_tables(
+        query: Union[sqlalchemy.sql.ClauseElement,
+                     str]
+) -> Optional[FrozenSet[str]]:
+    """Get the tables ``query`` writes to.
+
+    Parameters:
+        query: the query to get the tables of.
+
+    Returns:
+        the lowercase names of the tables or ``None`` if they are unknown
+        (for example for other statements like ``CREATE TABLE``).
+
+    """
+    text = _get_text(query)
+    if text is None:
+        tables = _get_table_clauses(query)
+    else:
+        tables = {
+            _normalize_table(name) for name in _WRITE_PATTERN.findall(text)
+        }
+    return frozenset(tables) or None
+
+
+def create_query_key(
+        method: str,
+        query: Union[sqlalchemy.sql.ClauseElement,
+                     str],
+        values: dict = None,
+        **kwargs
+) -> Hashable:
+    """Create the key of a query inside a :class:`QueryCache`.
+
+    The key consists of the compiled sql and its parameters serialized with
+    sorted keys, so the order of the values does not matter.
+
+    Parameters:
+        method: the method used to run the query, like ``fetch_all``.
+        query: the query.
+        values: the values of the query.
+        kwargs: additional arguments of the method.
+
+    Returns:
+        the key for the cache.
+
+    """
+    compiled = Connection._build_query(query, values).compile()
+    normalized_params = json.dumps(
+        compiled.params,
+        sort_keys=True,
+        default=str
+    )
+    normalized_kwargs = json.dumps(kwargs, sort_keys=True, default=str)
+    return method, str(compiled), normalized_params, normalized_kwargs
+
+
+def get_result_size(result: Any) -> int:
+    """Estimate the size of ``result`` of a query in bytes."""
+    rows = result if isinstance(result, list) else [result]
+    size = sys.getsizeof(rows)
+    for row in rows:
+        if row is None:
+            continue
+        try:
+            size += sum(sys.getsizeof(value) for value in dict(row).values())
+        except (TypeError, ValueError):
+            size += sys.getsizeof(row)
+    return size
+
+
+@dataclass
+class QueryCache:
+    """Cache of query-results tagged by the tables read by the queries.
+
+    Attributes:
+        cache: the cache containing the results.
+        invalidations: number of entries removed because of writes.
+        generation: incremented on each invalidation. Results of queries
+            started before an invalidation are not stored, so a concurrent
+            write can not leave an outdated result inside the cache.
+
+    """
+    cache: TTLCache
+    invalidations: int = 0
+    generation: int = 0
+    _tags: Dict[str, Set[Hashable]] = field(default_factory=dict, repr=False)
+    _references: int = field(default=0, repr=False)
+    _pruned_references: int = field(default=0, repr=False)
+
+    @classmethod
+    def from_definition(cls, definition: CacheDefinition) -> 'QueryCache':
+        """Create a query-cache using the settings of ``definition``."""
+        return cls(cache=TTLCache.from_definition(definition))
+
+    @property
+    def statistics(self) -> CacheStatistics:
+        """The hit-, miss- and eviction-counters of the cache."""
+        return self.cache.statistics
+
+    def get(self, key: Hashable) -> Any:
+        """Get the result stored for ``key`` or ``None``."""
+        return self.cache.get(key)
+
+    def set(
+            self,
+            key: Hashable,
+            result: Any,
+            tables: FrozenSet[str],
+            generation: int
+    ):
+        """Store ``result`` for ``key`` tagged with ``tables``.
+
+        Parameters:
+            key: the key of the query.
+            result: the result of the query.
+            tables: the tables read by the query.
+            generation: the :attr:`generation` at the start of the query. If
+                the cache was invalidated since, the result is not stored.
+
+        """
+        if generation != self.generation:
+            return
+        self.cache.set(key, result, size=get_result_size(result))
+        for table in tables:
+            self._tags.setdefault(table, set()).add(key)
+        self._references += len(tables)
+        # prune when the references doubled since the last pruning
+        if self._references > 2 * max(self._pruned_references,
+                                      self.cache.max_entries):
+            self._prune_tags()
+
+    def invalidate(self, tables: Optional[FrozenSet[str]]):
+        """Remove all entries tagged with any of ``tables``.
+
+        Parameters:
+            tables: the written tables. If ``None``, all entries are removed.
+
+        """
+        self.generation += 1
+        if tables is None:
+            self.invalidations += len(self.cache)
+            self.cache.clear()
+            self._tags.clear()
+            self._references = 0
+            self._pruned_references = 0
+            return
+        for table in tables:
+            for key in self._tags.pop(table, ()):
+                self._references -= 1
+                if key in self.cache:
+                    self.invalidations += 1
+                self.cache.pop(key)
+
+    def _prune_tags(self):
+        """Remove the tags of entries no longer contained in the cache."""
+        for table in list(self._tags):
+            keys = {key for key in self._tags[table] if key in self.cache}
+            if keys:
+                self._tags[table] = keys
+            else:
+                del self._tags[table]
+        self._references = sum(len(keys) for keys in self._tags.values())
+        self._pruned_references = self._references
+
+
+__all__ = [
+    'QueryCache',
+    'create_query_key',
+    'get_read_tables',
+    'get_written_tables',
+]
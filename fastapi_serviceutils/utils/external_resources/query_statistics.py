@@ -0,0 +1,199 @@
+"""Timing of the queries of databases aggregated by statement-fingerprint.
+
+The fingerprint of a query is its sql with literals replaced by ``?``, so
+queries differing only in their values share their statistics.
+"""
+import bisect
+import functools
+import re
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import List
+from typing import Union
+
+import sqlalchemy
+from pydantic import BaseModel
+from pydantic import validator
+
+# upper bounds of the buckets of the latency-histograms in seconds
+DEFAULT_BUCKETS = [
+    0.001,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+]
+# fingerprint used for all statements exceeding ``max_statements``
+OTHER_STATEMENTS = '<other>'
+
+_STRING_PATTERN = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_PATTERN = re.compile(r'\b\d+(?:\.\d+)?\b')
+# a literal or parameter inside a list of values of ``IN``
+_VALUE = (
+    r"(?:'(?:[^']|'')*'|[-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?|\?|:\w+|\$\d+"
+    r'|NULL|TRUE|FALSE)'
+)
+_IN_LIST_PATTERN = re.compile(
+    rf'\bIN\s*\(\s*{_VALUE}(?:\s*,\s*{_VALUE})*\s*\)',
+    re.IGNORECASE
+)
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+class QueryStatisticsDefinition(BaseModel):
+    """Definition of the query-statistics of a database.
+
+    Attributes:
+        slow_query_threshold: seconds after which a query is logged as slow
+            query. If not set, no queries are logged.
+        buckets: the upper bounds of the buckets of the latency-histograms
+            in seconds.
+        max_statements: the maximum number of fingerprints to keep
+            statistics for. Further statements are aggregated as
+            ``<other>``.
+
+    """
+    slow_query_threshold: float = None
+    buckets: List[float] = DEFAULT_BUCKETS
+    max_statements: int = 1000
+
+    @validator('buckets')
+    def check_buckets(cls, buckets: List[float]) -> List[float]:
+        """Ensure the bounds of the buckets are sorted."""
+        if not buckets or buckets != sorted(buckets):
+            raise ValueError('buckets have to be sorted ascending.')
+        return buckets
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """Replace the literals of ``sql`` by ``?`` and collapse whitespace.
+
+    Lists of values used with ``IN`` are collapsed to ``IN (...)``, so the
+    number of values does not change the fingerprint.
+
+    Parameters:
+        sql: the sql to normalize.
+
+    Returns:
+        the normalized sql.
+
+    """
+    # collapsed first, so lists of any values and length are collapsed alike
+    sql = _IN_LIST_PATTERN.sub('IN (...)', sql)
+    sql = _STRING_PATTERN.sub('?', sql)
+    sql = _NUMBER_PATTERN.sub('?', sql)
+    return _WHITESPACE_PATTERN.sub(' ', sql).strip()
+
+
+def get_fingerprint(query: Union[sqlalchemy.sql.ClauseElement, str]) -> str:
+    """Get the fingerprint of ``query`` used to aggregate its statistics."""
+    return normalize_sql(query if isinstance(query, str) else str(query))
+
+
+@dataclass
+class StatementStatistics:
+    """Counters and latency-histogram of the queries of one fingerprint.
+
+    Attributes:
+        count: number of executed queries.
+        errors: number of queries failed with an exception.
+        total: summed duration of the queries in seconds.
+        max: the maximum duration of a query in seconds.
+        histogram: number of queries per bucket. The last bucket counts the
+            queries slower than the largest bound.
+
+    """
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    histogram: List[int] = field(default_factory=list)
+
+    @property
+    def mean(self) -> float:
+        """The mean duration of the queries in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+
+@dataclass
+class QueryStatistics:
+    """Statistics of the queries of a database by their fingerprint.
+
+    Attributes:
+        slow_query_threshold: seconds after which a query is logged as slow
+            query.
+        buckets: the upper bounds of the buckets of the histograms.
+        max_statements: the maximum number of fingerprints to keep
+            statistics for.
+        statements: the statistics by fingerprint.
+
+    """
+    slow_query_threshold: float = None
+    buckets: List[float] = field(default_factory=lambda: list(DEFAULT_BUCKETS))
+    max_statements: int = 1000
+    statements: Dict[str, StatementStatistics] = field(default_factory=dict)
+
+    @classmethod
+    def from_definition(
+            cls,
+            definition: QueryStatisticsDefinition
+    ) -> 'QueryStatistics':
+        """Create the statistics using the settings of ``definition``."""
+        return cls(
+            slow_query_threshold=definition.slow_query_threshold,
+            buckets=definition.buckets,
+            max_statements=definition.max_statements
+        )
+
+    def record(self, fingerprint: str, duration: float, error: bool = False):
+        """Add a query of ``fingerprint`` taking ``duration`` seconds.
+
+        Parameters:
+            fingerprint: the fingerprint of the query.
+            duration: the duration of the query in seconds.
+            error: if the query failed with an exception.
+
+        """
+        statement = self.statements.get(fingerprint)
+        if statement is None:
+            if len(self.statements) >= self.max_statements:
+                fingerprint = OTHER_STATEMENTS
+            statement = self.statements.setdefault(
+                fingerprint,
+                StatementStatistics(histogram=[0] * (len(self.buckets) + 1))
+            )
+        statement.count += 1
+        statement.errors += error
+        statement.total += duration
+        statement.max = max(statement.max, duration)
+        statement.histogram[bisect.bisect_left(self.buckets, duration)] += 1
+
+    def is_slow(self, duration: float) -> bool:
+        """Check if a query taking ``duration`` seconds is a slow query."""
+        return (
+            self.slow_query_threshold is not None
+            and duration >= self.slow_query_threshold
+        )
+
+    def clear(self):
+        """Remove the statistics of all statements."""
+        self.statements.clear()
+
+
+__all__ = [
+    'DEFAULT_BUCKETS',
+    'OTHER_STATEMENTS',
+    'QueryStatistics',
+    'QueryStatisticsDefinition',
+    'StatementStatistics',
+    'get_fingerprint',
+    'normalize_sql',
+]
@@ -0,0 +1,115 @@
+"""Client-side rate limiting of calls to services using a token bucket."""
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from pydantic import BaseModel
+
+
+class RateLimitDefinition(BaseModel):
+    """Definition of the rate limit of a service inside ``config.yml``.
+
+    Attributes:
+        rate: the requests per second allowed on average.
+        burst: the requests allowed at once after a period without requests.
+        max_wait: the maximum seconds a call queues for the rate limit. Calls
+            which would have to wait longer are rejected.
+
+    """
+    rate: float
+    burst: int = 1
+    max_wait: float = 1.0
+
+
+@dataclass
+class TokenBucket:
+    """Token bucket limiting the rate of requests.
+
+    The bucket holds up to ``burst`` tokens and is refilled with ``rate``
+    tokens per second. Each request takes a token. If none is left, the
+    request reserves the next token and waits until it is available, so
+    waiting requests are served in order of their arrival.
+
+    Attributes:
+        rate: the tokens added per second.
+        burst: the maximum tokens inside the bucket.
+        max_wait: the maximum seconds a request waits for its token.
+        tokens: the tokens currently inside the bucket. Negative if tokens
+            are already reserved by waiting requests.
+        updated: the time ``tokens`` was updated.
+        queue_depth: the number of requests currently waiting.
+        rejected: the number of requests rejected because of ``max_wait``.
+        clock: function returning the current time in seconds.
+
+    """
+    rate: float
+    burst: int = 1
+    max_wait: float = 1.0
+    tokens: float = None
+    updated: float = None
+    queue_depth: int = 0
+    rejected: int = 0
+    clock: Callable[[], float] = time.monotonic
+
+    def __post_init__(self):
+        """Start with a full bucket."""
+        if self.tokens is None:
+            self.tokens = float(self.burst)
+        if self.updated is None:
+            self.updated = self.clock()
+
+    @classmethod
+    def from_definition(cls, definition: RateLimitDefinition) -> 'TokenBucket':
+        """Create a token bucket using the settings of ``definition``."""
+        return cls(
+            rate=definition.rate,
+            burst=definition.burst,
+            max_wait=definition.max_wait
+        )
+
+    def _refill(self):
+        """Add the tokens for the time passed since the last update."""
+        now = self.clock()
+        self.tokens = min(
+            self.tokens + (now - self.updated) * self.rate,
+            self.burst
+        )
+        self.updated = now
+
+    async def acquire(self, max_wait: float = None) -> bool:
+        """Take a token, waiting for it if necessary.
+
+        Parameters:
+            max_wait: the maximum seconds to wait. If not set, the
+                ``max_wait`` of the bucket is used.
+
+        Returns:
+            if a token was taken. ``False`` if the request would have to
+            wait longer than ``max_wait``.
+
+        """
+        max_wait = self.max_wait if max_wait is None else min(
+            max_wait,
+            self.max_wait
+        )
+        self._refill()
+        wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+        if wait > max_wait:
+            self.rejected += 1
+            return False
+        self.tokens -= 1
+        if wait > 0:
+            self.queue_depth += 1
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # give the reserved token back to the following requests
+                self.tokens += 1
+                raise
+            finally:
+                self.queue_depth -= 1
+        return True
+
+
+__all__ = ['RateLimitDefinition', 'TokenBucket']
@@ -0,0 +1,128 @@
+"""Reflection of the tables of databases cached on disk.
+
+Reflected tables are stored per table inside a folder of the cache-directory
+named by the hash of the dsn, the schema and the schema-version of the
+database and the version of sqlalchemy. Later starts of the service (or
+other workers) load the table definitions from there without access to the
+database. Changing the schema-version (for example to the revision of the
+latest migration) invalidates the cached definitions.
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import sqlalchemy
+from loguru._logger import Logger
+from pydantic import BaseModel
+from sqlalchemy.sql.schema import MetaData
+
+
+class ReflectionDefinition(BaseModel):
+    """Definition of the cached reflection of the tables of a database.
+
+    Attributes:
+        cache_dir: the folder to store the reflected tables in. The folder
+            must only be writable by the service, as the tables are stored
+            using :mod:`pickle` and loading a planted file runs arbitrary
+            code.
+        schema_version: the version of the schema of the database, for
+            example the revision of its latest migration. Tables reflected
+            for another version are not used.
+        db_schema: the schema of the database to reflect the tables of. If
+            not set, the default schema is used.
+
+    """
+    cache_dir: str
+    schema_version: str = None
+    db_schema: str = None
+
+
+@dataclass
+class SchemaCache:
+    """Cache of the reflected tables of a database on disk.
+
+    Attributes:
+        path: the folder containing the reflected tables of the database.
+
+    """
+    path: Path
+
+    @classmethod
+    def from_definition(
+            cls,
+            dsn: str,
+            definition: ReflectionDefinition
+    ) -> 'SchemaCache':
+        """Create the cache of database ``dsn`` as defined in ``definition``.
+
+        The dsn is hashed, so the folder does not contain its password.
+        Tables pickled by another version of sqlalchemy are not used.
+
+        """
+        key = hashlib.sha256(
+            '\n'.join(
+                [
+                    dsn,
+                    definition.db_schema or '',
+                    definition.schema_version or '',
+                    sqlalchemy.__version__,
+                ]
+            ).encode()
+        ).hexdigest()[:32]
+        return cls(path=Path(definition.cache_dir) / key)
+
+    def get_path(self, table: str) -> Path:
+        """Get the path of the file containing the reflected ``table``."""
+        return self.path / f'{table}.pickle'
+
+    def load(self, table: str, logger: Logger) -> Optional[MetaData]:
+        """Load the metadata containing the reflected ``table``.
+
+        Parameters:
+            table: the name of the table.
+            logger: the logger to warn if the file can not be loaded.
+
+        Returns:
+            the metadata containing the table and the tables referenced by
+            its foreign keys or ``None`` if the table is not cached (or the
+            file can not be loaded).
+
+        """
+        path = self.get_path(table)
+        try:
+            content = path.read_bytes()
+        except OSError:
+            return None
+        try:
+            return pickle.loads(content)
+        except Exception as error:
+            logger.warning(f'could not load cached table {path}: {error!r}')
+            return None
+
+    def store(self, table: str, metadata: MetaData):
+        """Store the metadata containing the reflected ``table``.
+
+        The file is written atomically, so other workers reading it at the
+        same time never read a partial file.
+
+        Parameters:
+            table: the name of the table.
+            metadata: the metadata containing the reflected table.
+
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        handle, temporary_path = tempfile.mkstemp(dir=str(self.path))
+        try:
+            with os.fdopen(handle, 'wb') as temporary_file:
+                pickle.dump(metadata, temporary_file)
+            os.replace(temporary_path, str(self.get_path(table)))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+
+__all__ = ['ReflectionDefinition', 'SchemaCache']
@@ -0,0 +1,37 @@
+"""Request-id of the current request, used to trace logs of resources.
+
+The request-id is stored inside a :class:`contextvars.ContextVar`, so each
+request (and all tasks started inside it) has its own request-id. It is set
+by :func:`fastapi_serviceutils.app.create_id_logger`, so logs of external
+resources used inside an endpoint contain the request-id of the endpoint.
+"""
+import contextvars
+from typing import Any
+
+_REQUEST_ID = contextvars.ContextVar('request_id', default='app')
+
+
+def get_request_id() -> Any:
+    """Get the request-id of the current request or ``'app'`` if not set."""
+    return _REQUEST_ID.get()
+
+
+def set_request_id(request_id: Any) -> contextvars.Token:
+    """Set the request-id of the current request.
+
+    Parameters:
+        request_id: the request-id.
+
+    Returns:
+        the token to reset the request-id using :func:`reset_request_id`.
+
+    """
+    return _REQUEST_ID.set(request_id)
+
+
+def reset_request_id(token: contextvars.Token):
+    """Reset the request-id to the value before :func:`set_request_id`."""
+    _REQUEST_ID.reset(token)
+
+
+__all__ = ['get_request_id', 'reset_request_id', 'set_request_id']
@@ -0,0 +1,131 @@
+"""Settings and helpers to retry calls of external services."""
+import asyncio
+import random
+from datetime import datetime
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+from typing import List
+from typing import Optional
+
+import httpx
+from pydantic import BaseModel
+
+# errors raised before the request was sent, so retrying is always safe
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class RetryDefinition(BaseModel):
+    """Definition of retries of a service inside ``config.yml``.
+
+    Attributes:
+        max_retries: the maximum retries after the first attempt.
+        backoff_factor: seconds to wait before the first retry. The wait
+            doubles with each further retry.
+        max_backoff: the maximum seconds to wait between two attempts.
+        methods: the idempotent methods which are retried on any transport
+            error and on ``statuses``. Other methods are only retried if the
+            request could not be sent or on status 429.
+        statuses: the response-statuses to retry.
+
+    """
+    max_retries: int = 3
+    backoff_factor: float = 0.1
+    max_backoff: float = 10.0
+    methods: List[str] = ['get']
+    statuses: List[int] = [429, 500, 502, 503, 504]
+
+
+def get_backoff(definition: RetryDefinition, retry: int) -> float:
+    """Get the seconds to wait before ``retry`` using full jitter.
+
+    Parameters:
+        definition: the retry-settings to use.
+        retry: the number of the retry starting with ``0``.
+
+    Returns:
+        a random time between ``0`` and the exponential backoff.
+
+    """
+    backoff = min(definition.max_backoff, definition.backoff_factor * 2**retry)
+    return random.uniform(0, backoff)
+
+
+def get_retry_after(response: httpx.Response) -> Optional[float]:
+    """Get the seconds to wait as defined by the ``Retry-After`` header.
+
+    Parameters:
+        response: the response to extract the header from.
+
+    Returns:
+        the seconds to wait or ``None`` if the header is missing or invalid.
+
+    """
+    retry_after = response.headers.get('retry-after')
+    if retry_after is None:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def should_retry_error(
+        definition: RetryDefinition,
+        method: str,
+        error: Exception
+) -> bool:
+    """Check if a failed request should be retried.
+
+    Parameters:
+        definition: the retry-settings to use.
+        method: the method of the request.
+        error: the transport-error or timeout of the request.
+
+    Returns:
+        if the request should be retried.
+
+    """
+    if isinstance(error, NOT_SENT_ERRORS):
+        return True
+    return method.lower() in definition.methods and isinstance(
+        error,
+        (httpx.TransportError,
+         asyncio.TimeoutError)
+    )
+
+
+def should_retry_response(
+        definition: RetryDefinition,
+        method: str,
+        response: httpx.Response
+) -> bool:
+    """Check if a request should be retried because of its response.
+
+    Parameters:
+        definition: the retry-settings to use.
+        method: the method of the request.
+        response: the response of the request.
+
+    Returns:
+        if the request should be retried.
+
+    """
+    if response.status_code not in definition.statuses:
+        return False
+    return response.status_code == 429 or method.lower() in definition.methods
+
+
+__all__ = [
+    'get_backoff',
+    'get_retry_after',
+    'RetryDefinition',
+    'should_retry_error',
+    'should_retry_response',
+]
@@ -0,0 +1,173 @@
+"""Decode results of external resources and convert them into models.
+
+If `orjson <https://github.com/ijl/orjson>`_ is installed (extra
+``speedups``) it is used to decode json, otherwise :mod:`json` of the
+standard-library.
+"""
+import copy
+import functools
+import json
+from enum import Enum
+from typing import Any
+from typing import Tuple
+from typing import Type
+from typing import Union
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_SINGLETON
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+JSON_BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+class Validation(str, Enum):
+    """How results of a service are converted into models.
+
+    Attributes:
+        full: validate the result completely using ``model.parse_obj``.
+        trusted: build the model without validation. Only use this for
+            trusted services returning correctly typed results.
+
+    """
+    full = 'full'
+    trusted = 'trusted'
+
+
+def loads(content: Union[bytes, str]) -> Any:
+    """Decode json-``content`` using the fastest available backend."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as json using the fastest available backend."""
+    if orjson is not None:
+        return orjson.dumps(content, default=str)
+    return json.dumps(content, default=str).encode()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_fields(model: Type[BaseModel]) -> Tuple[tuple, ...]:
+    """Get the information about the fields of ``model`` to construct it.
+
+    Parameters:
+        model: the model to get the fields for.
+
+    Returns:
+        for each field its name, its alias, its nested model (or ``None``),
+        if it is a single value and its default.
+
+    """
+    fields = []
+    for name, field in model.__fields__.items():
+        submodel = field.type_
+        if not (isinstance(submodel, type) and issubclass(submodel, BaseModel)):
+            submodel = None
+        fields.append(
+            (
+                name,
+                field.alias,
+                submodel,
+                field.shape == SHAPE_SINGLETON,
+                field.default
+            )
+        )
+    return tuple(fields)
+
+
+def _construct_value(submodel: Type[BaseModel], single: bool, value: Any):
+    """Construct the nested models of type ``submodel`` inside ``value``."""
+    if isinstance(value, dict):
+        if single:
+            return construct_model(submodel, value)
+        return {
+            key: construct_model(submodel,
+                                 item) if isinstance(item,
+                                                     dict) else item
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [
+            construct_model(submodel,
+                            item) if isinstance(item,
+                                                dict) else item
+            for item in value
+        ]
+    return value
+
+
+def construct_model(model: Type[BaseModel], data: dict) -> BaseModel:
+    """Create an instance of ``model`` from ``data`` without validation.
+
+    Nested models (also inside lists and dicts) are constructed recursively.
+    Missing fields are set to their default. Values are neither validated
+    nor converted, so ``data`` must already have the correct types.
+
+    Parameters:
+        model: the model to create.
+        data: the already typed content (keys are the aliases of the
+            fields).
+
+    Returns:
+        the instance of ``model``.
+
+    """
+    values = {}
+    for name, alias, submodel, single, default in _get_fields(model):
+        if alias in data:
+            value = data[alias]
+        elif name in data:
+            value = data[name]
+        else:
+            values[name] = copy.deepcopy(default)
+            continue
+        if submodel is not None:
+            value = _construct_value(submodel, single, value)
+        values[name] = value
+    # same as ``model.construct`` without copying the defaults of all fields
+    instance = model.__new__(model)
+    object.__setattr__(instance, '__dict__', values)
+    object.__setattr__(instance, '__fields_set__', set(values))
+    if getattr(model, '__private_attributes__', None):
+        instance._init_private_attributes()
+    return instance
+
+
+def convert_to_model(
+        model: Type[BaseModel],
+        data: Any,
+        validation: Validation = Validation.full
+) -> BaseModel:
+    """Convert decoded ``data`` into an instance of ``model``.
+
+    Parameters:
+        model: the model to convert into.
+        data: the decoded content.
+        validation: if ``data`` should be validated (``full``) or not
+            (``trusted``).
+
+    Raises:
+        :class:`pydantic.ValidationError` if validation fails.
+
+    Returns:
+        the instance of ``model``.
+
+    """
+    if validation == Validation.trusted and isinstance(data, dict):
+        return construct_model(model, data)
+    return model.parse_obj(data)
+
+
+__all__ = [
+    'construct_model',
+    'convert_to_model',
+    'dumps',
+    'JSON_BACKEND',
+    'loads',
+    'Validation',
+]
@@ -1,33 +1,376 @@
 """Interact with external services."""
+import asyncio
+import functools
+import json
 import logging
+import time
+from contextlib import asynccontextmanager
+from contextlib import AsyncExitStack
+from contextlib import contextmanager
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
 from typing import Dict
+from typing import Hashable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
 
-import requests
+import httpx
 from fastapi import FastAPI
 from fastapi import HTTPException
+from loguru._logger import Logger
 from pydantic import BaseModel
+from pydantic import root_validator
 from pydantic import ValidationError
 
+from fastapi_serviceutils.utils.external_resources.batching import BatchDefinition
+from fastapi_serviceutils.utils.external_resources.batching import Batcher
+from fastapi_serviceutils.utils.external_resources.cache import CacheDefinition
+from fastapi_serviceutils.utils.external_resources.cache import TTLCache
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import CircuitBreaker
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import CircuitBreakerDefinition
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import CLOSED
+from fastapi_serviceutils.utils.external_resources.compression import CompressionDefinition
+from fastapi_serviceutils.utils.external_resources.compression import encode_body
+from fastapi_serviceutils.utils.external_resources.deadline import get_remaining_time
+from fastapi_serviceutils.utils.external_resources.hedging import Hedging
+from fastapi_serviceutils.utils.external_resources.hedging import HedgingDefinition
+from fastapi_serviceutils.utils.external_resources.load_balancing import LoadBalancer
+from fastapi_serviceutils.utils.external_resources.load_balancing import LoadBalancingDefinition
+from fastapi_serviceutils.utils.external_resources.load_balancing import Upstream
+from fastapi_serviceutils.utils.external_resources.rate_limit import RateLimitDefinition
+from fastapi_serviceutils.utils.external_resources.rate_limit import TokenBucket
+from fastapi_serviceutils.utils.external_resources.retry import get_backoff
+from fastapi_serviceutils.utils.external_resources.retry import get_retry_after
+from fastapi_serviceutils.utils.external_resources.retry import RetryDefinition
+from fastapi_serviceutils.utils.external_resources.retry import should_retry_error
+from fastapi_serviceutils.utils.external_resources.retry import should_retry_response
+from fastapi_serviceutils.utils.external_resources.serialization import convert_to_model
+from fastapi_serviceutils.utils.external_resources.serialization import loads
+from fastapi_serviceutils.utils.external_resources.serialization import Validation
+from fastapi_serviceutils.utils.external_resources.streaming import ARRAY
+from fastapi_serviceutils.utils.external_resources.streaming import iter_json_array
+from fastapi_serviceutils.utils.external_resources.streaming import iter_ndjson
+from fastapi_serviceutils.utils.external_resources.streaming import NDJSON
+
 
 class ServiceDefinition(BaseModel):
     """Definition for a service as defined in ``config.yml:external_resources``.
 
     Attributes:
         name: the name of the service.
-        url: the url to the endpoint of the service.
+        url: the url to the endpoint of the service. Defaults to the first
+            one of ``urls``.
+        urls: the urls of all instances of the service. If more than one is
+            defined, calls are balanced between them. Defaults to ``[url]``.
         servicetype: the type of the service (currently only rest is
             supported.)
+        max_connections: the maximum connections to open to the service.
+        max_keepalive_connections: the maximum idle connections to keep open
+            to the service.
+        keepalive_expiry: seconds after which an idle keep-alive connection
+            is closed.
+        connect_timeout: seconds to wait for a connection to the service.
+        read_timeout: seconds to wait for a chunk of the response.
+        total_timeout: seconds a complete service-call may take at most. If
+            not set, only ``connect_timeout`` and ``read_timeout`` apply.
+        cache: if set, results of :func:`call_service` for this service are
+            cached using these settings.
+        coalesce: if identical calls of :func:`call_service` for this service
+            which are in flight at the same time should share one request.
+        max_concurrent_calls: the maximum requests to the service running at
+            the same time. Further calls wait until a running one finished.
+            If not set, only ``max_connections`` limits the requests.
+        circuit_breaker: if set, a circuit breaker with these settings stops
+            calling the service after consecutive failures.
+        rate_limit: if set, requests to the service are limited to this
+            rate. Calls queue for their turn instead of exceeding the quota
+            of the service.
+        retry: if set, failed calls are retried using these settings.
+        hedging: if set, a second attempt is started for slow calls using
+            these settings.
+        validation: how results of the service are converted into models.
+            ``full`` validates the results, ``trusted`` builds the models
+            without validation (only for trusted services returning
+            correctly typed results).
+        load_balancing: how calls are balanced between the ``urls`` of the
+            service. If not set, the defaults of
+            :class:`LoadBalancingDefinition` are used.
+        batch: if set, the batch-endpoint of the service used by
+            :func:`load_service_item`.
+        compression: if set, the accepted encodings of responses and the
+            compression of request-bodies.
 
     """
     name: str
-    url: str
+    url: str = None
+    urls: List[str] = None
     servicetype: str
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 5.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 5.0
+    total_timeout: float = None
+    cache: CacheDefinition = None
+    coalesce: bool = False
+    max_concurrent_calls: int = None
+    circuit_breaker: CircuitBreakerDefinition = None
+    rate_limit: RateLimitDefinition = None
+    retry: RetryDefinition = None
+    hedging: HedgingDefinition = None
+    validation: Validation = Validation.full
+    load_balancing: LoadBalancingDefinition = None
+    batch: BatchDefinition = None
+    compression: CompressionDefinition = None
+
+    @root_validator
+    def check_urls(cls, values: dict) -> dict:
+        """Ensure ``url`` and ``urls`` are set if one of them is defined."""
+        url = values.get('url')
+        urls = values.get('urls')
+        if not url and not urls:
+            if 'url' in values and 'urls' in values:
+                raise ValueError('either url or urls has to be defined.')
+            return values
+        if not urls:
+            values['urls'] = [url]
+        elif not url:
+            values['url'] = urls[0]
+        return values
+
+
+@dataclass
+class Service:
+    """Class to interact with service as defined in external_resources.
+
+    The http-client is opened on app-startup and closed on app-shutdown. It
+    keeps a pool of keep-alive connections to the service, so consecutive
+    calls do not have to open a new connection each time. Pool-size and
+    timeouts are taken from the ``definition``.
+
+    Attributes:
+        definition: the definition of the service as in the ``config.yml``.
+        logger: the logger to use inside this class.
+        client: the instance of :class:`httpx.AsyncClient` to use for this
+            service. Is ``None`` until :meth:`connect` was called.
+        cache: the cache for the results of :func:`call_service`. Is ``None``
+            if no cache is defined for the service.
+        calls_in_flight: the currently running calls of the service, used to
+            coalesce identical calls.
+        semaphore: limits the concurrent requests to the service if
+            ``max_concurrent_calls`` is defined. Created on first usage to
+            bind it to the running event-loop.
+        circuit_breaker: the circuit breaker of the service. Is ``None`` if
+            no circuit breaker is defined for the service.
+        rate_limiter: the token bucket limiting the rate of requests to the
+            service. Its ``queue_depth`` are the requests currently waiting.
+            Is ``None`` if no rate limit is defined for the service.
+        hedging: decides about hedged requests to the service. Is ``None`` if
+            no hedging is defined for the service.
+        load_balancer: selects the url of the service to use for each
+            request. Is ``None`` if the service has only one url.
+        batchers: the batchers of :func:`load_service_item` by their model.
+
+    """
+    definition: ServiceDefinition
+    logger: Logger
+    client: httpx.AsyncClient = None
+    cache: TTLCache = None
+    calls_in_flight: Dict[Hashable, asyncio.Future] = field(
+        default_factory=dict,
+        repr=False
+    )
+    semaphore: asyncio.Semaphore = field(default=None, repr=False)
+    circuit_breaker: CircuitBreaker = None
+    rate_limiter: TokenBucket = None
+    hedging: Hedging = None
+    load_balancer: LoadBalancer = None
+    batchers: Dict[BaseModel, Batcher] = field(
+        default_factory=dict,
+        repr=False
+    )
+
+    def __post_init__(self):
+        """Set the helpers of the service defined in its ``definition``."""
+        if self.definition.cache is not None:
+            self.cache = TTLCache.from_definition(self.definition.cache)
+        if self.definition.circuit_breaker is not None:
+            self.circuit_breaker = CircuitBreaker.from_definition(
+                self.definition.circuit_breaker
+            )
+        if self.definition.rate_limit is not None:
+            self.rate_limiter = TokenBucket.from_definition(
+                self.definition.rate_limit
+            )
+        if self.definition.hedging is not None:
+            self.hedging = Hedging(definition=self.definition.hedging)
+        if len(self.definition.urls) > 1:
+            self.load_balancer = LoadBalancer.from_definition(
+                urls=self.definition.urls,
+                definition=(
+                    self.definition.load_balancing
+                    or LoadBalancingDefinition()
+                )
+            )
+
+    @property
+    def name(self) -> str:
+        """The name of the service."""
+        return self.definition.name
+
+    @property
+    def url(self) -> str:
+        """The url to the endpoint of the service."""
+        return self.definition.url
+
+    @property
+    def servicetype(self) -> str:
+        """The type of the service."""
+        return self.definition.servicetype
+
+    @property
+    def circuit_state(self) -> str:
+        """The state of the circuit breaker (``closed`` if not defined)."""
+        if self.circuit_breaker is None:
+            return CLOSED
+        return self.circuit_breaker.state
+
+    def get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        """Get the semaphore limiting the concurrent requests to the service.
+
+        Returns:
+            the semaphore or ``None`` if ``max_concurrent_calls`` is not
+            defined for the service.
+
+        """
+        if self.definition.max_concurrent_calls is None:
+            return None
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(
+                self.definition.max_concurrent_calls
+            )
+        return self.semaphore
+
+    def get_batcher(self, model: BaseModel) -> Batcher:
+        """Get the batcher loading items of ``model`` from the service.
+
+        Parameters:
+            model: the model to convert each loaded item into.
+
+        Raises:
+            if no ``batch`` is defined for the service a :class:`ValueError`
+            is raised.
+
+        Returns:
+            the batcher for ``model``.
+
+        """
+        if self.definition.batch is None:
+            raise ValueError(f'No batch defined for service {self.name}.')
+        batcher = self.batchers.get(model)
+        if batcher is None:
+            batcher = Batcher(
+                batch_function=functools.partial(
+                    _load_batch,
+                    model=model,
+                    service=self
+                ),
+                max_batch_size=self.definition.batch.max_batch_size,
+                max_wait=self.definition.batch.max_wait
+            )
+            self.batchers[model] = batcher
+        return batcher
+
+    def get_limits(self) -> httpx.Limits:
+        """Create the connection-pool limits for the http-client."""
+        return httpx.Limits(
+            max_connections=self.definition.max_connections,
+            max_keepalive_connections=(
+                self.definition.max_keepalive_connections
+            ),
+            keepalive_expiry=self.definition.keepalive_expiry
+        )
+
+    def get_timeout(self) -> httpx.Timeout:
+        """Create the connect- and read-timeouts for the http-client."""
+        return httpx.Timeout(
+            self.definition.read_timeout,
+            connect=self.definition.connect_timeout,
+        )
+
+    async def connect(self):
+        """Open the http-client for the service."""
+        self.logger.info(f'opening http-client for service {self.name}')
+        self.client = httpx.AsyncClient(
+            limits=self.get_limits(),
+            timeout=self.get_timeout()
+        )
+
+    async def disconnect(self):
+        """Close the http-client for the service."""
+        self.logger.info(f'closing http-client for service {self.name}')
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+
+@dataclass
+class _DefaultClient:
+    """The shared http-client for calls without an open client of a service.
+
+    Attributes:
+        client: the http-client. Is ``None`` until first used.
+        loop: the event-loop the client was created in.
+
+    """
+    client: httpx.AsyncClient = None
+    loop: asyncio.AbstractEventLoop = None
+
+
+_DEFAULT_CLIENT = _DefaultClient()
+
+
+def get_default_client() -> httpx.AsyncClient:
+    """Get the shared http-client for calls without the client of a service.
+
+    The client is created on first use (for each event-loop) and kept open,
+    so its ssl-context is created only once and its connections are kept
+    alive between calls. It is closed by :func:`close_default_client` on
+    app-shutdown.
+
+    Returns:
+        the shared http-client.
+
+    """
+    loop = asyncio.get_event_loop()
+    if (_DEFAULT_CLIENT.client is None or _DEFAULT_CLIENT.loop is not loop
+            or _DEFAULT_CLIENT.client.is_closed):
+        _DEFAULT_CLIENT.client = httpx.AsyncClient()
+        _DEFAULT_CLIENT.loop = loop
+    return _DEFAULT_CLIENT.client
+
+
+async def close_default_client():
+    """Close the shared http-client of :func:`get_default_client`, if open."""
+    client = _DEFAULT_CLIENT.client
+    _DEFAULT_CLIENT.client = None
+    _DEFAULT_CLIENT.loop = None
+    if client is not None:
+        await client.aclose()
 
 
 async def _convert_response_to_model(
         model: BaseModel,
-        response,
-        info_msg: str
+        response: httpx.Response,
+        info_msg: str,
+        validation: Validation = Validation.full
 ) -> BaseModel:
     """Extract request-result and convert it into an instance of ``model``.
 
@@ -36,6 +379,8 @@ async def _convert_response_to_model(
         response: the result of the made service-call.
         info_msg: the message to return if something goes wrong during
             conversion to the model.
+        validation: if the result should be validated (``full``) or not
+            (``trusted``).
 
     Raises:
         if something goes wrong during conversion to the model a
@@ -46,8 +391,8 @@ async def _convert_response_to_model(
 
     """
     try:
-        result = response.json()
-        return model.parse_obj(result)
+        result = loads(response.content)
+        return convert_to_model(model, result, validation)
     except ValidationError as error:
         raise HTTPException(
             status_code=500,
@@ -57,7 +402,7 @@ async def _convert_response_to_model(
         )
 
 
-async def _check_response_status(response, info_msg: str):
+async def _check_response_status(response: httpx.Response, info_msg: str):
     """Check if the status of the response is valid.
 
     Parameters:
@@ -72,7 +417,7 @@ async def _check_response_status(response, info_msg: str):
     """
     try:
         response.raise_for_status()
-    except requests.HTTPError as error:
+    except httpx.HTTPStatusError as error:
         raise HTTPException(
             status_code=500,
             detail=f'{info_msg} => Could not make request. Error was {error}.'
@@ -83,8 +428,12 @@ async def _make_external_rest_request(
         url: str,
         method: str,
         params: dict,
-        info_msg: str
-):
+        info_msg: str,
+        client: httpx.AsyncClient = None,
+        total_timeout: float = None,
+        content: bytes = None,
+        headers: Dict[str, str] = None
+) -> httpx.Response:
     """Request external service at ``url`` using ``method`` with ``params``.
 
     Parameters:
@@ -93,6 +442,11 @@ async def _make_external_rest_request(
         params: the request-params for the service-call.
         info_msg: the message to return if something goes wrong during
             service-call.
+        client: the pooled http-client to use. If not set, the shared
+            client of :func:`get_default_client` is used.
+        total_timeout: seconds the request may take at most.
+        content: the (encoded) body of the request.
+        headers: additional headers of the request.
 
     Raises:
         an instance of :class:`HTTPException` if something goes wrong during
@@ -102,19 +456,548 @@ async def _make_external_rest_request(
         the result of the service-call.
 
     """
-    method_mapping = {
-        'post': requests.post,
-        'get': requests.get,
-    }
+    if client is None:
+        client = get_default_client()
+    request = client.request(
+        method.upper(),
+        url,
+        params=params or None,
+        content=content,
+        headers=headers
+    )
     try:
-        if params:
-            return method_mapping[method](url, params=params)
-        return method_mapping[method](url)
-    except requests.ConnectionError as error:
+        return await asyncio.wait_for(request, timeout=total_timeout)
+    except httpx.TimeoutException as error:
+        raise HTTPException(
+            status_code=500,
+            detail=f'{info_msg} => Timed out! Error was {error}.'
+        ) from error
+    except asyncio.TimeoutError as error:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f'{info_msg} => Timed out! Request took longer than '
+                f'{total_timeout} seconds.'
+            )
+        ) from error
+    except httpx.TransportError as error:
         raise HTTPException(
             status_code=500,
             detail=f'{info_msg} => Could not connect! Error was {error}.'
+        ) from error
+
+
+def _create_cache_key(
+        url: str,
+        method: str,
+        params: dict,
+        model: BaseModel,
+        body: Any = None
+) -> Hashable:
+    """Create the key of a service-call inside the cache of a service.
+
+    Params are serialized with sorted keys, so the order of the params does
+    not matter.
+
+    Parameters:
+        url: the url of the service-call.
+        method: the method of the service-call.
+        params: the params of the service-call.
+        model: the model the result of the service-call is converted into.
+        body: the body of the service-call.
+
+    Returns:
+        the key for the cache.
+
+    """
+    normalized_params = json.dumps(params or {}, sort_keys=True, default=str)
+    normalized_body = json.dumps(body, sort_keys=True, default=str)
+    return url, method.lower(), normalized_params, normalized_body, model
+
+
+@asynccontextmanager
+async def _acquire(semaphore: Optional[asyncio.Semaphore]):
+    """Acquire ``semaphore`` for the context, if a semaphore is passed."""
+    if semaphore is None:
+        yield
+    else:
+        async with semaphore:
+            yield
+
+
+@contextmanager
+def _select_upstream(
+        service: Optional[Service],
+        url: str
+) -> Iterator[Tuple[Optional[Upstream],
+                    str]]:
+    """Select the instance of ``service`` to request ``url`` from.
+
+    The request is counted as outstanding on the selected instance for the
+    context, as used by the ``least_outstanding`` and ``power_of_two``
+    strategies.
+
+    Parameters:
+        service: the service the ``url`` belongs to (optional).
+        url: the url to request.
+
+    Returns:
+        the state of the selected instance (``None`` if the service is not
+        load balanced) and the url to request.
+
+    """
+    load_balancer = service.load_balancer if service else None
+    upstream = None
+    if load_balancer is not None:
+        upstream, url = load_balancer.resolve(url)
+    if upstream is None:
+        yield None, url
+        return
+    upstream.outstanding += 1
+    try:
+        yield upstream, url
+    finally:
+        upstream.outstanding -= 1
+
+
+async def _wait_for_rate_limit(service: Optional[Service], info_msg: str):
+    """Wait until the rate limit of ``service`` (if defined) allows a request.
+
+    The wait is limited by the ``max_wait`` of the rate limit and the
+    deadline of the current request.
+
+    Parameters:
+        service: the service to request.
+        info_msg: the message to return if the request is rejected.
+
+    Raises:
+        an instance of :class:`HTTPException` if the request would have to
+        wait too long.
+
+    """
+    rate_limiter = service.rate_limiter if service else None
+    if rate_limiter is None:
+        return
+    if not await rate_limiter.acquire(max_wait=get_remaining_time()):
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f'{info_msg} => Rate limit of service {service.name} '
+                f'exceeded ({rate_limiter.queue_depth} calls waiting).'
+            )
+        )
+
+
+async def _attempt_request(
+        url: str,
+        method: str,
+        params: dict,
+        service: Service,
+        info_msg: str,
+        timeout: float = None,
+        content: bytes = None,
+        headers: Dict[str, str] = None
+) -> httpx.Response:
+    """Make a single attempt to request the service.
+
+    Parameters:
+        url: the url of the service to call.
+        method: the method to use to make the service-call.
+        params: the params to use for the request.
+        service: the service the ``url`` belongs to (optional).
+        info_msg: the message to return if something goes wrong during
+            service-call.
+        timeout: seconds the attempt may take at most.
+        content: the (encoded) body of the request.
+        headers: additional headers of the request.
+
+    Raises:
+        an instance of :class:`HTTPException` if the rate limit of the
+        service is exceeded, its circuit breaker is open or the request
+        failed.
+
+    Returns:
+        the response of the service.
+
+    """
+    await _wait_for_rate_limit(service, info_msg)
+
+    # reject the call immediately if the service is known to be down
+    circuit_breaker = service.circuit_breaker if service else None
+    if circuit_breaker is not None and not circuit_breaker.allow_request():
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f'{info_msg} => Circuit breaker of service {service.name} is '
+                f'{circuit_breaker.state}.'
+            )
+        )
+
+    succeeded = False
+    cancelled = False
+    start = time.monotonic()
+    # select the instance of the service to use for this attempt
+    with _select_upstream(service, url) as (upstream, url):
+        try:
+            semaphore = service.get_semaphore() if service else None
+            async with _acquire(semaphore):
+                response = await _make_external_rest_request(
+                    url=url,
+                    method=method,
+                    params=params,
+                    info_msg=info_msg,
+                    client=service.client if service else None,
+                    total_timeout=timeout,
+                    content=content,
+                    headers=headers
+                )
+            succeeded = response.status_code < 500
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if circuit_breaker is not None:
+                if cancelled:
+                    circuit_breaker.release()
+                else:
+                    circuit_breaker.record(success=succeeded)
+            if upstream is not None and not cancelled:
+                service.load_balancer.record(upstream, success=succeeded)
+    if succeeded and service is not None and service.hedging is not None:
+        service.hedging.record_latency(time.monotonic() - start)
+    return response
+
+
+async def _hedged_request(
+        url: str,
+        method: str,
+        params: dict,
+        service: Service,
+        info_msg: str,
+        timeout: float = None,
+        content: bytes = None,
+        headers: Dict[str, str] = None
+) -> httpx.Response:
+    """Request the service, starting a second attempt if the first is slow.
+
+    If the first attempt did not answer within the delay defined by the
+    hedging of the service (and its budget allows it), a second attempt is
+    started. The first successful response is returned and the other attempt
+    is cancelled. No second attempt is started if the deadline of the request
+    is not later than the delay, and the second attempt may only take the
+    time left until the deadline.
+
+    Parameters:
+        url: the url of the service to call.
+        method: the method to use to make the service-call.
+        params: the params to use for the request.
+        service: the service the ``url`` belongs to.
+        info_msg: the message to return if something goes wrong during
+            service-call.
+        timeout: seconds each attempt may take at most.
+        content: the (encoded) body of the request.
+        headers: additional headers of the request.
+
+    Raises:
+        an instance of :class:`HTTPException` if all attempts failed.
+
+    Returns:
+        the first successful response (or the response of the last attempt
+        if none succeeded).
+
+    """
+    attempt = functools.partial(
+        _attempt_request,
+        url=url,
+        method=method,
+        params=params,
+        service=service,
+        info_msg=info_msg,
+        timeout=timeout,
+        content=content,
+        headers=headers
+    )
+    delay = service.hedging.get_delay()
+    remaining = get_remaining_time()
+    # a second attempt started after the deadline could not answer in time
+    if delay is None or (remaining is not None and remaining <= delay):
+        return await attempt()
+
+    pending = {asyncio.ensure_future(attempt())}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=delay)
+        if not done and service.hedging.allow_hedge():
+            logging.debug(f'{info_msg} => hedged after {delay:.3f} seconds.')
+            hedge_timeout = timeout
+            remaining = get_remaining_time()
+            if remaining is not None:
+                hedge_timeout = (
+                    remaining if timeout is None else min(timeout, remaining)
+                )
+            pending.add(asyncio.ensure_future(attempt(timeout=hedge_timeout)))
+        while True:
+            done, pending = await asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None and (
+                        task.result().status_code < 500):
+                    return task.result()
+            if not pending:
+                return done.pop().result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _get_attempt_timeout(
+        total_timeout: Optional[float],
+        info_msg: str
+) -> Optional[float]:
+    """Get the timeout for the next attempt respecting the request-deadline.
+
+    Parameters:
+        total_timeout: the timeout defined for the service.
+        info_msg: the message to return if the deadline already passed.
+
+    Raises:
+        an instance of :class:`HTTPException` if the deadline of the current
+        request already passed.
+
+    Returns:
+        the smaller one of ``total_timeout`` and the time left until the
+        deadline.
+
+    """
+    remaining = get_remaining_time()
+    if remaining is None:
+        return total_timeout
+    if remaining <= 0:
+        raise HTTPException(
+            status_code=500,
+            detail=f'{info_msg} => Deadline of the request exceeded.'
+        )
+    if total_timeout is None:
+        return remaining
+    return min(total_timeout, remaining)
+
+
+def _get_retry_wait(
+        retry: RetryDefinition,
+        attempt: int,
+        method: str,
+        error: Optional[HTTPException],
+        response: Optional[httpx.Response]
+) -> Optional[float]:
+    """Get the seconds to wait before retrying a failed attempt.
+
+    Parameters:
+        retry: the retry-settings of the service.
+        attempt: the number of the failed attempt starting with ``0``.
+        method: the method of the request.
+        error: the exception raised by the attempt.
+        response: the response of the attempt if no exception was raised.
+
+    Returns:
+        the seconds to wait or ``None`` if the attempt should not be retried.
+
+    """
+    if error is not None:
+        if error.__cause__ is None or not should_retry_error(
+                retry,
+                method,
+                error.__cause__):
+            return None
+        return get_backoff(retry, attempt)
+    if not should_retry_response(retry, method, response):
+        return None
+    retry_after = get_retry_after(response)
+    if retry_after is None:
+        return get_backoff(retry, attempt)
+    if retry_after > retry.max_backoff:
+        return None
+    return retry_after
+
+
+async def _request_with_retries(
+        url: str,
+        method: str,
+        params: dict,
+        service: Service,
+        info_msg: str,
+        body: Any = None
+) -> httpx.Response:
+    """Request the service and retry on failure if defined for the service.
+
+    Between the attempts a jittered exponential backoff or the time requested
+    by the ``Retry-After`` header of the response is waited. Neither an
+    attempt nor a wait exceeds the deadline of the current request (see
+    :mod:`fastapi_serviceutils.utils.external_resources.deadline`).
+
+    Parameters:
+        url: the url of the service to call.
+        method: the method to use to make the service-call.
+        params: the params to use for the request.
+        service: the service the ``url`` belongs to (optional).
+        info_msg: the message to return if something goes wrong during
+            service-call.
+        body: the body to send as json (compressed as defined for the
+            service).
+
+    Raises:
+        an instance of :class:`HTTPException` if the last attempt failed.
+
+    Returns:
+        the response of the last attempt.
+
+    """
+    retry = service.definition.retry if service else None
+    total_timeout = service.definition.total_timeout if service else None
+    # encode the body once for all attempts
+    content, headers = encode_body(
+        body,
+        service.definition.compression if service else None
+    )
+    request = _attempt_request
+    if service is not None and service.hedging is not None and (
+            service.hedging.applies_to(method)):
+        request = _hedged_request
+    attempt = 0
+    while True:
+        error = None
+        response = None
+        try:
+            response = await request(
+                url=url,
+                method=method,
+                params=params,
+                service=service,
+                info_msg=info_msg,
+                timeout=_get_attempt_timeout(total_timeout, info_msg),
+                content=content,
+                headers=headers or None
+            )
+        except HTTPException as attempt_error:
+            error = attempt_error
+
+        wait = None
+        if retry is not None and attempt < retry.max_retries:
+            wait = _get_retry_wait(retry, attempt, method, error, response)
+        # stop retrying if the wait would exceed the deadline of the request
+        remaining = get_remaining_time()
+        if wait is None or (remaining is not None and wait >= remaining):
+            if error is not None:
+                raise error
+            return response
+        logging.debug(f'{info_msg} => retry in {wait:.3f} seconds.')
+        await asyncio.sleep(wait)
+        attempt += 1
+
+
+async def _request_service(
+        url: str,
+        model: BaseModel,
+        params: dict,
+        method: str,
+        service: Service,
+        info_msg: str,
+        cache: TTLCache = None,
+        cache_key: Hashable = None,
+        body: Any = None
+) -> BaseModel:
+    """Request the service and convert its result into ``model``.
+
+    Parameters:
+        url: the url of the service to call.
+        model: the model to convert the service-result into.
+        params: the params to use for the request.
+        method: the method to use to make the service-call.
+        service: the service the ``url`` belongs to (optional).
+        info_msg: the message to return if something goes wrong during
+            service-call.
+        cache: if set, the result is stored inside this cache.
+        cache_key: the key to store the result with inside the ``cache``.
+        body: the body to send as json.
+
+    Returns:
+        the service-result as an instance of the defined ``model``.
+
+    """
+    # make the request (and retries if defined) for the url with params
+    response = await _request_with_retries(
+        url=url,
+        method=method,
+        params=params,
+        service=service,
+        info_msg=info_msg,
+        body=body
+    )
+
+    # check if the request worked as expected
+    await _check_response_status(response=response, info_msg=info_msg)
+
+    # convert the result of the request to an instance of model
+    result = await _convert_response_to_model(
+        model=model,
+        response=response,
+        info_msg=info_msg,
+        validation=(
+            service.definition.validation if service else Validation.full
+        )
+    )
+    if cache is not None:
+        cache.set(cache_key, result, size=len(response.content))
+    return result
+
+
+def _forget_call(
+        calls_in_flight: Dict[Hashable,
+                              asyncio.Future],
+        key: Hashable,
+        call: asyncio.Future
+):
+    """Remove the finished ``call`` from ``calls_in_flight``."""
+    if calls_in_flight.get(key) is call:
+        del calls_in_flight[key]
+    # mark a possible exception as retrieved, even if all waiters are gone
+    if not call.cancelled():
+        call.exception()
+
+
+async def _coalesce(
+        calls_in_flight: Dict[Hashable,
+                              asyncio.Future],
+        key: Hashable,
+        request: Callable[[],
+                          Awaitable[BaseModel]]
+) -> BaseModel:
+    """Share one execution of ``request`` between identical calls.
+
+    If a call with the same ``key`` is already in flight, wait for its result
+    instead of starting a new one. The result or the raised exception is
+    passed to all waiters. A cancelled waiter does not cancel the shared call
+    of the other waiters.
+
+    Parameters:
+        calls_in_flight: the currently running calls by their keys.
+        key: the key identifying identical calls.
+        request: function starting the request.
+
+    Returns:
+        the result of the shared call.
+
+    """
+    call = calls_in_flight.get(key)
+    if call is None:
+        call = asyncio.ensure_future(request())
+        calls_in_flight[key] = call
+        call.add_done_callback(
+            functools.partial(_forget_call,
+                              calls_in_flight,
+                              key)
         )
+    return await asyncio.shield(call)
 
 
 async def call_service(
@@ -122,6 +1005,9 @@ async def call_service(
         model: BaseModel,
         params: dict = None,
         method: str = 'post',
+        service: Service = None,
+        use_cache: bool = True,
+        body: Any = None,
 ) -> BaseModel:
     """Call the rest-service at the ``url`` using ``method`` with ``params``.
 
@@ -134,6 +1020,14 @@ async def call_service(
         model: the model to convert the service-result into.
         params: the params to use for the request.
         method: the method to use to make the service-call.
+        service: the service (as in ``app.services``) the ``url`` belongs to.
+            If set and connected, its pooled http-client is used for the
+            request.
+        use_cache: if the cache of the ``service`` (if defined) should be
+            used for this call. Cached results are shared between callers and
+            must not be modified.
+        body: the body to send as json. Compressed if a ``compression`` is
+            defined for the ``service`` and the body is large enough.
 
     Returns:
         the service-result as an instance of the defined ``model``.
@@ -149,25 +1043,377 @@ async def call_service(
 
     logging.debug(info_msg)
 
-    # make the request for the url with params using method
-    response = await _make_external_rest_request(
+    # return the already converted result if cached for the service
+    cache = service.cache if use_cache and service is not None else None
+    coalesce = service is not None and service.definition.coalesce
+    cache_key = None
+    if cache is not None or coalesce:
+        cache_key = _create_cache_key(url, method, params, model, body)
+    if cache is not None:
+        result = cache.get(cache_key)
+        if result is not None:
+            logging.debug(f'{info_msg} => returned cached result {result}.')
+            return result
+
+    request = functools.partial(
+        _request_service,
         url=url,
-        method=method,
+        model=model,
         params=params,
-        info_msg=info_msg
+        method=method,
+        service=service,
+        info_msg=info_msg,
+        cache=cache,
+        cache_key=cache_key,
+        body=body
     )
+    # share a single request between identical calls already in flight
+    if coalesce:
+        result = await _coalesce(
+            calls_in_flight=service.calls_in_flight,
+            key=cache_key,
+            request=request
+        )
+    else:
+        result = await request()
+    logging.debug(f'{info_msg} => returned result {result}.')
+    return result
 
-    # check if the request worked as expected
-    await _check_response_status(response=response, info_msg=info_msg)
 
-    # convert the result of the request to an instance of model
-    result = await _convert_response_to_model(
-        model=model,
-        response=response,
+async def stream_service(
+        url: str,
+        model: BaseModel,
+        params: dict = None,
+        method: str = 'post',
+        service: Service = None,
+        stream_format: str = None,
+        body: Any = None,
+) -> AsyncIterator[BaseModel]:
+    """Stream the result of the service at ``url`` item by item.
+
+    Instead of loading the complete response, each item of a top-level
+    json-array or of newline-delimited json is converted into an instance of
+    ``model`` as soon as it arrived. Together with
+    :func:`fastapi_serviceutils.utils.external_resources.streaming.to_ndjson`
+    the result can be used as content of a
+    :class:`starlette.responses.StreamingResponse`.
+
+    Note:
+        Streamed calls are neither cached, coalesced nor retried and
+        ``total_timeout`` does not apply (``read_timeout`` still applies to
+        each chunk). Exceptions raised after the first item was yielded can
+        not change the status of an already started response.
+
+    Parameters:
+        url: the url of the service to call.
+        model: the model to convert each item into.
+        params: the params to use for the request.
+        method: the method to use to make the service-call.
+        service: the service (as in ``app.services``) the ``url`` belongs to.
+        stream_format: the format of the response, ``'ndjson'`` or
+            ``'array'``. If not set, ``'ndjson'`` is used if the content-type
+            of the response contains ``ndjson`` or ``jsonl``, otherwise
+            ``'array'``.
+        body: the body to send as json.
+
+    Returns:
+        the items of the response as instances of ``model``.
+
+    Raises:
+        if any error occur a :class:`HTTPException` will be raised.
+
+    """
+    info_msg = (
+        f'external service stream (url: {url}, method: {method.upper()}, '
+        f'params: {params})'
+    )
+    logging.debug(info_msg)
+
+    await _wait_for_rate_limit(service, info_msg)
+    content, headers = encode_body(
+        body,
+        service.definition.compression if service else None
+    )
+    async with AsyncExitStack() as stack:
+        # the stream is outstanding on the instance until it is closed
+        upstream, url = stack.enter_context(_select_upstream(service, url))
+        client = service.client if service else None
+        if client is None:
+            client = get_default_client()
+        await stack.enter_async_context(
+            _acquire(service.get_semaphore() if service else None)
+        )
+        # take the permit of the circuit breaker only once the stream can be
+        # opened, so waiting for the semaphore does not hold a trial call
+        circuit_breaker = service.circuit_breaker if service else None
+        if circuit_breaker is not None and not circuit_breaker.allow_request():
+            raise HTTPException(
+                status_code=500,
+                detail=(
+                    f'{info_msg} => Circuit breaker of service {service.name} '
+                    f'is {circuit_breaker.state}.'
+                )
+            )
+        # stays ``None`` if the call ended without outcome (like cancelled)
+        succeeded = None
+        try:
+            response = await stack.enter_async_context(
+                client.stream(
+                    method.upper(),
+                    url,
+                    params=params or None,
+                    content=content,
+                    headers=headers or None
+                )
+            )
+            succeeded = response.status_code < 500
+        except httpx.TransportError as error:
+            succeeded = False
+            raise HTTPException(
+                status_code=500,
+                detail=f'{info_msg} => Could not connect! Error was {error}.'
+            ) from error
+        finally:
+            if circuit_breaker is not None:
+                if succeeded is None:
+                    circuit_breaker.release()
+                else:
+                    circuit_breaker.record(success=succeeded)
+            if upstream is not None and succeeded is not None:
+                service.load_balancer.record(upstream, success=succeeded)
+
+        if response.is_error:
+            await response.aread()
+        await _check_response_status(response=response, info_msg=info_msg)
+
+        if stream_format is None:
+            content_type = response.headers.get('content-type', '')
+            stream_format = (
+                NDJSON if 'ndjson' in content_type or 'jsonl' in content_type
+                else ARRAY
+            )
+        if stream_format == NDJSON:
+            items = iter_ndjson(response.aiter_lines())
+        else:
+            items = iter_json_array(response.aiter_text())
+
+        validation = (
+            service.definition.validation if service else Validation.full
+        )
+        count = 0
+        try:
+            async for item in items:
+                yield convert_to_model(model, item, validation)
+                count += 1
+        except ValidationError as error:
+            raise HTTPException(
+                status_code=500,
+                detail=f'{info_msg} => Invalid item. Error was {error}.'
+            ) from error
+        except ValueError as error:
+            raise HTTPException(
+                status_code=500,
+                detail=f'{info_msg} => Invalid result. Error was {error}.'
+            ) from error
+        except httpx.TransportError as error:
+            raise HTTPException(
+                status_code=500,
+                detail=f'{info_msg} => Stream broke! Error was {error}.'
+            ) from error
+        logging.debug(f'{info_msg} => streamed {count} items.')
+
+
+async def _load_batch(
+        keys: List[Hashable],
+        model: BaseModel,
+        service: Service
+) -> Dict[Hashable, BaseModel]:
+    """Load ``keys`` using the batch-endpoint of ``service``.
+
+    The batch-endpoint gets the keys as request-param ``key_param`` and has
+    to return either a list of items containing their key inside
+    ``key_field`` or an object with the keys as properties.
+
+    Parameters:
+        keys: the keys to load.
+        model: the model to convert each item into.
+        service: the service to load the keys from.
+
+    Raises:
+        if any error occur a :class:`HTTPException` will be raised.
+
+    Returns:
+        the loaded items by their keys. Keys unknown to the service are
+        missing.
+
+    """
+    batch = service.definition.batch
+    info_msg = (
+        f'external service batch (url: {batch.url}, method: '
+        f'{batch.method.upper()}, keys: {keys})'
+    )
+    logging.debug(info_msg)
+
+    response = await _request_with_retries(
+        url=batch.url,
+        method=batch.method,
+        params={batch.key_param: keys},
+        service=service,
         info_msg=info_msg
     )
-    logging.debug(f'{info_msg} => returned result {result}.')
-    return result
+    await _check_response_status(response=response, info_msg=info_msg)
+
+    result = loads(response.content)
+    if isinstance(result, dict):
+        items = result.items()
+    else:
+        items = [(item.get(batch.key_field), item) for item in result]
+    # keys of json-objects are strings, so compare the keys as strings
+    items_by_key = {str(key): item for key, item in items}
+    try:
+        return {
+            key: convert_to_model(
+                model,
+                items_by_key[str(key)],
+                service.definition.validation
+            )
+            for key in keys if str(key) in items_by_key
+        }
+    except ValidationError as error:
+        raise HTTPException(
+            status_code=500,
+            detail=(
+                f'{info_msg} => Invalid result: {response}. Error was {error}.'
+            )
+        )
+
+
+async def load_service_item(
+        key: Hashable,
+        model: BaseModel,
+        service: Service
+) -> Optional[BaseModel]:
+    """Load the item with ``key`` from the batch-endpoint of ``service``.
+
+    Instead of a call per key, the keys requested (by the same or by
+    concurrent requests) within ``max_wait`` seconds are loaded by one call
+    of the batch-endpoint defined as ``batch`` for the service.
+
+    Parameters:
+        key: the key of the item to load.
+        model: the model to convert the item into.
+        service: the service (as in ``app.services``) to load the item from.
+
+    Returns:
+        the item as an instance of ``model`` or ``None`` if the service
+        returned no item for ``key``.
+
+    Raises:
+        if any error occur a :class:`HTTPException` will be raised.
+
+    """
+    return await service.get_batcher(model).load(key)
+
+
+@dataclass
+class ServiceCall:
+    """Definition of a single call inside :func:`call_services`.
+
+    Attributes:
+        url: the url of the service to call.
+        model: the model to convert the service-result into.
+        params: the params to use for the request.
+        method: the method to use to make the service-call.
+        service: the service (as in ``app.services``) the ``url`` belongs to.
+        use_cache: if the cache of the ``service`` should be used.
+        body: the body to send as json.
+
+    """
+    url: str
+    model: BaseModel
+    params: dict = None
+    method: str = 'post'
+    service: Service = None
+    use_cache: bool = True
+    body: Any = None
+
+
+async def call_services(
+        calls: List[ServiceCall],
+        max_concurrency: int = None,
+        fail_fast: bool = True,
+) -> List[Union[BaseModel,
+                HTTPException]]:
+    """Make multiple calls of :func:`call_service` concurrently.
+
+    The calls run at the same time, so the total duration is the duration of
+    the slowest call instead of the sum of all calls. Beside
+    ``max_concurrency`` the ``max_concurrent_calls`` of each service limit
+    the concurrently running calls.
+
+    Parameters:
+        calls: the calls to make.
+        max_concurrency: the maximum calls of ``calls`` running at the same
+            time. If not set, all calls are started at once.
+        fail_fast: if the first failing call should cancel all other calls
+            and raise its :class:`HTTPException`. Otherwise the exception of a
+            failed call is returned at its position inside the results.
+
+    Returns:
+        the results of the calls in the same order as ``calls``.
+
+    Raises:
+        if ``fail_fast`` and any call fails, the :class:`HTTPException` of
+        the first failed call.
+
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def _call(call: ServiceCall) -> BaseModel:
+        async with _acquire(semaphore):
+            return await call_service(
+                url=call.url,
+                model=call.model,
+                params=call.params,
+                method=call.method,
+                service=call.service,
+                use_cache=call.use_cache,
+                body=call.body
+            )
+
+    tasks = [asyncio.ensure_future(_call(call)) for call in calls]
+    if not fail_fast:
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception) and not isinstance(
+                    result,
+                    HTTPException):
+                raise result
+        return results
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def get_circuit_states(services: Dict[str, Service]) -> Dict[str, str]:
+    """Get the state of the circuit breakers of ``services``.
+
+    Can be used inside a readiness-endpoint like
+    ``get_circuit_states(ENDPOINT.router.services)``.
+
+    Parameters:
+        services: the services to get the states for (like
+            ``app.services``).
+
+    Returns:
+        the state (``closed``, ``open`` or ``half_open``) by service-name.
+
+    """
+    return {name: service.circuit_state for name, service in services.items()}
 
 
 def add_services_to_app(
@@ -175,11 +1421,14 @@ def add_services_to_app(
         services: Dict[str,
                        ServiceDefinition]
 ) -> FastAPI:
-    """Add instances of :class:`ServiceDefinition` as attribute of app.
+    """Add instances of :class:`Service` as attribute of app.
 
     For each service as defined in the ``config.yml`` as external-resource,
-    create a :class:`ServiceDefinition` instance with defined parameters, add
-    this instance to the ``app.services``-attribute.
+    create a :class:`Service` instance with its own tuned http-client (pool
+    and timeouts as defined for the service), add this
+    instance to the ``app.services``-attribute and add ``startup`` and
+    ``shutdown`` handlers to open / close the http-client of the service on
+    app-startup / app-shutdown.
 
     Parameters:
         app: the app to add the services as dependencies.
@@ -191,11 +1440,9 @@ def add_services_to_app(
 
     """
     for service_name, service_definition in services.items():
-        service = ServiceDefinition(
-            url=service_definition.url,
-            name=service_name,
-            servicetype=service_definition.servicetype
-        )
+        service = Service(definition=service_definition, logger=app.logger)
+        app.add_event_handler('startup', service.connect)
+        app.add_event_handler('shutdown', service.disconnect)
         try:
             app.services.update({service_name: service})
         except AttributeError:
@@ -203,4 +1450,16 @@ def add_services_to_app(
     return app
 
 
-__all__ = ['add_services_to_app', 'call_service', 'ServiceDefinition']
+__all__ = [
+    'add_services_to_app',
+    'call_service',
+    'call_services',
+    'close_default_client',
+    'get_circuit_states',
+    'get_default_client',
+    'load_service_item',
+    'Service',
+    'ServiceCall',
+    'ServiceDefinition',
+    'stream_service',
+]
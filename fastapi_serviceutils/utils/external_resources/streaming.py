@@ -0,0 +1,279 @@
+"""Incremental parsing and serialization of streamed content."""
+import csv
+import io
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+from typing import AsyncIterable
+from typing import AsyncIterator
+from typing import List
+from typing import Mapping
+from typing import Optional
+from typing import Union
+
+from pydantic import BaseModel
+
+from fastapi_serviceutils.utils.external_resources.serialization import dumps
+from fastapi_serviceutils.utils.external_resources.serialization import loads
+
+NDJSON = 'ndjson'
+ARRAY = 'array'
+
+_WHITESPACE = ' \t\n\r'
+# characters ending a number or literal inside a json-array
+_DELIMITERS = ',]' + _WHITESPACE
+# the expected next part of a json-array while parsing it
+_START = 'start'
+_ITEM_OR_END = 'item_or_end'
+_ITEM = 'item'
+_SEPARATOR = 'separator'
+# characters ending an item of a json-array or changing its nesting
+_TOP_LEVEL_PATTERN = re.compile(r'["\[\]{},\s]')
+_NESTED_PATTERN = re.compile(r'["\[\]{}]')
+# the content of a json-string up to its closing quote (or a trailing
+# backslash, if the escaped character did not arrive yet)
+_STRING_CONTENT_PATTERN = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+
+
+async def iter_ndjson(lines: AsyncIterable[str]) -> AsyncIterator[Any]:
+    """Parse newline-delimited json (one json-document per line).
+
+    Parameters:
+        lines: the lines of the content.
+
+    Returns:
+        the parsed json-documents, one after another.
+
+    """
+    async for line in lines:
+        line = line.strip()
+        if line:
+            yield loads(line)
+
+
+@dataclass
+class _ItemScanner:
+    """Find the end of the current item of a json-array across chunks.
+
+    The state of the scan is kept between chunks, so each character of an
+    item is scanned once, however many chunks the item is split into.
+
+    Attributes:
+        offset: the number of already scanned characters of the item.
+        depth: the nesting of arrays and objects at ``offset``.
+        in_string: if ``offset`` is inside a string.
+
+    """
+    offset: int = 0
+    depth: int = 0
+    in_string: bool = False
+
+    def find_end(self, buffer: str, start: int) -> Optional[int]:
+        """Get the end of the item starting at ``start`` inside ``buffer``.
+
+        Parameters:
+            buffer: the content containing the item.
+            start: the position of the first character of the item.
+
+        Returns:
+            the position after the item or ``None`` if the item is not
+            complete yet (the scan continues there on the next call).
+
+        """
+        index = start + self.offset
+        while index < len(buffer):
+            if self.in_string:
+                index = _STRING_CONTENT_PATTERN.match(buffer, index).end()
+                if index >= len(buffer) or buffer[index] != '"':
+                    break
+                self.in_string = False
+                index += 1
+                if self.depth == 0:
+                    return self._finish(index)
+                continue
+            pattern = _NESTED_PATTERN if self.depth else _TOP_LEVEL_PATTERN
+            match = pattern.search(buffer, index)
+            if match is None:
+                index = len(buffer)
+                break
+            index = match.start()
+            character = buffer[index]
+            if character == '"':
+                self.in_string = True
+            elif character in '[{':
+                self.depth += 1
+            elif self.depth == 0:
+                # the end of a number or literal
+                return self._finish(index)
+            elif character in ']}':
+                self.depth -= 1
+                if self.depth == 0:
+                    return self._finish(index + 1)
+            index += 1
+        self.offset = index - start
+        return None
+
+    def _finish(self, end: int) -> int:
+        """Reset the state for the next item and return ``end``."""
+        self.offset = 0
+        self.depth = 0
+        self.in_string = False
+        return end
+
+
+def _is_complete(buffer: str, start: int, end: int) -> bool:
+    """Check if the item decoded from ``start`` to ``end`` is complete.
+
+    Arrays, objects and strings end with their closing character. Numbers
+    and literals are only complete if a delimiter follows, otherwise the
+    next chunk could continue them (like ``1.`` followed by ``5``).
+
+    """
+    if buffer[start] in '[{"':
+        return True
+    return end < len(buffer) and buffer[end] in _DELIMITERS
+
+
+async def iter_json_array(chunks: AsyncIterable[str]) -> AsyncIterator[Any]:
+    """Parse the items of a top-level json-array as they arrive.
+
+    Only the current item and the unparsed rest of the last chunk are kept in
+    memory, so arrays of any size can be consumed. An item not complete
+    inside the current chunk is scanned for its end while further chunks
+    arrive and decoded once complete, so items split into many chunks are
+    not parsed again for each chunk.
+
+    Parameters:
+        chunks: the content as text-chunks of any size.
+
+    Raises:
+        :class:`ValueError` if the content is not a valid json-array.
+
+    Returns:
+        the parsed items of the array, one after another.
+
+    """
+    decoder = json.JSONDecoder()
+    scanner = _ItemScanner()
+    buffer = ''
+    position = 0
+    expected = _START
+    async for chunk in chunks:
+        if position:
+            buffer = buffer[position:]
+            position = 0
+        buffer += chunk
+        while True:
+            if not scanner.offset:
+                # between items
+                while position < len(buffer) and (
+                        buffer[position] in _WHITESPACE):
+                    position += 1
+                if position >= len(buffer):
+                    break
+                character = buffer[position]
+                if expected == _START:
+                    if character != '[':
+                        raise ValueError('Content is not a json-array.')
+                    expected = _ITEM_OR_END
+                    position += 1
+                    continue
+                if character == ']' and expected != _ITEM:
+                    return
+                if character == ',' and expected == _SEPARATOR:
+                    expected = _ITEM
+                    position += 1
+                    continue
+                if expected == _SEPARATOR or character in ',]':
+                    raise ValueError(
+                        f'Unexpected {character!r} inside the json-array.'
+                    )
+                try:
+                    item, end = decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    end = None
+                if end is not None and _is_complete(buffer, position, end):
+                    yield item
+                    position = end
+                    expected = _SEPARATOR
+                    continue
+            end = scanner.find_end(buffer, position)
+            if end is None:
+                # the item is not complete yet, wait for the next chunk
+                break
+            item, decoded_end = decoder.raw_decode(buffer, position)
+            if decoded_end != end:
+                raise ValueError('Invalid item inside the json-array.')
+            yield item
+            position = end
+            expected = _SEPARATOR
+    raise ValueError('Content ended before the json-array was closed.')
+
+
+async def to_ndjson(
+        items: AsyncIterable[Union[BaseModel,
+                                   Mapping]]
+) -> AsyncIterator[str]:
+    """Serialize ``items`` to newline-delimited json.
+
+    Can be used as content of a :class:`starlette.responses.StreamingResponse`.
+
+    Parameters:
+        items: the models or rows (like the rows of
+            :meth:`fastapi_serviceutils.utils.external_resources.dbs.Database.stream`)
+            to serialize.
+
+    Returns:
+        one line of json for each item.
+
+    """
+    async for item in items:
+        if isinstance(item, BaseModel):
+            yield item.json() + '\n'
+        else:
+            yield dumps(dict(item)).decode() + '\n'
+
+
+async def to_csv(
+        rows: AsyncIterable[Mapping],
+        columns: List[str] = None
+) -> AsyncIterator[str]:
+    """Serialize ``rows`` to csv with a header-line.
+
+    Can be used as content of a :class:`starlette.responses.StreamingResponse`.
+
+    Parameters:
+        rows: the rows to serialize.
+        columns: the columns to write. If not set, the columns of the first
+            row are used.
+
+    Returns:
+        the header-line followed by one line for each row. Without rows and
+        ``columns`` nothing is returned.
+
+    """
+    buffer = io.StringIO()
+    writer = None
+    async for row in rows:
+        if writer is None:
+            columns = columns or list(row.keys())
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+        writer.writerow([row[column] for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if writer is None and columns:
+        csv.writer(buffer).writerow(columns)
+        yield buffer.getvalue()
+
+
+__all__ = [
+    'ARRAY',
+    'iter_json_array',
+    'iter_ndjson',
+    'NDJSON',
+    'to_csv',
+    'to_ndjson',
+]
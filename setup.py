@@ -53,17 +53,19 @@ setup(
     ],
     package_data={},
     install_requires=[
-        'cookiecutter>=1.6', 'databases[postgresql]>=0.2', 'fastapi[all]>=0.44',
-        'loguru>=0.4', 'psycopg2>=2.8', 'requests>=2.22.0', 'sqlalchemy>=1.3',
-        'toolz>=0.10'
+        'asyncpg>=0.24', 'cookiecutter>=1.6',
+        'databases[postgresql]<0.4,>=0.3', 'fastapi[all]>=0.44', 'httpx>=0.18',
+        'loguru>=0.4', 'psycopg2>=2.8', 'sqlalchemy>=1.3', 'toolz>=0.10'
     ],
     extras_require={
+        'speedups': ['orjson>=3'],
+        'compression': ['brotli>=1', 'zstandard>=0.15'],
         'dev': [
             'autoflake>=1.3', 'coverage-badge>=1', 'flake8>=3.7',
             'ipython>=7.8', 'jedi>=0.14', 'neovim>=0.3.1', 'pudb>=2019.1',
             'pygments>=2.4', 'pylint>=2.4.3', 'pytest>=5',
-            'pytest-asyncio>=0.10', 'pytest-cov>=2', 'pytest-xdist>=1.30',
-            'sphinx>=2', 'sphinx-autodoc-typehints>=1.6',
+            'pytest-asyncio>=0.17', 'pytest-cov>=2', 'pytest-xdist>=1.30',
+            'requests>=2.22.0', 'sphinx>=2', 'sphinx-autodoc-typehints>=1.6',
             'sphinx-rtd-theme>=0.4.3', 'yapf>=0.27'
         ]
     },
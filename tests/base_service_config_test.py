@@ -13,6 +13,8 @@ from fastapi_serviceutils.app import Config
         'tests/configs/config.yml',
         'tests/configs/config2.yml',
         'tests/configs/config3.yml',
+        'tests/configs/config4.yml',
+        'tests/configs/config5.yml',
     ]
 )
 def test_collect_config_definition(config_path):
@@ -21,6 +23,54 @@ def test_collect_config_definition(config_path):
     assert isinstance(config, Config)
 
 
+def test_collect_config_definition_service_settings():
+    config = collect_config_definition(
+        config_path=Path('tests/configs/config4.yml')
+    )
+    service = config.external_resources.services['testservice']
+    assert service.name == 'testservice'
+    assert service.max_connections == 50
+    assert service.max_keepalive_connections == 10
+    assert service.keepalive_expiry == 30
+    assert service.connect_timeout == 1
+    assert service.read_timeout == 10
+    assert service.total_timeout == 15
+    assert service.cache.ttl == 30
+    assert service.cache.max_entries == 100
+    assert service.cache.max_bytes == 1048576
+
+
+def test_collect_config_definition_database_settings():
+    config = collect_config_definition(
+        config_path=Path('tests/configs/config5.yml')
+    )
+    database = config.external_resources.databases['testdb']
+    assert database.name == 'testdb'
+    assert database.min_size == 2
+    assert database.max_size == 10
+    assert database.warm_up
+    assert database.validation_query == 'SELECT 42'
+    assert database.cache.ttl == 30
+    assert database.cache.max_entries == 100
+    assert config.logger.batching.max_size == 5000
+    assert config.logger.batching.batch_size == 50
+    assert config.logger.batching.flush_interval == 0.2
+    assert config.logger.batching.overflow == 'drop_debug_first'
+    database = config.external_resources.databases['otherdb']
+    assert database.min_size == 5
+    assert database.max_size == 'auto'
+    assert database.max_connections == 40
+    assert database.workers == 4
+    assert database.acquire_timeout == 2
+    assert database.max_inactive_lifetime == 60
+    assert database.max_queries == 1000
+    assert not database.warm_up
+    assert database.cache is None
+    assert database.reflection.cache_dir == './log/reflection'
+    assert database.reflection.schema_version == '20200401'
+    assert database.reflection.db_schema == 'public'
+
+
 @pytest.mark.parametrize(
     'config_path',
     [
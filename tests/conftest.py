@@ -0,0 +1,91 @@
+"""Fixtures shared by the tests of the external resources."""
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
+
+import httpx
+import pytest_asyncio
+from loguru import logger
+
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+from fastapi_serviceutils.utils.external_resources.services import Service
+from fastapi_serviceutils.utils.external_resources.services import ServiceDefinition
+
+SERVICE_URL = 'http://stubservice/endpoint'
+SERVICE_DEFINITION = ServiceDefinition(
+    name='stubservice',
+    url=SERVICE_URL,
+    servicetype='rest',
+    max_connections=10,
+    max_keepalive_connections=5,
+    keepalive_expiry=30,
+    connect_timeout=1,
+    read_timeout=2,
+)
+
+
+@pytest_asyncio.fixture
+async def create_database(
+        tmp_path
+) -> AsyncIterator[Callable[..., Awaitable[Database]]]:
+    """Create connected sqlite-databases containing the table ``items``.
+
+    The table ``items`` (columns ``id`` and ``name``) contains ``rows`` rows
+    named ``item <id>``. The databases are disconnected on teardown.
+
+    """
+    created = []
+
+    async def _create_database(rows: int = 3, **settings) -> Database:
+        database = Database(
+            dsn=f'sqlite:///{tmp_path / f"test{len(created)}.sqlite"}',
+            logger=logger,
+            min_size=1,
+            max_size=1,
+            **settings
+        )
+        await database.connect()
+        created.append(database)
+        await database.execute(
+            'CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'
+        )
+        await database.execute_many(
+            'INSERT INTO items (id, name) VALUES (:id, :name)',
+            [{'id': index, 'name': f'item {index}'} for index in range(rows)]
+        )
+        return database
+
+    yield _create_database
+    for database in created:
+        if database.dbase.is_connected:
+            await database.disconnect()
+
+
+@pytest_asyncio.fixture
+async def create_service() -> AsyncIterator[Callable[..., Service]]:
+    """Create services answering requests using ``handler``.
+
+    The settings override the ones of ``SERVICE_DEFINITION``. The clients of
+    the services are closed on teardown.
+
+    """
+    created = []
+
+    def _create_service(handler, **settings) -> Service:
+        definition = ServiceDefinition(
+            **{
+                **SERVICE_DEFINITION.dict(),
+                **settings
+            }
+        )
+        service = Service(definition=definition, logger=logger)
+        service.client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler)
+        )
+        created.append(service)
+        return service
+
+    yield _create_service
+    for service in created:
+        if service.client is not None:
+            await service.client.aclose()
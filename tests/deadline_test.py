@@ -0,0 +1,128 @@
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from pydantic import BaseModel
+from starlette.testclient import TestClient
+
+from fastapi_serviceutils import make_app
+from fastapi_serviceutils.utils.external_resources.deadline import deadline
+from fastapi_serviceutils.utils.external_resources.deadline import get_deadline
+from fastapi_serviceutils.utils.external_resources.deadline import get_remaining_time
+from fastapi_serviceutils.utils.external_resources.retry import RetryDefinition
+from fastapi_serviceutils.utils.external_resources.services import call_service
+
+app = make_app(
+    config_path=Path('tests/configs/config4.yml'),
+    version='0.1.0',
+    endpoints=[],
+    enable_middlewares=['deadline'],
+    additional_middlewares=[],
+)
+
+
+class ExampleModel(BaseModel):
+    value: int
+
+
+@app.post('/remaining')
+async def remaining_endpoint():
+    return {'remaining': get_remaining_time()}
+
+
+def test_deadline_middleware():
+    with TestClient(app) as client:
+        response = client.post('/remaining', headers={'x-request-timeout': '5'})
+        assert 4 < response.json()['remaining'] <= 5
+        response = client.post('/remaining')
+        assert response.json()['remaining'] is None
+
+
+def test_deadline_only_shortens():
+    assert get_deadline() is None
+    with deadline(1):
+        first = get_deadline()
+        with deadline(10):
+            assert get_deadline() == first
+        with deadline(0.5):
+            assert get_deadline() < first
+    assert get_deadline() is None
+
+
+@pytest.mark.asyncio
+async def test_call_service_retries(create_service):
+    responses = [
+        httpx.Response(503),
+        httpx.Response(429,
+                       headers={'retry-after': '0'}),
+        httpx.Response(200,
+                       json={'value': 42}),
+    ]
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return responses[len(requests) - 1]
+
+    service = create_service(
+        handler,
+        retry=RetryDefinition(max_retries=3,
+                              backoff_factor=0.01)
+    )
+    result = await call_service(
+        url=service.url,
+        model=ExampleModel,
+        method='get',
+        service=service
+    )
+    assert result == ExampleModel(value=42)
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_call_service_retries_not_idempotent(create_service):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503)
+
+    service = create_service(
+        handler,
+        retry=RetryDefinition(max_retries=3,
+                              backoff_factor=0.01)
+    )
+    with pytest.raises(HTTPException):
+        await call_service(url=service.url, model=ExampleModel, service=service)
+    assert len(requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_call_service_retries_respect_deadline(create_service):
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(503)
+
+    service = create_service(
+        handler,
+        retry=RetryDefinition(max_retries=100,
+                              backoff_factor=0.01,
+                              max_backoff=0.01)
+    )
+    start = time.monotonic()
+    with deadline(0.2):
+        with pytest.raises(HTTPException):
+            await call_service(
+                url=service.url,
+                model=ExampleModel,
+                method='get',
+                service=service
+            )
+    assert time.monotonic() - start < 0.25
+    assert 1 < len(requests) < 5
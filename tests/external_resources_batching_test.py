@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from fastapi_serviceutils.utils.external_resources.batching import Batcher
+
+
+@pytest.mark.asyncio
+async def test_batcher_collects_keys():
+    batches = []
+
+    async def batch_function(keys):
+        batches.append(keys)
+        return {key: key * 2 for key in keys if key != 3}
+
+    batcher = Batcher(batch_function=batch_function, max_wait=0.01)
+    results = await asyncio.gather(
+        batcher.load(1),
+        batcher.load(2),
+        batcher.load(1),
+        batcher.load(3),
+    )
+    assert results == [2, 4, 2, None]
+    assert batches == [[1, 2, 3]]
+    assert await batcher.load_many([4, 5]) == [8, 10]
+    assert batcher.batches == 2
+
+
+@pytest.mark.asyncio
+async def test_batcher_max_batch_size():
+    batches = []
+    release = asyncio.Event()
+
+    async def batch_function(keys):
+        batches.append(keys)
+        await release.wait()
+        return {key: key for key in keys}
+
+    batcher = Batcher(
+        batch_function=batch_function,
+        max_batch_size=2,
+        max_wait=10
+    )
+    loading = asyncio.ensure_future(batcher.load_many([1, 2, 3, 4]))
+    while len(batches) < 2:
+        await asyncio.sleep(0)
+    # the running batches are referenced until they are done
+    assert len(batcher.flush_tasks) == 2
+    release.set()
+    results = await asyncio.wait_for(loading, 1)
+    assert results == [1, 2, 3, 4]
+    assert batches == [[1, 2], [3, 4]]
+    await asyncio.sleep(0)
+    assert not batcher.flush_tasks
+
+
+@pytest.mark.asyncio
+async def test_batcher_error():
+    async def batch_function(keys):
+        raise RuntimeError('failed')
+
+    batcher = Batcher(batch_function=batch_function)
+    with pytest.raises(RuntimeError):
+        await batcher.load_many([1, 2])
@@ -0,0 +1,63 @@
+from fastapi_serviceutils.utils.external_resources.cache import CacheDefinition
+from fastapi_serviceutils.utils.external_resources.cache import TTLCache
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_miss():
+    cache = TTLCache(ttl=10, max_entries=10)
+    assert cache.get('key') is None
+    cache.set('key', 'value')
+    assert cache.get('key') == 'value'
+    assert cache.statistics.hits == 1
+    assert cache.statistics.misses == 1
+    assert cache.statistics.entries == 1
+
+
+def test_cache_ttl():
+    clock = Clock()
+    cache = TTLCache(ttl=10, max_entries=10, clock=clock)
+    cache.set('key', 'value')
+    clock.now = 9.9
+    assert 'key' in cache
+    clock.now = 10
+    assert cache.get('key') is None
+    assert cache.statistics.expirations == 1
+    assert len(cache) == 0
+
+
+def test_cache_lru_eviction():
+    cache = TTLCache(ttl=10, max_entries=2)
+    cache.set('first', 1)
+    cache.set('second', 2)
+    cache.get('first')
+    cache.set('third', 3)
+    assert 'first' in cache
+    assert 'second' not in cache
+    assert 'third' in cache
+    assert cache.statistics.evictions == 1
+
+
+def test_cache_max_bytes():
+    cache = TTLCache(ttl=10, max_entries=10, max_bytes=100)
+    cache.set('first', 1, size=60)
+    cache.set('second', 2, size=60)
+    assert 'first' not in cache
+    assert cache.statistics.size == 60
+    cache.set('too_large', 3, size=101)
+    assert 'too_large' not in cache
+    assert 'second' in cache
+
+
+def test_cache_from_definition():
+    cache = TTLCache.from_definition(CacheDefinition(ttl=5, max_entries=3))
+    assert cache.ttl == 5
+    assert cache.max_entries == 3
+    assert cache.max_bytes is None
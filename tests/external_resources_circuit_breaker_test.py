@@ -0,0 +1,56 @@
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import CircuitBreaker
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import CLOSED
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import HALF_OPEN
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import OPEN
+
+
+class Clock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def create_breaker(clock) -> CircuitBreaker:
+    return CircuitBreaker(
+        failure_threshold=3,
+        recovery_timeout=10,
+        half_open_max_calls=1,
+        clock=clock
+    )
+
+
+def test_circuit_breaker_opens_after_threshold():
+    breaker = create_breaker(Clock())
+    for _ in range(2):
+        assert breaker.allow_request()
+        breaker.record(success=False)
+    assert breaker.state == CLOSED
+    breaker.record(success=True)
+    assert breaker.failures == 0
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record(success=False)
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+
+def test_circuit_breaker_half_open():
+    clock = Clock()
+    breaker = create_breaker(clock)
+    for _ in range(3):
+        breaker.record(success=False)
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record(success=False)
+    assert breaker.state == OPEN
+    clock.now = 20
+    assert breaker.allow_request()
+    breaker.record(success=True)
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+    assert breaker.allow_request()
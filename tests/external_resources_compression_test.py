@@ -0,0 +1,52 @@
+import gzip
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from fastapi_serviceutils.utils.external_resources.compression import CompressionDefinition
+from fastapi_serviceutils.utils.external_resources.compression import encode_body
+from fastapi_serviceutils.utils.external_resources.compression import get_accept_encoding
+from fastapi_serviceutils.utils.external_resources.compression import RESPONSE_ENCODINGS
+
+
+def test_get_accept_encoding():
+    assert get_accept_encoding(CompressionDefinition()).startswith(
+        'gzip, deflate'
+    )
+    assert set(RESPONSE_ENCODINGS) <= {'gzip', 'deflate', 'br', 'zstd'}
+    definition = CompressionDefinition(accept_encodings=['unknown', 'deflate'])
+    assert get_accept_encoding(definition) == 'deflate'
+    definition = CompressionDefinition(accept_encodings=['unknown'])
+    assert get_accept_encoding(definition) == 'identity'
+
+
+def test_compression_definition_invalid_request_encoding():
+    with pytest.raises(ValidationError):
+        CompressionDefinition(request_encoding='unknown')
+
+
+def test_encode_body():
+    assert encode_body(None, None) == (None, {})
+    content, headers = encode_body({'value': 1}, None)
+    assert json.loads(content) == {'value': 1}
+    assert headers == {'content-type': 'application/json'}
+
+    definition = CompressionDefinition(min_size=0)
+    content, headers = encode_body({'value': 1}, definition)
+    assert 'content-encoding' not in headers
+
+    definition = CompressionDefinition(request_encoding='gzip', min_size=100)
+    content, headers = encode_body({'value': 1}, definition)
+    assert json.loads(content) == {'value': 1}
+    assert 'content-encoding' not in headers
+    assert 'accept-encoding' in headers
+
+    body = {'values': list(range(100))}
+    content, headers = encode_body(body, definition)
+    assert headers['content-encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(content)) == body
+
+    definition = CompressionDefinition(request_encoding=None, min_size=0)
+    content, headers = encode_body(body, definition)
+    assert json.loads(content) == body
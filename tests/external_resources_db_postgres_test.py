@@ -0,0 +1,107 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+import sqlalchemy
+from loguru import logger
+
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+
+# dsn of a postgres database the tests may create the table bulk_items in
+POSTGRES_DSN = os.environ.get('TEST_POSTGRES_DSN')
+ROWS = 1000
+
+pytestmark = pytest.mark.skipif(
+    not POSTGRES_DSN,
+    reason='TEST_POSTGRES_DSN is not set'
+)
+
+items = sqlalchemy.Table(
+    'bulk_items',
+    sqlalchemy.MetaData(),
+    sqlalchemy.Column('id',
+                      sqlalchemy.Integer,
+                      primary_key=True),
+    sqlalchemy.Column('name',
+                      sqlalchemy.String),
+)
+
+
+@asynccontextmanager
+async def create_database(**settings) -> Database:
+    database = Database(
+        dsn=POSTGRES_DSN,
+        logger=logger,
+        **{
+            'min_size': 1,
+            'max_size': 2,
+            **settings
+        }
+    )
+    await database.connect()
+    try:
+        await database.execute('DROP TABLE IF EXISTS bulk_items')
+        await database.execute(
+            'CREATE TABLE bulk_items (id INTEGER PRIMARY KEY, name TEXT)'
+        )
+        yield database
+    finally:
+        await database.execute('DROP TABLE IF EXISTS bulk_items')
+        await database.disconnect()
+
+
+async def generate_rows():
+    for index in range(ROWS):
+        yield index, f'item {index}'
+
+
+@pytest.mark.asyncio
+async def test_postgres_execute_many_and_stream():
+    async with create_database() as database:
+        await database.execute_many(
+            items.insert(),
+            [{'id': index, 'name': f'item {index}'} for index in range(ROWS)],
+            chunk_size=300
+        )
+        rows = [
+            row async for row in database.stream(
+                items.select().order_by(items.c.id),
+                batch_size=100
+            )
+        ]
+        assert [row['id'] for row in rows] == list(range(ROWS))
+        assert rows[5]['name'] == 'item 5'
+
+
+@pytest.mark.asyncio
+async def test_postgres_copy_from():
+    async with create_database() as database:
+        inserted = await database.copy_from(
+            'bulk_items',
+            generate_rows(),
+            columns=['id', 'name']
+        )
+        assert inserted == ROWS
+        count = await database.fetch_val('SELECT count(*) FROM bulk_items')
+        assert count == ROWS
+
+
+@pytest.mark.asyncio
+async def test_postgres_acquire_timeout():
+    async with create_database(max_size=1, acquire_timeout=0.1) as database:
+        acquired = asyncio.Event()
+        release = asyncio.Event()
+
+        async def hold_connection():
+            async with database.dbase.connection():
+                acquired.set()
+                await release.wait()
+
+        holder = asyncio.ensure_future(hold_connection())
+        await acquired.wait()
+        with pytest.raises(asyncio.TimeoutError):
+            await database.fetch_val('SELECT 1')
+        release.set()
+        await holder
+        assert await database.fetch_val('SELECT 1') == 1
@@ -0,0 +1,130 @@
+import pytest
+from databases.core import Connection
+from fastapi import Depends
+from fastapi import FastAPI
+from fastapi import HTTPException
+from loguru import logger
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.testclient import TestClient
+
+from fastapi_serviceutils.app.middlewares import RequestTransactionMiddleware
+from fastapi_serviceutils.utils.external_resources.cache import CacheDefinition
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+from fastapi_serviceutils.utils.external_resources.dbs import get_request_connection
+from fastapi_serviceutils.utils.external_resources.dbs import REQUEST_TRANSACTIONS
+from fastapi_serviceutils.utils.external_resources.query_cache import QueryCache
+
+COUNT_QUERY = 'SELECT COUNT(*) FROM items'
+
+
+def create_app(tmp_path) -> FastAPI:
+    app = FastAPI()
+    database = Database(
+        dsn=f'sqlite:///{tmp_path / "test.sqlite"}',
+        logger=logger,
+        min_size=1,
+        max_size=1,
+        query_cache=QueryCache.from_definition(CacheDefinition())
+    )
+    app.databases = {'testdb': database}
+
+    async def _connect():
+        await database.connect()
+        await database.execute(
+            'CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)'
+        )
+
+    app.add_event_handler('startup', _connect)
+    app.add_event_handler('shutdown', database.disconnect)
+
+    @app.post('/items')
+    async def insert_items(
+            request: Request,
+            fail: bool = False,
+            status: int = None,
+            connection: Connection = Depends(
+                get_request_connection('testdb',
+                                       transaction=True)
+            )
+    ):
+        # queries using the database use the connection of the request
+        assert request.app.databases['testdb'].dbase.connection() is (
+            connection
+        )
+        await connection.execute('INSERT INTO items (name) VALUES (\'a\')')
+        await request.app.databases['testdb'].execute(
+            'INSERT INTO items (name) VALUES (\'b\')'
+        )
+        # the uncommitted rows are read, but not cached
+        database = request.app.databases['testdb']
+        assert await database.fetch_val(COUNT_QUERY) % 2 == 0
+        if fail:
+            raise RuntimeError('failed')
+        if status == 404:
+            raise HTTPException(status_code=404)
+        if status is not None:
+            return JSONResponse({'inserted': 0}, status_code=status)
+        return {'inserted': 2}
+
+    @app.get('/items')
+    async def count_items(
+            request: Request,
+            connection: Connection = Depends(get_request_connection('testdb'))
+    ):
+        return {
+            'count': await request.app.databases['testdb'].fetch_val(
+                COUNT_QUERY
+            )
+        }
+
+    return app
+
+
+def test_get_request_connection(tmp_path):
+    app = create_app(tmp_path)
+    with TestClient(app) as client:
+        assert client.post('/items').json() == {'inserted': 2}
+        assert client.get('/items').json() == {'count': 2}
+        with pytest.raises(RuntimeError):
+            client.post('/items', params={'fail': True})
+        assert client.get('/items').json() == {'count': 2}
+        assert client.post('/items').json() == {'inserted': 2}
+        assert client.get('/items').json() == {'count': 4}
+
+
+@pytest.mark.parametrize('status', [404, 500])
+def test_get_request_connection_error_response(tmp_path, status):
+    app = create_app(tmp_path)
+    app.add_middleware(RequestTransactionMiddleware)
+    with TestClient(app) as client:
+        assert client.get('/items').json() == {'count': 0}
+        response = client.post('/items', params={'status': status})
+        assert response.status_code == status
+        # rolled back and the count cached before is still valid
+        assert client.get('/items').json() == {'count': 0}
+        assert client.post('/items').json() == {'inserted': 2}
+        assert client.get('/items').json() == {'count': 2}
+
+
+def test_get_request_connection_commit_before_response(tmp_path):
+    app = create_app(tmp_path)
+    app.add_middleware(RequestTransactionMiddleware)
+    finished = []
+
+    async def check_finished(scope, receive, send):
+
+        async def _send(message):
+            if message['type'] == 'http.response.start':
+                finished.extend(
+                    request_transaction.finished
+                    for request_transaction in scope[REQUEST_TRANSACTIONS]
+                )
+            await send(message)
+
+        await app(scope, receive, _send)
+
+    with TestClient(app):
+        client = TestClient(check_finished)
+        assert client.post('/items').json() == {'inserted': 2}
+    assert finished == [True]
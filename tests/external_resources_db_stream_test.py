@@ -0,0 +1,99 @@
+import json
+
+import pytest
+import sqlalchemy
+
+from fastapi_serviceutils.utils.external_resources.streaming import to_csv
+from fastapi_serviceutils.utils.external_resources.streaming import to_ndjson
+
+ROWS = 300
+
+
+@pytest.mark.asyncio
+async def test_database_stream(create_database):
+    database = await create_database(rows=ROWS)
+    rows = [
+        row async for row in database.stream(
+            'SELECT id, name FROM items ORDER BY id',
+            batch_size=100
+        )
+    ]
+    assert len(rows) == ROWS
+    assert rows[10]['id'] == 10
+    assert rows[10]['name'] == 'item 10'
+
+    items = sqlalchemy.table(
+        'items',
+        sqlalchemy.column('id'),
+        sqlalchemy.column('name')
+    )
+    query = sqlalchemy.select([items.c.name]).where(items.c.id < 3)
+    assert [row['name'] async for row in database.stream(query)] == [
+        'item 0',
+        'item 1',
+        'item 2',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_database_stream_ndjson_csv(create_database):
+    database = await create_database(rows=ROWS)
+    query = 'SELECT id, name FROM items WHERE id < :limit ORDER BY id'
+    lines = [
+        line async for line in to_ndjson(
+            database.stream(query, values={'limit': 2})
+        )
+    ]
+    assert [json.loads(line) for line in lines] == [
+        {'id': 0, 'name': 'item 0'},
+        {'id': 1, 'name': 'item 1'},
+    ]
+    lines = [
+        line async for line in to_csv(
+            database.stream(query, values={'limit': 2})
+        )
+    ]
+    assert ''.join(lines) == 'id,name\r\n0,item 0\r\n1,item 1\r\n'
+    lines = [
+        line async for line in to_csv(
+            database.stream(query, values={'limit': 0}),
+            columns=['id']
+        )
+    ]
+    assert lines == ['id\r\n']
+
+
+async def _generate_rows(count: int):
+    for index in range(count):
+        yield (ROWS + index, f'item {ROWS + index}')
+
+
+@pytest.mark.asyncio
+async def test_database_execute_many_chunked(create_database):
+    database = await create_database(rows=ROWS)
+    await database.execute_many(
+        'INSERT INTO items (id, name) VALUES (:id, :name)',
+        ({'id': ROWS + index, 'name': 'new'} for index in range(25)),
+        chunk_size=10
+    )
+    assert await database.fetch_val(
+        'SELECT COUNT(*) FROM items WHERE name = :name',
+        values={'name': 'new'}
+    ) == 25
+
+
+@pytest.mark.asyncio
+async def test_database_copy_from(create_database):
+    database = await create_database(rows=ROWS)
+    inserted = await database.copy_from(
+        'items',
+        _generate_rows(25),
+        columns=['id', 'name'],
+        chunk_size=10
+    )
+    assert inserted == 25
+    assert await database.fetch_val('SELECT COUNT(*) FROM items') == ROWS + 25
+    assert await database.fetch_val(
+        'SELECT name FROM items WHERE id = :id',
+        values={'id': ROWS + 24}
+    ) == f'item {ROWS + 24}'
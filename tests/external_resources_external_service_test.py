@@ -30,8 +30,13 @@ class ExampleModel(BaseModel):
 
 @app.post('/test')
 async def serviceendpoint():
-    url = app.services['testservice'].url
-    response = await call_service(url=url, params=None, model=ExampleModel)
+    service = app.services['testservice']
+    response = await call_service(
+        url=service.url,
+        params=None,
+        model=ExampleModel,
+        service=service
+    )
     return response
 
 
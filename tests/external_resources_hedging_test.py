@@ -0,0 +1,39 @@
+from fastapi_serviceutils.utils.external_resources.hedging import Hedging
+from fastapi_serviceutils.utils.external_resources.hedging import HedgingDefinition
+
+
+def test_hedging_fixed_delay():
+    hedging = Hedging(definition=HedgingDefinition(delay=0.1))
+    assert hedging.get_delay() == 0.1
+    assert hedging.applies_to('GET')
+    assert not hedging.applies_to('post')
+
+
+def test_hedging_percentile():
+    hedging = Hedging(
+        definition=HedgingDefinition(percentile=90,
+                                     min_samples=10)
+    )
+    for latency in range(1, 10):
+        hedging.record_latency(latency / 100)
+    assert hedging.get_delay() is None
+    hedging.record_latency(0.1)
+    assert hedging.get_delay() == 0.09
+
+
+def test_hedging_budget():
+    hedging = Hedging(
+        definition=HedgingDefinition(delay=0,
+                                     max_extra_load=0.5),
+        max_budget=1
+    )
+    hedging.get_delay()
+    assert not hedging.allow_hedge()
+    hedging.get_delay()
+    assert hedging.allow_hedge()
+    hedging.get_delay()
+    assert not hedging.allow_hedge()
+    for _ in range(10):
+        hedging.get_delay()
+    assert hedging.budget == 1
+    assert hedging.hedged == 1
@@ -0,0 +1,81 @@
+import pytest
+
+from fastapi_serviceutils.utils.external_resources.load_balancing import LoadBalancer
+
+URLS = ['http://instance1', 'http://instance2', 'http://instance3']
+
+
+def test_load_balancer_least_outstanding():
+    balancer = LoadBalancer(urls=URLS)
+    balancer.upstreams[0].outstanding = 2
+    balancer.upstreams[2].outstanding = 1
+    assert balancer.select().url == 'http://instance2'
+
+
+def test_load_balancer_power_of_two():
+    balancer = LoadBalancer(urls=URLS, strategy='power_of_two')
+    balancer.upstreams[0].outstanding = 5
+    selected = {balancer.select().url for _ in range(100)}
+    assert selected == {'http://instance2', 'http://instance3'}
+
+
+def test_load_balancer_unknown_strategy():
+    with pytest.raises(ValueError):
+        LoadBalancer(urls=URLS, strategy='random')
+
+
+def test_load_balancer_resolve():
+    balancer = LoadBalancer(urls=URLS[:1] + URLS[:1])
+    upstream, url = balancer.resolve('http://instance1/items?id=1')
+    assert upstream is balancer.upstreams[0] or upstream is (
+        balancer.upstreams[1])
+    assert url == 'http://instance1/items?id=1'
+    assert balancer.resolve('http://other/items') == (None,
+                                                      'http://other/items')
+
+
+@pytest.mark.parametrize(
+    'urls, url, path',
+    [
+        (['http://svc:80', 'http://svc:8080'], 'http://svc:8080/x', '/x'),
+        (['http://svc/api', 'http://svc/api2'], 'http://svc/api2?a=1', '?a=1'),
+        (['http://svc/api', 'http://svc/api/v2'], 'http://svc/api/v2', ''),
+    ]
+)
+def test_load_balancer_resolve_boundary(urls, url, path):
+    balancer = LoadBalancer(urls=urls)
+    for _ in range(10):
+        upstream, resolved = balancer.resolve(url)
+        assert resolved == upstream.url + path
+    assert balancer.resolve('http://svc:8/x') == (None, 'http://svc:8/x')
+
+
+def test_load_balancer_ejection():
+    now = [0.0]
+    balancer = LoadBalancer(
+        urls=URLS[:2],
+        max_failures=2,
+        ejection_time=10,
+        clock=lambda: now[0]
+    )
+    failing = balancer.upstreams[0]
+    balancer.record(failing, success=False)
+    balancer.record(failing, success=True)
+    balancer.record(failing, success=False)
+    assert failing.ejected_until is None
+    balancer.record(failing, success=False)
+    assert failing.ejected_until == 10
+    assert {balancer.select().url for _ in range(20)} == {'http://instance2'}
+    # if all instances are ejected, all of them are used again
+    balancer.upstreams[1].ejected_until = 10
+    assert len({balancer.select().url for _ in range(50)}) == 2
+    now[0] = 10
+    balancer.upstreams[1].ejected_until = None
+    assert len({balancer.select().url for _ in range(50)}) == 2
+
+
+def test_load_balancer_round_robin():
+    balancer = LoadBalancer(urls=URLS, strategy='round_robin')
+    selected = [balancer.select().url for _ in range(6)]
+    assert selected[:3] == selected[3:]
+    assert sorted(selected[:3]) == URLS
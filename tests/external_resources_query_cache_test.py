@@ -0,0 +1,130 @@
+import pytest
+import sqlalchemy
+
+from fastapi_serviceutils.utils.external_resources.cache import CacheDefinition
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+from fastapi_serviceutils.utils.external_resources.query_cache import create_query_key
+from fastapi_serviceutils.utils.external_resources.query_cache import get_read_tables
+from fastapi_serviceutils.utils.external_resources.query_cache import get_written_tables
+from fastapi_serviceutils.utils.external_resources.query_cache import QueryCache
+
+ITEMS = sqlalchemy.table(
+    'items',
+    sqlalchemy.column('id'),
+    sqlalchemy.column('name')
+)
+OTHERS = sqlalchemy.table('others', sqlalchemy.column('id'))
+
+
+async def create_cached_database(create_database) -> Database:
+    database = await create_database(
+        query_cache=QueryCache.from_definition(CacheDefinition())
+    )
+    await database.execute('CREATE TABLE others (id INTEGER PRIMARY KEY)')
+    return database
+
+
+def test_get_read_tables():
+    query = sqlalchemy.select([ITEMS.c.name]).where(
+        ITEMS.c.id.in_(sqlalchemy.select([OTHERS.c.id]))
+    )
+    assert get_read_tables(query) == {'items', 'others'}
+    assert 'items' in get_read_tables('SELECT name FROM public."Items"')
+
+
+@pytest.mark.parametrize(
+    'query, expected',
+    [
+        (ITEMS.insert(), {'items'}),
+        (ITEMS.update().where(ITEMS.c.id == 1), {'items'}),
+        ('DELETE FROM public.items WHERE id = 1', {'items'}),
+        ('update items set name = :name', {'items'}),
+        ('TRUNCATE TABLE items', {'items'}),
+        ('CREATE INDEX idx ON items (name)', None),
+    ]
+)
+def test_get_written_tables(query, expected):
+    assert get_written_tables(query) == expected
+
+
+def test_create_query_key():
+    query = 'SELECT * FROM items WHERE id = :id AND name = :name'
+    assert create_query_key(
+        'fetch_all',
+        query,
+        {'id': 1, 'name': 'a'}
+    ) == create_query_key('fetch_all', query, {'name': 'a', 'id': 1})
+    assert create_query_key(
+        'fetch_all',
+        query,
+        {'id': 1, 'name': 'a'}
+    ) != create_query_key('fetch_all', query, {'id': 2, 'name': 'a'})
+    assert create_query_key('fetch_all', query, {'id': 1, 'name': 'a'}) != (
+        create_query_key('fetch_one', query, {'id': 1, 'name': 'a'})
+    )
+
+
+@pytest.mark.asyncio
+async def test_database_query_cache(create_database):
+    database = await create_cached_database(create_database)
+    statistics = database.query_cache.statistics
+    query = sqlalchemy.select([ITEMS.c.name]).order_by(ITEMS.c.id)
+    assert len(await database.fetch_all(query)) == 3
+    assert len(await database.fetch_all(query)) == 3
+    assert (statistics.hits, statistics.misses) == (1, 1)
+
+    row = await database.fetch_one(
+        'SELECT name FROM items WHERE id = :id',
+        values={'id': 1}
+    )
+    assert row['name'] == 'item 1'
+    assert await database.fetch_val('SELECT COUNT(*) FROM others') == 0
+    assert (statistics.hits, statistics.misses) == (1, 3)
+
+    # writes to other tables keep the entries of items
+    await database.execute('INSERT INTO others (id) VALUES (1)')
+    assert await database.fetch_val('SELECT COUNT(*) FROM others') == 1
+    assert len(await database.fetch_all(query)) == 3
+    assert (statistics.hits, statistics.misses) == (2, 4)
+
+    await database.execute(ITEMS.insert().values(id=3, name='item 3'))
+    assert len(await database.fetch_all(query)) == 4
+    assert database.query_cache.invalidations == 3
+    assert len(await database.fetch_all(query, use_cache=False)) == 4
+    assert (statistics.hits, statistics.misses) == (2, 5)
+
+
+@pytest.mark.asyncio
+async def test_database_query_cache_invalidated_by_bulk_writes(
+        create_database
+):
+    database = await create_cached_database(create_database)
+    query = 'SELECT COUNT(*) FROM items'
+    assert await database.fetch_val(query) == 3
+    await database.execute_many(
+        'INSERT INTO items (id, name) VALUES (:id, :name)',
+        [{'id': 3, 'name': 'item 3'}],
+        chunk_size=10
+    )
+    assert await database.fetch_val(query) == 4
+
+    async def _rows():
+        yield (4, 'item 4')
+
+    await database.copy_from('items', _rows(), columns=['id', 'name'])
+    assert await database.fetch_val(query) == 5
+    await database.execute('CREATE INDEX items_name ON items (name)')
+    assert len(database.query_cache.cache) == 0
+
+
+def test_query_cache_prunes_tags_of_evicted_entries():
+    query_cache = QueryCache.from_definition(CacheDefinition(max_entries=2))
+    for index in range(10):
+        query_cache.set(index, [index], frozenset(['items']), generation=0)
+    assert len(query_cache.cache) == 2
+    assert len(query_cache._tags['items']) <= 4
+    query_cache.set(10, [10], frozenset(['items']), generation=-1)
+    assert 10 not in query_cache.cache
+    query_cache.invalidate(frozenset(['items']))
+    assert len(query_cache.cache) == 0
+    assert query_cache.invalidations == 2
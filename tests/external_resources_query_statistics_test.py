@@ -0,0 +1,141 @@
+from pathlib import Path
+
+import pytest
+import sqlalchemy
+from loguru import logger
+from starlette.testclient import TestClient
+
+from fastapi_serviceutils import make_app
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+from fastapi_serviceutils.utils.external_resources.query_statistics import get_fingerprint
+from fastapi_serviceutils.utils.external_resources.query_statistics import normalize_sql
+from fastapi_serviceutils.utils.external_resources.query_statistics import OTHER_STATEMENTS
+from fastapi_serviceutils.utils.external_resources.query_statistics import QueryStatistics
+from fastapi_serviceutils.utils.external_resources.request_id import reset_request_id
+from fastapi_serviceutils.utils.external_resources.request_id import set_request_id
+
+
+@pytest.mark.parametrize(
+    'sql, expected',
+    [
+        (
+            "SELECT * FROM items\n  WHERE id = 12 AND name = 'it''s'",
+            'SELECT * FROM items WHERE id = ? AND name = ?'
+        ),
+        (
+            'SELECT * FROM items2 WHERE id IN (1, 2, 3)',
+            'SELECT * FROM items2 WHERE id IN (...)'
+        ),
+        (
+            'SELECT * FROM items WHERE id in (:id_1, :id_2)',
+            'SELECT * FROM items WHERE id IN (...)'
+        ),
+        ('SELECT * FROM items LIMIT 1.5', 'SELECT * FROM items LIMIT ?'),
+    ]
+)
+def test_normalize_sql(sql, expected):
+    assert normalize_sql(sql) == expected
+
+
+@pytest.mark.parametrize(
+    'values',
+    ['1', '-1, 2.5e3, 3', "'a', 'b, c', 'it''s'", "NULL, 'a', 2", '$1, $2'],
+)
+def test_normalize_sql_in_lists(values):
+    assert normalize_sql(f'SELECT * FROM items WHERE id IN ({values})') == (
+        'SELECT * FROM items WHERE id IN (...)'
+    )
+
+
+def test_get_fingerprint():
+    items = sqlalchemy.table('items', sqlalchemy.column('id'))
+    assert get_fingerprint(
+        sqlalchemy.select([items.c.id]).where(items.c.id == 5)
+    ) == 'SELECT items.id FROM items WHERE items.id = :id_1'
+
+
+def test_query_statistics_record():
+    query_statistics = QueryStatistics(buckets=[0.1, 1.0], max_statements=2)
+    query_statistics.record('a', 0.05)
+    query_statistics.record('a', 0.5, error=True)
+    query_statistics.record('a', 2.0)
+    statement = query_statistics.statements['a']
+    assert (statement.count, statement.errors) == (3, 1)
+    assert statement.max == 2.0
+    assert statement.mean == pytest.approx(2.55 / 3)
+    assert statement.histogram == [1, 1, 1]
+    query_statistics.record('b', 0.05)
+    query_statistics.record('c', 0.05)
+    query_statistics.record('d', 0.05)
+    assert set(query_statistics.statements) == {'a', 'b', OTHER_STATEMENTS}
+    assert query_statistics.statements[OTHER_STATEMENTS].count == 2
+
+
+@pytest.mark.asyncio
+async def test_database_query_statistics(tmp_path):
+    messages = []
+    handler_id = logger.add(messages.append, level='WARNING', format='{message}')
+    database = Database(
+        dsn=f'sqlite:///{tmp_path / "test.sqlite"}',
+        logger=logger,
+        min_size=1,
+        max_size=1,
+        query_statistics=QueryStatistics(slow_query_threshold=0.0)
+    )
+    await database.connect()
+    token = set_request_id(1234)
+    try:
+        await database.execute('CREATE TABLE items (id INTEGER PRIMARY KEY)')
+        await database.execute_many(
+            'INSERT INTO items (id) VALUES (:id)',
+            [{'id': index} for index in range(3)]
+        )
+        for index in range(3):
+            await database.fetch_one(
+                f'SELECT id FROM items WHERE id = {index}'
+            )
+        rows = database.stream('SELECT id FROM items')
+        assert [row['id'] async for row in rows] == [0, 1, 2]
+        # a stream closed before reading all rows did not fail
+        rows = database.stream('SELECT id FROM items')
+        assert (await rows.__anext__())['id'] == 0
+        await rows.aclose()
+        with pytest.raises(Exception):
+            await database.fetch_all('SELECT * FROM missing')
+    finally:
+        reset_request_id(token)
+        logger.remove(handler_id)
+        await database.disconnect()
+    statements = database.query_statistics.statements
+    assert statements['SELECT id FROM items WHERE id = ?'].count == 3
+    assert statements['INSERT INTO items (id) VALUES (:id)'].count == 1
+    assert statements['SELECT id FROM items'].count == 2
+    assert statements['SELECT id FROM items'].errors == 0
+    assert statements['SELECT * FROM missing'].errors == 1
+    assert len(messages) == 8
+    assert messages[0].record['extra']['request_id'] == 1234
+    assert 'SELECT id FROM items WHERE id = ?' in messages[2]
+
+
+def test_query_statistics_endpoint():
+    app = make_app(
+        config_path=Path('tests/configs/config6.yml'),
+        version='0.1.0',
+        endpoints=[],
+        enable_middlewares=[],
+        additional_middlewares=[],
+    )
+
+    @app.post('/query')
+    async def query_endpoint():
+        return {'value': await app.databases['testdb'].fetch_val('SELECT 1')}
+
+    with TestClient(app) as client:
+        client.post('/query')
+        client.post('/query')
+        result = client.post('/api/query_statistics/').json()
+    assert list(result['databases']) == ['testdb']
+    statement = result['databases']['testdb']['SELECT ?']
+    assert (statement['count'], statement['errors']) == (2, 0)
+    assert list(statement['histogram']) == ['0.01', '0.1', '+Inf']
+    assert sum(statement['histogram'].values()) == 2
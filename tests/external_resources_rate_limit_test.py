@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+import pytest
+
+from fastapi_serviceutils.utils.external_resources.rate_limit import RateLimitDefinition
+from fastapi_serviceutils.utils.external_resources.rate_limit import TokenBucket
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_burst_and_queue():
+    bucket = TokenBucket.from_definition(
+        RateLimitDefinition(rate=50,
+                            burst=2,
+                            max_wait=1)
+    )
+    start = time.monotonic()
+    assert await bucket.acquire()
+    assert await bucket.acquire()
+    assert time.monotonic() - start < 0.01
+
+    waiting = asyncio.ensure_future(
+        asyncio.gather(bucket.acquire(),
+                       bucket.acquire())
+    )
+    await asyncio.sleep(0.005)
+    assert bucket.queue_depth == 2
+    assert await waiting == [True, True]
+    assert bucket.queue_depth == 0
+    assert time.monotonic() - start >= 0.035
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_max_wait():
+    bucket = TokenBucket(rate=10, burst=1, max_wait=0.05)
+    assert await bucket.acquire()
+    assert not await bucket.acquire()
+    assert bucket.rejected == 1
+    assert not await bucket.acquire(max_wait=0.2)
+    await asyncio.sleep(0.05)
+    assert await bucket.acquire()
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_cancelled():
+    bucket = TokenBucket(rate=10, burst=1, max_wait=1)
+    assert await bucket.acquire()
+    waiting = asyncio.ensure_future(bucket.acquire())
+    await asyncio.sleep(0)
+    assert bucket.tokens < 0
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert bucket.queue_depth == 0
+    assert bucket.tokens >= 0
@@ -0,0 +1,128 @@
+import pytest
+import sqlalchemy
+from loguru import logger
+
+from fastapi_serviceutils.utils.external_resources.dbs import Database
+from fastapi_serviceutils.utils.external_resources.reflection import ReflectionDefinition
+from fastapi_serviceutils.utils.external_resources.reflection import SchemaCache
+
+
+class FailingEngine:
+    """Engine failing on usage, to ensure the database is not accessed."""
+
+    def __getattr__(self, name):
+        raise AssertionError('database accessed')
+
+
+def create_tables(dsn: str):
+    engine = sqlalchemy.create_engine(dsn)
+    engine.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)')
+    engine.execute(
+        'CREATE TABLE items (id INTEGER PRIMARY KEY, '
+        'user_id INTEGER REFERENCES users (id), name TEXT)'
+    )
+    engine.dispose()
+
+
+def create_database(dsn: str, cache_dir, schema_version: str) -> Database:
+    return Database(
+        dsn=dsn,
+        logger=logger,
+        min_size=1,
+        max_size=1,
+        schema_cache=SchemaCache.from_definition(
+            dsn,
+            ReflectionDefinition(
+                cache_dir=str(cache_dir),
+                schema_version=schema_version
+            )
+        )
+    )
+
+
+def test_schema_cache_key(tmp_path, monkeypatch):
+    definition = ReflectionDefinition(cache_dir=str(tmp_path))
+    path = SchemaCache.from_definition('postgresql://user:secret@db/a',
+                                       definition).path
+    assert 'secret' not in str(path)
+    assert path != SchemaCache.from_definition(
+        'postgresql://user:secret@db/b',
+        definition
+    ).path
+    assert path != SchemaCache.from_definition(
+        'postgresql://user:secret@db/a',
+        ReflectionDefinition(cache_dir=str(tmp_path),
+                             schema_version='2')
+    ).path
+    monkeypatch.setattr(sqlalchemy, '__version__', '0.0.1')
+    assert path != SchemaCache.from_definition(
+        'postgresql://user:secret@db/a',
+        definition
+    ).path
+    assert SchemaCache(path=tmp_path / 'missing').load('items', logger) is None
+
+
+@pytest.mark.parametrize(
+    'content',
+    [
+        b'',
+        b'not a pickle',
+        # a class of a module not installed
+        b'cmissing_module\nTable\n.',
+        # a class called with wrong arguments
+        b'cbuiltins\nint\n(S"a"\nS"b"\nS"c"\ntR.',
+    ]
+)
+def test_schema_cache_load_invalid(tmp_path, content):
+    schema_cache = SchemaCache(path=tmp_path)
+    schema_cache.get_path('items').write_bytes(content)
+    assert schema_cache.load('items', logger) is None
+
+
+@pytest.mark.asyncio
+async def test_database_get_table(tmp_path):
+    dsn = f'sqlite:///{tmp_path / "test.sqlite"}'
+    create_tables(dsn)
+    cache_dir = tmp_path / 'cache'
+    database = create_database(dsn, cache_dir, '1')
+    items = await database.get_table('items')
+    assert [column.name for column in items.columns] == [
+        'id',
+        'user_id',
+        'name',
+    ]
+    # only the requested table and the tables of its foreign keys
+    assert set(database.meta.tables) == {'items', 'users'}
+    assert await database.get_table('items') is items
+    assert database.schema_cache.get_path('items').exists()
+    assert not database.schema_cache.get_path('users').exists()
+
+    # the same schema-version loads the tables without the database
+    cached_database = create_database(dsn, cache_dir, '1')
+    cached_database._engine = FailingEngine()
+    cached_items = await cached_database.get_table('items')
+    assert [column.name for column in cached_items.columns] == [
+        'id',
+        'user_id',
+        'name',
+    ]
+    assert cached_items.c.user_id.references(
+        cached_database.meta.tables['users'].c.id
+    )
+    # another schema-version reflects the tables again
+    other_database = create_database(dsn, cache_dir, '2')
+    other_database._engine = FailingEngine()
+    with pytest.raises(AssertionError):
+        await other_database.get_table('items')
+    database.engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_database_get_missing_table(tmp_path):
+    dsn = f'sqlite:///{tmp_path / "test.sqlite"}'
+    create_tables(dsn)
+    database = Database(dsn=dsn, logger=logger, min_size=1, max_size=1)
+    with pytest.raises(sqlalchemy.exc.NoSuchTableError):
+        await database.get_table('missing')
+    assert (await database.get_table('users')).c.name is not None
+    database.engine.dispose()
@@ -0,0 +1,57 @@
+import httpx
+import pytest
+
+from fastapi_serviceutils.utils.external_resources.retry import get_backoff
+from fastapi_serviceutils.utils.external_resources.retry import get_retry_after
+from fastapi_serviceutils.utils.external_resources.retry import RetryDefinition
+from fastapi_serviceutils.utils.external_resources.retry import should_retry_error
+from fastapi_serviceutils.utils.external_resources.retry import should_retry_response
+
+DEFINITION = RetryDefinition(backoff_factor=1, max_backoff=5)
+REQUEST = httpx.Request('GET', 'http://stubservice')
+
+
+@pytest.mark.parametrize('retry, maximum', [(0, 1), (1, 2), (2, 4), (5, 5)])
+def test_get_backoff(retry, maximum):
+    for _ in range(20):
+        assert 0 <= get_backoff(DEFINITION, retry) <= maximum
+
+
+@pytest.mark.parametrize(
+    'headers, expected',
+    [
+        ({},
+         None),
+        ({
+            'retry-after': '3'
+        },
+         3),
+        ({
+            'retry-after': 'invalid'
+        },
+         None),
+        ({
+            'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'
+        },
+         0),
+    ]
+)
+def test_get_retry_after(headers, expected):
+    response = httpx.Response(503, headers=headers)
+    assert get_retry_after(response) == expected
+
+
+def test_should_retry_error():
+    connect_error = httpx.ConnectError('refused', request=REQUEST)
+    read_error = httpx.ReadTimeout('timeout', request=REQUEST)
+    assert should_retry_error(DEFINITION, 'post', connect_error)
+    assert should_retry_error(DEFINITION, 'get', read_error)
+    assert not should_retry_error(DEFINITION, 'post', read_error)
+    assert not should_retry_error(DEFINITION, 'get', ValueError())
+
+
+def test_should_retry_response():
+    assert should_retry_response(DEFINITION, 'get', httpx.Response(503))
+    assert should_retry_response(DEFINITION, 'post', httpx.Response(429))
+    assert not should_retry_response(DEFINITION, 'post', httpx.Response(503))
+    assert not should_retry_response(DEFINITION, 'get', httpx.Response(404))
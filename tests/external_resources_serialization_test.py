@@ -0,0 +1,73 @@
+from typing import Dict
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+from pydantic import Schema
+from pydantic import ValidationError
+
+from fastapi_serviceutils.utils.external_resources.serialization import construct_model
+from fastapi_serviceutils.utils.external_resources.serialization import convert_to_model
+from fastapi_serviceutils.utils.external_resources.serialization import loads
+from fastapi_serviceutils.utils.external_resources.serialization import Validation
+
+
+class Point(BaseModel):
+    x: int
+    y: int
+
+
+class Shape(BaseModel):
+    name: str
+    center: Point
+    points: List[Point]
+    named_points: Dict[str, Point]
+    tags: List[str] = []
+    kind: str = Schema(None, alias='type')
+
+
+DATA = {
+    'name': 'triangle',
+    'center': {
+        'x': 1,
+        'y': 1
+    },
+    'points': [{
+        'x': 0,
+        'y': 0
+    },
+               {
+                   'x': 2,
+                   'y': 0
+               }],
+    'named_points': {
+        'top': {
+            'x': 1,
+            'y': 2
+        }
+    },
+    'type': 'polygon',
+}
+
+
+def test_loads():
+    assert loads(b'{"a": [1, 2]}') == {'a': [1, 2]}
+    assert loads('[1]') == [1]
+
+
+def test_construct_model():
+    shape = construct_model(Shape, DATA)
+    assert shape == Shape.parse_obj(DATA)
+    assert isinstance(shape.center, Point)
+    assert isinstance(shape.points[1], Point)
+    assert isinstance(shape.named_points['top'], Point)
+    assert shape.kind == 'polygon'
+    assert shape.tags == []
+
+
+def test_convert_to_model():
+    invalid = {**DATA, 'center': {'x': 'no int', 'y': 1}}
+    with pytest.raises(ValidationError):
+        convert_to_model(Shape, invalid, Validation.full)
+    shape = convert_to_model(Shape, invalid, Validation.trusted)
+    assert shape.center.x == 'no int'
@@ -0,0 +1,632 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from loguru import logger
+from pydantic import BaseModel
+
+from fastapi_serviceutils.utils.external_resources import services
+from fastapi_serviceutils.utils.external_resources.cache import CacheDefinition
+from fastapi_serviceutils.utils.external_resources.circuit_breaker import CircuitBreakerDefinition
+from fastapi_serviceutils.utils.external_resources.deadline import deadline
+from fastapi_serviceutils.utils.external_resources.hedging import HedgingDefinition
+from fastapi_serviceutils.utils.external_resources.services import call_service
+from fastapi_serviceutils.utils.external_resources.services import call_services
+from fastapi_serviceutils.utils.external_resources.services import close_default_client
+from fastapi_serviceutils.utils.external_resources.services import get_circuit_states
+from fastapi_serviceutils.utils.external_resources.services import get_default_client
+from fastapi_serviceutils.utils.external_resources.services import load_service_item
+from fastapi_serviceutils.utils.external_resources.services import Service
+from fastapi_serviceutils.utils.external_resources.services import ServiceCall
+from fastapi_serviceutils.utils.external_resources.services import ServiceDefinition
+from fastapi_serviceutils.utils.external_resources.services import stream_service
+from fastapi_serviceutils.utils.external_resources.streaming import to_ndjson
+from tests.conftest import SERVICE_DEFINITION
+from tests.conftest import SERVICE_URL as URL
+
+
+class ExampleModel(BaseModel):
+    value: int
+
+
+@pytest.mark.asyncio
+async def test_service_connect_disconnect():
+    service = Service(definition=SERVICE_DEFINITION, logger=logger)
+    assert service.client is None
+    await service.connect()
+    assert isinstance(service.client, httpx.AsyncClient)
+    assert service.client.timeout.connect == 1
+    assert service.client.timeout.read == 2
+    await service.disconnect()
+    assert service.client is None
+
+
+@pytest.mark.asyncio
+async def test_call_service_uses_client_of_service(create_service):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={'value': 42})
+
+    service = create_service(handler)
+    result = await call_service(
+        url=URL,
+        model=ExampleModel,
+        params={'key': 'value'},
+        service=service
+    )
+    assert result == ExampleModel(value=42)
+    assert requests[0].method == 'POST'
+    assert requests[0].url.params['key'] == 'value'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'response',
+    [
+        httpx.Response(500),
+        httpx.Response(200,
+                       json={'value': 'no int'}),
+    ]
+)
+async def test_call_service_invalid_response(response, create_service):
+    service = create_service(lambda request: response)
+    with pytest.raises(HTTPException):
+        await call_service(url=URL, model=ExampleModel, service=service)
+
+
+@pytest.mark.asyncio
+async def test_call_service_connection_error(create_service):
+
+    def handler(request):
+        raise httpx.ConnectError('refused', request=request)
+
+    service = create_service(handler)
+    with pytest.raises(HTTPException):
+        await call_service(url=URL, model=ExampleModel, service=service)
+
+
+@pytest.mark.asyncio
+async def test_default_client_shared():
+    client = get_default_client()
+    assert get_default_client() is client
+    await close_default_client()
+    assert client.is_closed
+    assert get_default_client() is not client
+    await close_default_client()
+
+
+@pytest.mark.asyncio
+async def test_call_service_without_service_uses_default_client(monkeypatch):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={'value': 42})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(
+        'fastapi_serviceutils.utils.external_resources.services.'
+        'get_default_client',
+        lambda: client
+    )
+    for _ in range(2):
+        result = await call_service(url=URL, model=ExampleModel)
+        assert result == ExampleModel(value=42)
+    assert len(requests) == 2
+    assert not client.is_closed
+    await client.aclose()
+
+
+def test_service_limits():
+    service = Service(definition=SERVICE_DEFINITION, logger=logger)
+    limits = service.get_limits()
+    assert limits.max_connections == 10
+    assert limits.max_keepalive_connections == 5
+    assert limits.keepalive_expiry == 30
+
+
+@pytest.mark.asyncio
+async def test_call_service_total_timeout(create_service):
+
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={'value': 42})
+
+    service = create_service(handler, total_timeout=0.01)
+    with pytest.raises(HTTPException):
+        await call_service(url=URL, model=ExampleModel, service=service)
+
+
+@pytest.mark.asyncio
+async def test_call_service_cache(create_service):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={'value': len(requests)})
+
+    service = create_service(handler, cache=CacheDefinition(ttl=60))
+    first = await call_service(
+        url=URL,
+        model=ExampleModel,
+        params={'a': 1, 'b': 2},
+        service=service
+    )
+    second = await call_service(
+        url=URL,
+        model=ExampleModel,
+        params={'b': 2, 'a': 1},
+        service=service
+    )
+    assert first is second
+    assert len(requests) == 1
+    await call_service(
+        url=URL,
+        model=ExampleModel,
+        params={'a': 1, 'b': 2},
+        service=service,
+        use_cache=False
+    )
+    await call_service(url=URL, model=ExampleModel, service=service)
+    assert len(requests) == 3
+    assert service.cache.statistics.hits == 1
+    assert service.cache.statistics.misses == 2
+
+
+@pytest.mark.asyncio
+async def test_call_service_coalesce(create_service):
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json={'value': len(requests)})
+
+    service = create_service(handler, coalesce=True)
+    results = await asyncio.gather(
+        *[
+            call_service(url=URL,
+                         model=ExampleModel,
+                         params={'id': 1},
+                         service=service) for _ in range(10)
+        ]
+    )
+    assert len(requests) == 1
+    assert all(result is results[0] for result in results)
+    assert service.calls_in_flight == {}
+    await call_service(
+        url=URL,
+        model=ExampleModel,
+        params={'id': 1},
+        service=service
+    )
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_call_service_coalesce_error(create_service):
+
+    async def handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(500)
+
+    service = create_service(handler, coalesce=True)
+    results = await asyncio.gather(
+        *[
+            call_service(url=URL,
+                         model=ExampleModel,
+                         service=service) for _ in range(3)
+        ],
+        return_exceptions=True
+    )
+    assert all(isinstance(result, HTTPException) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_call_services_concurrent_in_order(create_service):
+    running = []
+    max_running = []
+
+    async def handler(request):
+        running.append(request)
+        max_running.append(len(running))
+        await asyncio.sleep(0.01 * int(request.url.params['id']))
+        running.remove(request)
+        return httpx.Response(
+            200,
+            json={'value': int(request.url.params['id'])}
+        )
+
+    service = create_service(handler, max_concurrent_calls=3)
+    calls = [
+        ServiceCall(url=URL,
+                    model=ExampleModel,
+                    params={'id': value},
+                    service=service) for value in [5, 1, 4, 2, 3, 1]
+    ]
+    results = await call_services(calls)
+    assert [result.value for result in results] == [5, 1, 4, 2, 3, 1]
+    assert max(max_running) == 3
+    await call_services(calls, max_concurrency=2)
+    assert max(max_running[6:]) == 2
+
+
+@pytest.mark.asyncio
+async def test_call_services_collect_errors(create_service):
+
+    def handler(request):
+        if request.url.params['id'] == '2':
+            return httpx.Response(500)
+        return httpx.Response(200, json={'value': 1})
+
+    service = create_service(handler)
+    calls = [
+        ServiceCall(url=URL,
+                    model=ExampleModel,
+                    params={'id': value},
+                    service=service) for value in [1, 2, 3]
+    ]
+    results = await call_services(calls, fail_fast=False)
+    assert results[0] == ExampleModel(value=1)
+    assert isinstance(results[1], HTTPException)
+    assert results[2] == ExampleModel(value=1)
+    with pytest.raises(HTTPException):
+        await call_services(calls)
+
+
+@pytest.mark.asyncio
+async def test_call_service_circuit_breaker(create_service):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(503)
+
+    service = create_service(
+        handler,
+        circuit_breaker=CircuitBreakerDefinition(
+            failure_threshold=2,
+            recovery_timeout=60
+        )
+    )
+    assert get_circuit_states({'stubservice': service}) == {
+        'stubservice': 'closed'
+    }
+    for _ in range(4):
+        with pytest.raises(HTTPException):
+            await call_service(url=URL, model=ExampleModel, service=service)
+    assert len(requests) == 2
+    assert service.circuit_state == 'open'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'content_type, content',
+    [
+        ('application/json',
+         '[{"value": 1}, {"value": 2}, {"value": 3}]'),
+        ('application/x-ndjson',
+         '{"value": 1}\n{"value": 2}\n{"value": 3}\n'),
+    ]
+)
+async def test_stream_service(content_type, content, create_service):
+
+    async def chunks():
+        for position in range(0, len(content), 4):
+            yield content[position:position + 4].encode()
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            headers={'content-type': content_type},
+            content=chunks()
+        )
+
+    service = create_service(handler)
+    items = stream_service(url=URL, model=ExampleModel, service=service)
+    lines = [line async for line in to_ndjson(items)]
+    assert lines == ['{"value": 1}\n', '{"value": 2}\n', '{"value": 3}\n']
+
+
+@pytest.mark.asyncio
+async def test_stream_service_invalid_item(create_service):
+
+    def handler(request):
+        return httpx.Response(200, json=[{'value': 1}, {'value': 'no int'}])
+
+    service = create_service(handler)
+    items = []
+    with pytest.raises(HTTPException):
+        async for item in stream_service(url=URL,
+                                         model=ExampleModel,
+                                         service=service):
+            items.append(item)
+    assert items == [ExampleModel(value=1)]
+
+
+@pytest.mark.asyncio
+async def test_stream_service_outstanding(create_service):
+
+    def handler(request):
+        return httpx.Response(200, json=[{'value': 1}, {'value': 2}])
+
+    service = create_service(
+        handler,
+        url=None,
+        urls=['http://instance1/api',
+              'http://instance2/api']
+    )
+    upstreams = service.load_balancer.upstreams
+    items = stream_service(
+        url=f'{service.url}/items',
+        model=ExampleModel,
+        service=service
+    )
+    assert await items.__anext__() == ExampleModel(value=1)
+    # the open stream is outstanding on the selected instance
+    assert sum(upstream.outstanding for upstream in upstreams) == 1
+    assert [item async for item in items] == [ExampleModel(value=2)]
+    assert sum(upstream.outstanding for upstream in upstreams) == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_service_cancelled_half_open_probe(create_service):
+    started = asyncio.Event()
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            started.set()
+            await asyncio.sleep(10)
+        return httpx.Response(200, json=[{'value': 1}])
+
+    service = create_service(
+        handler,
+        circuit_breaker=CircuitBreakerDefinition(
+            failure_threshold=1,
+            recovery_timeout=60
+        )
+    )
+    circuit_breaker = service.circuit_breaker
+    circuit_breaker.opened_at = circuit_breaker.clock() - 60
+    assert service.circuit_state == 'half_open'
+
+    async def consume():
+        return [
+            item async for item in stream_service(
+                url=URL,
+                model=ExampleModel,
+                service=service
+            )
+        ]
+
+    probe = asyncio.ensure_future(consume())
+    await started.wait()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    # the cancelled probe neither failed nor kept the permit of the trial call
+    assert service.circuit_state == 'half_open'
+    assert circuit_breaker.trial_calls == 0
+    assert await consume() == [ExampleModel(value=1)]
+    assert service.circuit_state == 'closed'
+
+
+@pytest.mark.asyncio
+async def test_call_service_hedging(create_service):
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+        if len(requests) == 1:
+            await asyncio.sleep(10)
+        return httpx.Response(200, json={'value': len(requests)})
+
+    service = create_service(
+        handler,
+        hedging=HedgingDefinition(delay=0.01,
+                                  max_extra_load=1)
+    )
+    result = await call_service(
+        url=URL,
+        model=ExampleModel,
+        method='get',
+        service=service
+    )
+    assert result == ExampleModel(value=2)
+    assert len(requests) == 2
+    assert service.hedging.hedged == 1
+    await call_service(url=URL, model=ExampleModel, service=service)
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_call_service_hedging_respects_deadline(
+        monkeypatch,
+        create_service
+):
+    timeouts = []
+    attempt_request = services._attempt_request
+
+    async def _attempt_request(**kwargs):
+        timeouts.append(kwargs['timeout'])
+        return await attempt_request(**kwargs)
+
+    async def handler(request):
+        await asyncio.sleep(0.2 if len(timeouts) == 1 else 0)
+        return httpx.Response(200, json={'value': len(timeouts)})
+
+    monkeypatch.setattr(services, '_attempt_request', _attempt_request)
+    service = create_service(
+        handler,
+        total_timeout=1,
+        hedging=HedgingDefinition(delay=0.05,
+                                  max_extra_load=1)
+    )
+    # no hedge if the deadline is reached before the delay
+    with deadline(0.03):
+        with pytest.raises(HTTPException):
+            await call_service(
+                url=URL,
+                model=ExampleModel,
+                method='get',
+                service=service
+            )
+    assert len(timeouts) == 1
+    assert service.hedging.hedged == 0
+    # the hedge may only take the time left until the deadline
+    timeouts.clear()
+    with deadline(0.5):
+        result = await call_service(
+            url=URL,
+            model=ExampleModel,
+            method='get',
+            service=service
+        )
+    assert result == ExampleModel(value=2)
+    assert len(timeouts) == 2
+    assert timeouts[1] <= timeouts[0] - 0.05
+
+
+def test_service_definition_urls():
+    definition = ServiceDefinition(
+        name='stubservice',
+        urls=['http://instance1',
+              'http://instance2'],
+        servicetype='rest'
+    )
+    assert definition.url == 'http://instance1'
+    assert ServiceDefinition(**SERVICE_DEFINITION.dict()).urls == [URL]
+    with pytest.raises(ValueError):
+        ServiceDefinition(name='stubservice', servicetype='rest')
+
+
+@pytest.mark.asyncio
+async def test_call_service_load_balancing(create_service):
+    hosts = []
+
+    def handler(request):
+        hosts.append(request.url.host)
+        if request.url.host == 'instance1':
+            return httpx.Response(503)
+        return httpx.Response(200, json={'value': 42})
+
+    service = create_service(
+        handler,
+        url=None,
+        urls=['http://instance1/api',
+              'http://instance2/api'],
+        load_balancing={
+            'max_failures': 2,
+            'ejection_time': 60
+        }
+    )
+    assert service.url == 'http://instance1/api'
+    for _ in range(20):
+        try:
+            result = await call_service(
+                url=f'{service.url}/items',
+                model=ExampleModel,
+                method='get',
+                service=service
+            )
+        except HTTPException:
+            continue
+        assert result == ExampleModel(value=42)
+    # the failing instance is ejected after two failures
+    assert hosts.count('instance1') == 2
+    assert all(upstream.outstanding == 0
+               for upstream in service.load_balancer.upstreams)
+
+
+@pytest.mark.asyncio
+async def test_load_service_item(create_service):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        ids = request.url.params.get_list('ids')
+        return httpx.Response(
+            200,
+            json=[{'id': int(id_), 'value': int(id_) * 10}
+                  for id_ in ids if id_ != '3']
+        )
+
+    service = create_service(
+        handler,
+        batch={'url': 'http://stubservice/batch', 'max_wait': 0.01}
+    )
+    results = await asyncio.gather(
+        *[load_service_item(key, ExampleModel, service) for key in [1, 2, 3]]
+    )
+    assert results == [ExampleModel(value=10), ExampleModel(value=20), None]
+    assert len(requests) == 1
+    assert requests[0].method == 'POST'
+
+    with pytest.raises(ValueError):
+        create_service(handler).get_batcher(ExampleModel)
+
+
+@pytest.mark.asyncio
+async def test_call_service_compression(create_service):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(
+            200,
+            content=gzip.compress(b'{"value": 42}'),
+            headers={'content-encoding': 'gzip'}
+        )
+
+    service = create_service(
+        handler,
+        compression={
+            'accept_encodings': ['gzip'],
+            'request_encoding': 'gzip',
+            'min_size': 10
+        }
+    )
+    body = {'values': list(range(10))}
+    result = await call_service(
+        url=URL,
+        model=ExampleModel,
+        service=service,
+        body=body
+    )
+    assert result == ExampleModel(value=42)
+    request = requests[0]
+    assert request.headers['accept-encoding'] == 'gzip'
+    assert request.headers['content-encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(request.content)) == body
+
+
+@pytest.mark.asyncio
+async def test_call_service_rate_limit(create_service):
+    service = create_service(
+        lambda request: httpx.Response(200,
+                                       json={'value': 42}),
+        rate_limit={
+            'rate': 50,
+            'burst': 1,
+            'max_wait': 0.03
+        }
+    )
+    results = await asyncio.gather(
+        *[
+            call_service(url=URL,
+                         model=ExampleModel,
+                         service=service) for _ in range(3)
+        ],
+        return_exceptions=True
+    )
+    assert results[:2] == [ExampleModel(value=42)] * 2
+    assert isinstance(results[2], HTTPException)
+    assert 'Rate limit' in results[2].detail
+    assert service.rate_limiter.queue_depth == 0
@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from fastapi_serviceutils.utils.external_resources import streaming
+from fastapi_serviceutils.utils.external_resources.streaming import iter_json_array
+from fastapi_serviceutils.utils.external_resources.streaming import iter_ndjson
+
+
+async def as_chunks(content: str, size: int):
+    for position in range(0, len(content), size):
+        yield content[position:position + size]
+
+
+async def collect(items):
+    return [item async for item in items]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('size', [1, 2, 7, 1000])
+async def test_iter_json_array(size):
+    content = ' [ {"a": [1, 2], "b": "x,]}"}, 12345, true, "text" , null] '
+    items = await collect(iter_json_array(as_chunks(content, size)))
+    assert items == [{'a': [1, 2], 'b': 'x,]}'}, 12345, True, 'text', None]
+
+
+async def from_chunks(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'chunks, expected',
+    [
+        (['[1.', '5, 2]'], [1.5, 2]),
+        (['[1', '.5]'], [1.5]),
+        (['[2e', '3, 4]'], [2e3, 4]),
+        (['[2E-', '1 ,tr', 'ue]'], [0.2, True]),
+        (['[-', '7]'], [-7]),
+    ]
+)
+async def test_iter_json_array_split_numbers(chunks, expected):
+    assert await collect(iter_json_array(from_chunks(chunks))) == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('size', [1, 3])
+async def test_iter_json_array_escapes(size):
+    content = r'["a\"]b", {"c\\": ["{", "\\\""]}, "\u00e4"]'
+    items = await collect(iter_json_array(as_chunks(content, size)))
+    assert items == json.loads(content)
+
+
+@pytest.mark.asyncio
+async def test_iter_json_array_decodes_items_once_complete(monkeypatch):
+    decoded = []
+
+    class CountingDecoder(json.JSONDecoder):
+        def raw_decode(self, content, position=0):
+            decoded.append(position)
+            return super().raw_decode(content, position)
+
+    monkeypatch.setattr(streaming.json, 'JSONDecoder', CountingDecoder)
+    large = {'values': list(range(2000)), 'text': 'x' * 2000}
+    content = json.dumps([large, 1, large])
+    items = await collect(iter_json_array(as_chunks(content, 16)))
+    assert items == [large, 1, large]
+    # an incomplete item is decoded once more after it is complete
+    assert len(decoded) <= 6
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'content',
+    [
+        '{"a": 1}',
+        '[1, 2',
+        '[{"a": 1}',
+        '[1, }]',
+        '["a", "b]',
+        '[1 2]',
+        '[{"a": 1} {"a": 2}]',
+        '[1,, 2]',
+        '[1, ]',
+        '[1x, 2]',
+    ]
+)
+async def test_iter_json_array_invalid(content):
+    with pytest.raises(ValueError):
+        await collect(iter_json_array(as_chunks(content, 2)))
+
+
+@pytest.mark.asyncio
+async def test_iter_ndjson():
+    lines = as_chunks('{"a": 1}\n\n[2]\n', 1000)
+
+    async def split_lines():
+        async for chunk in lines:
+            for line in chunk.split('\n'):
+                yield line
+
+    assert await collect(iter_ndjson(split_lines())) == [{'a': 1}, [2]]
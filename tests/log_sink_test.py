@@ -0,0 +1,157 @@
+import threading
+import time
+
+import pytest
+from loguru import logger
+
+from fastapi_serviceutils.app.log_sink import BatchingSink
+from fastapi_serviceutils.app.log_sink import BLOCK
+from fastapi_serviceutils.app.log_sink import DROP_DEBUG_FIRST
+from fastapi_serviceutils.app.log_sink import DROP_OLDEST
+from fastapi_serviceutils.app.log_sink import LogBatchingDefinition
+from fastapi_serviceutils.app.logger import customize_logging
+from fastapi_serviceutils.app.logger import get_log_statistics
+
+
+class BlockedWriter:
+    """Writer collecting the batches, waiting until released."""
+
+    def __init__(self):
+        self.batches = []
+        self.released = threading.Event()
+
+    def __call__(self, text: str):
+        self.released.wait()
+        self.batches.append(text)
+
+    @property
+    def messages(self):
+        return [
+            line for batch in self.batches for line in batch.splitlines()
+        ]
+
+
+def add_sink(sink: BatchingSink) -> int:
+    return logger.add(
+        sink,
+        format='{message}',
+        level='DEBUG',
+        filter=lambda record: 'sink_test' in record['extra']
+    )
+
+
+def test_batching_sink_batches():
+    writer = BlockedWriter()
+    writer.released.set()
+    sink = BatchingSink(writers=[writer], batch_size=3, flush_interval=0.05)
+    handler_id = add_sink(sink)
+    log = logger.bind(sink_test=True)
+    for index in range(7):
+        log.info(f'message {index}')
+    # the last message is written after the flush_interval
+    time.sleep(0.2)
+    assert writer.messages == [f'message {index}' for index in range(7)]
+    assert len(writer.batches) == sink.statistics.batches
+    assert all(len(batch.splitlines()) <= 3 for batch in writer.batches)
+    logger.remove(handler_id)
+    assert sink.statistics.written == 7
+
+
+@pytest.mark.parametrize(
+    'overflow, expected, dropped',
+    [
+        (
+            DROP_OLDEST,
+            ['info 2', 'debug 3', 'info 4', 'warning 5'],
+            {'DEBUG': 1, 'INFO': 1},
+        ),
+        (
+            DROP_DEBUG_FIRST,
+            ['info 0', 'info 2', 'info 4', 'warning 5'],
+            {'DEBUG': 2},
+        ),
+    ]
+)
+def test_batching_sink_overflow(overflow, expected, dropped):
+    writer = BlockedWriter()
+    sink = BatchingSink(
+        writers=[writer],
+        max_size=4,
+        batch_size=100,
+        flush_interval=10,
+        overflow=overflow
+    )
+    handler_id = add_sink(sink)
+    log = logger.bind(sink_test=True)
+    log.info('info 0')
+    log.debug('debug 1')
+    log.info('info 2')
+    log.debug('debug 3')
+    log.info('info 4')
+    log.warning('warning 5')
+    assert sink.statistics.dropped == dropped
+    assert sink.statistics.total_dropped == 2
+    writer.released.set()
+    logger.remove(handler_id)
+    assert writer.messages == expected
+
+
+def test_batching_sink_block():
+    writer = BlockedWriter()
+    sink = BatchingSink(
+        writers=[writer],
+        max_size=2,
+        batch_size=2,
+        flush_interval=10,
+        overflow=BLOCK
+    )
+    handler_id = add_sink(sink)
+    log = logger.bind(sink_test=True)
+
+    def _log_messages():
+        for index in range(6):
+            log.info(f'message {index}')
+
+    thread = threading.Thread(target=_log_messages)
+    thread.start()
+    thread.join(0.2)
+    # the logging waits for room inside the queue
+    assert thread.is_alive()
+    writer.released.set()
+    thread.join(2)
+    assert not thread.is_alive()
+    logger.remove(handler_id)
+    assert writer.messages == [f'message {index}' for index in range(6)]
+    assert sink.statistics.total_dropped == 0
+
+
+def test_log_batching_definition():
+    with pytest.raises(ValueError):
+        LogBatchingDefinition(overflow='drop_newest')
+
+
+def test_customize_logging_batching(tmp_path, capsys):
+    filepath = tmp_path / 'log' / 'service.log'
+    log = customize_logging(
+        filepath,
+        level='info',
+        rotation='1 days',
+        retention='1 months',
+        _format='{extra[request_id]} - {message}',
+        batching=LogBatchingDefinition(batch_size=10, flush_interval=0.05)
+    )
+    log.debug('hidden')
+    log.info('message {value}', value=1)
+    logger.remove()
+    assert get_log_statistics().written == 1
+    assert filepath.read_text() == 'app - message 1\n'
+    assert capsys.readouterr().out == 'app - message 1\n'
+    customize_logging(
+        filepath,
+        level='info',
+        rotation='1 days',
+        retention='1 months',
+        _format='{message}'
+    )
+    assert get_log_statistics() is None
+    logger.remove()